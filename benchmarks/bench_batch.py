@@ -0,0 +1,45 @@
+"""
+Scaling curve of generate_batch over the number of worker processes.
+
+Usage:
+    python benchmarks/bench_batch.py [--elections N] [--max-workers N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ndrwahltexte.batch import generate_batch  # noqa: E402
+from ndrwahltexte.text_generator import OUTPUT_CACHE  # noqa: E402
+from synthetic import make_elections  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--elections', type=int, default=20000, help='Number of elections per run')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1, help='Largest pool size')
+    args = parser.parse_args()
+
+    elections = make_elections(args.elections, num_candidates=8)
+    # Measure generation, not cache hits (forked workers inherit the parent's cache)
+    OUTPUT_CACHE.resize(0)
+    worker_counts = sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i <= args.max_workers], args.max_workers})
+
+    print(f"{'workers':>7} {'seconds':>8} {'elections/s':>12} {'speedup':>8} {'efficiency':>10}")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        count = sum(1 for _ in generate_batch(elections, workers=workers))
+        seconds = time.perf_counter() - start
+        assert count == len(elections)
+        baseline = baseline or seconds
+        speedup = baseline / seconds
+        print(f"{workers:>7} {seconds:>8.2f} {count / seconds:>12.0f} {speedup:>7.2f}x {speedup / workers:>9.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Per-call latency of the CLI cold start vs. `ndrwahltexte --client` against a
+running prefork server.
+
+Starts `ndrwahltexte --workers N prefork` on a temporary socket, then runs
+every payload (synthetic elections of all result types, a 'Kein Ergebnis'
+election, invalid JSON and invalid election data) once through a fresh CLI
+and once through `--client`, checks that stdout, stderr and exit code are
+identical, and times both over --runs calls. Exits with status 1 if an
+answer differs.
+
+Usage:
+    python benchmarks/bench_client.py [--runs N] [--workers N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_election  # noqa: E402
+
+
+def make_payloads():
+    """Returns (name, stdin bytes) for every case compared."""
+    payloads = []
+    for ergebnis_art in ('Kein Ergebnis', 'Zwischenergebnis', 'Vorläufiges Endergebnis'):
+        payloads.append((ergebnis_art, json.dumps(make_election(0, 8, ergebnis_art)).encode('utf-8')))
+    payloads.append(('invalid JSON', b'{"wahl": '))
+    payloads.append(('invalid election', b'{"wahl": {}}'))
+    return payloads
+
+
+def run(args, payload, env):
+    """Returns (seconds, (exit code, stdout, stderr)) of one call."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-m', 'ndrwahltexte', *args], input=payload,
+                            capture_output=True, env=env, cwd=ROOT)
+    return time.perf_counter() - start, (result.returncode, result.stdout, result.stderr)
+
+
+def wait_for(path, server, timeout=30):
+    start = time.perf_counter()
+    while not os.path.exists(path):
+        if server.poll() is not None or time.perf_counter() - start > timeout:
+            raise RuntimeError('prefork server did not start')
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20, help='Calls per payload and mode')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes of the prefork server')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'ndrwahltexte.sock')
+    env = dict(os.environ, NDRWAHLTEXTE_SOCKET=path,
+               PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    server = subprocess.Popen([sys.executable, '-m', 'ndrwahltexte', '--workers', str(args.workers), 'prefork'],
+                              stderr=subprocess.DEVNULL, env=env, cwd=ROOT)
+    failed = False
+    try:
+        wait_for(path, server)
+        print(f"{'payload':<26} {'cold CLI':>10} {'--client':>10} {'speedup':>8}")
+        for name, payload in make_payloads():
+            cold, client = [], []
+            for _ in range(args.runs):
+                seconds, expected = run([], payload, env)
+                cold.append(seconds)
+                seconds, answer = run(['--client'], payload, env)
+                client.append(seconds)
+                if answer != expected:
+                    print(f"  {name}: --client answer differs: {answer!r} != {expected!r}", file=sys.stderr)
+                    failed = True
+            cold_ms, client_ms = statistics.median(cold) * 1000, statistics.median(client) * 1000
+            print(f"{name:<26} {cold_ms:8.1f}ms {client_ms:8.1f}ms {cold_ms / client_ms:7.1f}x")
+    finally:
+        server.terminate()
+        server.wait()
+        os.rmdir(directory)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
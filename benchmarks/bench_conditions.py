@@ -0,0 +1,55 @@
+"""
+Regression benchmark for condition evaluation in TemplateEngine.
+
+Runs 100k condition evaluations (select_templates calls) in one process and
+prints the mean cost per block. The cost must stay flat: the template
+dictionaries are not modified by evaluating their conditions.
+
+Usage:
+    python benchmarks/bench_conditions.py [--calls N] [--blocks N]
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ndrwahltexte.election import parse_election_data  # noqa: E402
+from ndrwahltexte.robotext import TemplateEngine  # noqa: E402
+from ndrwahltexte.templates import load_for  # noqa: E402
+from synthetic import make_elections  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=100000, help='Number of select_templates calls')
+    parser.add_argument('--blocks', type=int, default=10, help='Number of reported blocks')
+    args = parser.parse_args()
+
+    variables = [parse_election_data(e) for e in make_elections(200, num_candidates=6)]
+    config = load_for('Verhältniswahl', 'Vorläufiges Endergebnis')
+    templates_before = copy.deepcopy(dict(config['templates']))
+
+    block_size = args.calls // args.blocks
+    means = []
+    print(f"{'block':>5} {'calls':>8} {'µs/call':>9}")
+    for block in range(args.blocks):
+        start = time.perf_counter()
+        for call in range(block_size):
+            engine = TemplateEngine(config['templates'], variables[call % len(variables)],
+                                    conditions=config['conditions'])
+            engine.select_templates(filter_topic='absatz1')
+        mean = (time.perf_counter() - start) / block_size * 1e6
+        means.append(mean)
+        print(f"{block:>5} {(block + 1) * block_size:>8} {mean:>9.2f}")
+
+    assert config['templates'] == templates_before, "templates were modified during evaluation"
+    print(f"last/first block: {means[-1] / means[0]:.2f}")
+
+
+if __name__ == '__main__':
+    main()
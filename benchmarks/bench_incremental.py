@@ -0,0 +1,79 @@
+"""
+Microbenchmark: full rebuild vs. incremental regeneration of Zwischenergebnis
+snapshots (only templates whose variables changed are re-rendered).
+
+Usage:
+    python benchmarks/bench_incremental.py [--elections N] [--snapshots N]
+"""
+
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ndrwahltexte.election import parse_election_data  # noqa: E402
+from ndrwahltexte.robotext import TemplateEngine  # noqa: E402
+from ndrwahltexte.templates import load_for  # noqa: E402
+from ndrwahltexte.text_generator import OUTPUT_CACHE, SECTIONS, generate_election_text  # noqa: E402
+from synthetic import make_elections  # noqa: E402
+
+
+def snapshots(election, count, rnd):
+    """Yields successive counting snapshots: more Wahlbereiche counted, a few percentages moved."""
+    wahl = election['wahl']
+    for _ in range(count):
+        ergebnis = wahl['ergebnis']
+        ergebnis['gez_wahlbereiche'] = min(ergebnis['gez_wahlbereiche'] + 1, wahl['anz_wahlbereiche'])
+        for kandidat in rnd.sample(ergebnis['kandidaten'], 2):
+            kandidat['prozent'] = round(max(kandidat['prozent'] + rnd.uniform(-0.5, 0.5), 0), 1)
+        yield copy.deepcopy(election)
+
+
+def full_rebuild(variables):
+    """Generates the texts without any cached sentences."""
+    config = load_for(variables['wahlart'], variables['ergebnis_art'])
+    engine = TemplateEngine(config['templates'], variables, config['corrections'], config['conditions'],
+                            config['pipelines'], config['renderers'])
+    return {section: engine.build_text(engine.select_templates(filter_topic=topic)) for section, topic in SECTIONS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--elections', type=int, default=200, help='Number of elections')
+    parser.add_argument('--snapshots', type=int, default=20, help='Snapshots per election')
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    stream = [
+        (election['wahl']['id'], parse_election_data(snapshot))
+        for election in make_elections(args.elections, num_candidates=6, ergebnis_art='Zwischenergebnis')
+        for snapshot in snapshots(election, args.snapshots, rnd)
+    ]
+    OUTPUT_CACHE.resize(0)
+
+    for id_, variables in stream:
+        output = generate_election_text(variables, id_)
+        if 'error' not in output:
+            assert output == full_rebuild(variables), id_
+
+    start = time.perf_counter()
+    for _, variables in stream:
+        full_rebuild(variables)
+    full_us = (time.perf_counter() - start) / len(stream) * 1e6
+
+    start = time.perf_counter()
+    for id_, variables in stream:
+        generate_election_text(variables, id_)
+    incremental_us = (time.perf_counter() - start) / len(stream) * 1e6
+
+    print(f"{len(stream)} snapshots: full {full_us:.1f} µs, incremental {incremental_us:.1f} µs "
+          f"({full_us / incremental_us:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares the pure-Python and the pandas backend of parse_election_data and
+the vectorized parse_elections on a Land-wide batch.
+
+Usage:
+    python benchmarks/bench_parse.py [--repeat N] [--batch N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ndrwahltexte.election import parse_election_data, parse_elections  # noqa: E402
+from synthetic import make_elections  # noqa: E402
+
+CANDIDATE_COUNTS = [5, 10, 20, 30]
+
+
+def time_backend(elections, backend):
+    """Returns the mean time per election in microseconds."""
+    start = time.perf_counter()
+    for election in elections:
+        parse_election_data(election, backend=backend)
+    return (time.perf_counter() - start) / len(elections) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=500, help='Elections per candidate count')
+    parser.add_argument('--batch', type=int, default=10000, help='Elections in the vectorized batch')
+    args = parser.parse_args()
+
+    print(f"{'candidates':>10} {'python µs':>12} {'pandas µs':>12} {'speedup':>9}")
+    for count in CANDIDATE_COUNTS:
+        elections = make_elections(args.repeat, num_candidates=count)
+        for election in elections:
+            assert parse_election_data(election) == parse_election_data(election, backend='pandas')
+        python_us = time_backend(elections, 'python')
+        pandas_us = time_backend(elections, 'pandas')
+        print(f"{count:>10} {python_us:>12.1f} {pandas_us:>12.1f} {pandas_us / python_us:>8.0f}x")
+
+    # Vectorized: all elections of a batch in one DataFrame pass
+    elections = make_elections(args.batch, num_candidates=10)
+    start = time.perf_counter()
+    parsed = parse_elections(elections)
+    vectorized_us = (time.perf_counter() - start) / len(elections) * 1e6
+    assert repr(parsed) == repr([parse_election_data(election) for election in elections])
+    python_us = time_backend(elections, 'python')
+    print(f"batch of {args.batch}: python {python_us:.1f} µs, vectorized pandas {vectorized_us:.1f} µs per election")
+
+
+if __name__ == '__main__':
+    main()
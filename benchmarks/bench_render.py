@@ -0,0 +1,58 @@
+"""
+Microbenchmark: str.format(**variables) vs. compiled TemplateRenderer
+over all Verhältniswahl templates.
+
+Usage:
+    python benchmarks/bench_render.py [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ndrwahltexte.election import parse_election_data  # noqa: E402
+from ndrwahltexte.robotext import compile_renderers  # noqa: E402
+from ndrwahltexte.templates import load_for  # noqa: E402
+from synthetic import make_elections  # noqa: E402
+
+ERGEBNIS_ARTEN = ['Kein Ergebnis', 'Zwischenergebnis', 'Vorläufiges Endergebnis']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000, help='Elections per result type')
+    args = parser.parse_args()
+
+    print(f"{'ergebnis_art':<26} {'templates':>9} {'format µs':>10} {'compiled µs':>12} {'speedup':>8}")
+    for ergebnis_art in ERGEBNIS_ARTEN:
+        config = load_for('Verhältniswahl', ergebnis_art)
+        texts = [template['text'] for template in config['templates'].values()]
+        # Without the German number formatter of config['renderers'], so both produce the same text
+        compiled = compile_renderers(config['templates'])
+        renderers = [renderer for alternatives in compiled.values() for renderer in alternatives]
+        variables = [parse_election_data(e) for e in make_elections(args.repeat, num_candidates=6)]
+
+        for v in variables[:50]:
+            assert [text.format(**v) for text in texts] == [render(v) for render in renderers]
+
+        start = time.perf_counter()
+        for v in variables:
+            for text in texts:
+                text.format(**v)
+        format_us = (time.perf_counter() - start) / len(variables) * 1e6
+
+        start = time.perf_counter()
+        for v in variables:
+            for render in renderers:
+                render(v)
+        compiled_us = (time.perf_counter() - start) / len(variables) * 1e6
+
+        print(f"{ergebnis_art:<26} {len(texts):>9} {format_us:>10.1f} {compiled_us:>12.1f} {format_us / compiled_us:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Spool queue on one machine: several simulated nodes share a spool directory.
+
+Submits synthetic elections to a temporary spool directory, leaves one work
+item claimed by a crashed worker, and starts --nodes `ndrwahltexte spool work
+--once` processes with --workers processes each. Checks that every election
+is generated exactly once (the crashed claim is requeued) and that the
+collected results are identical to a serial --ndjson run, then prints the
+throughput per node. Exits with status 1 if the results differ.
+
+Usage:
+    python benchmarks/bench_spool.py [--elections N] [--nodes N] [--workers N] [--size N]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_elections  # noqa: E402
+
+ENV = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+
+
+def ndrwahltexte(*args, stdin=None, check=True):
+    """Runs the CLI and returns its stdout."""
+    result = subprocess.run([sys.executable, '-m', 'ndrwahltexte', *args], input=stdin,
+                            capture_output=True, env=ENV, cwd=ROOT)
+    if check and result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', 'replace'))
+    return result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--elections', type=int, default=20000, help='Number of elections')
+    parser.add_argument('--nodes', type=int, default=2, help='Number of simulated nodes')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes per node')
+    parser.add_argument('--size', type=int, default=500, help='Elections per work item')
+    args = parser.parse_args()
+
+    payload = ''.join(json.dumps(election) + '\n'
+                      for election in make_elections(args.elections)).encode('utf-8')
+    expected = ndrwahltexte('--ndjson', stdin=payload)
+
+    spool_dir = tempfile.mkdtemp()
+    try:
+        ndrwahltexte('spool', 'submit', spool_dir, '--size', str(args.size), '--job', 'bench', stdin=payload)
+        # A worker that crashed a while ago still holds the first item
+        item = sorted(os.listdir(os.path.join(spool_dir, 'pending')))[0]
+        claimed = os.path.join(spool_dir, 'claimed', f'{item}@crashed.1')
+        os.rename(os.path.join(spool_dir, 'pending', item), claimed)
+        os.utime(claimed, (time.time() - 3600, time.time() - 3600))
+
+        start = time.perf_counter()
+        nodes = [subprocess.Popen([sys.executable, '-m', 'ndrwahltexte', '--workers', str(args.workers),
+                                   'spool', 'work', spool_dir, '--once', '--node', f'node{number}',
+                                   '--interval', '0.05', '--stale', '5'],
+                                  stderr=subprocess.DEVNULL, env=ENV, cwd=ROOT)
+                 for number in range(1, args.nodes + 1)]
+        for node in nodes:
+            node.wait()
+        seconds = time.perf_counter() - start
+
+        collected = ndrwahltexte('spool', 'collect', spool_dir, '--job', 'bench', check=False)
+        status = json.loads(ndrwahltexte('spool', 'status', spool_dir))
+    finally:
+        shutil.rmtree(spool_dir)
+
+    print(f"{args.elections} elections in {status['done']} items, {args.nodes} nodes x {args.workers} workers: "
+          f"{seconds:.2f}s, {args.elections / seconds:.0f} elections/s overall")
+    print(f"{'node':<8} {'items':>6} {'elections':>10} {'errors':>7} {'elections/s':>12}")
+    for node, stats in status['nodes'].items():
+        print(f"{node:<8} {stats['items']:>6} {stats['elections']:>10} {stats['errors']:>7} {stats['per_second']:>12.0f}")
+
+    generated = sum(stats['elections'] for stats in status['nodes'].values())
+    identical = collected == expected
+    print(f"results {'identical to' if identical else 'DIFFERENT from'} --ndjson, "
+          f"{generated} of {args.elections} elections generated")
+    if not identical or generated != args.elections:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
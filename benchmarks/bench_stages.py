@@ -0,0 +1,197 @@
+"""
+Times every stage of the pipeline on the synthetic benchmark suite and the
+cold start of the CLI, and saves the results as JSON.
+
+Stages: json.loads, parse_election_data, load_for (cached and cold) and
+building the sections like generate_election_text does
+(TemplateEngine.build_text_incremental): cold, and warm with the sentences of
+the previous snapshot (one Wahlbereich less counted) as in SENTENCE_CACHE.
+Plus the end-to-end time per election and the CLI cold start (new
+interpreter per run). Compare two result files with benchmarks/compare.py.
+
+Usage:
+    python benchmarks/bench_stages.py [--repeat N] [--cold-runs N] [--output results.json]
+"""
+
+import argparse
+import copy
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ndrwahltexte import templates  # noqa: E402
+from ndrwahltexte.election import election_id, parse_election_data  # noqa: E402
+from ndrwahltexte.robotext import TemplateEngine  # noqa: E402
+from ndrwahltexte.text_generator import (  # noqa: E402
+    OUTPUT_CACHE, SECTIONS, SENTENCE_CACHE, generate_election_text, variables_hash,
+)
+from synthetic import ERGEBNIS_ARTEN, make_suite  # noqa: E402
+
+STAGES = ['json_load', 'parse_election_data', 'load_for', 'build_text_incremental',
+          'build_text_incremental_warm', 'end_to_end']
+
+
+def summarize(samples):
+    """Returns mean, median, 95th percentile and max of samples (seconds) in microseconds."""
+    samples = sorted(samples)
+    return {
+        'n': len(samples),
+        'mean_us': round(statistics.fmean(samples) * 1e6, 3),
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 3),
+        'p95_us': round(samples[int(len(samples) * 0.95)] * 1e6, 3),
+        'max_us': round(samples[-1] * 1e6, 3),
+    }
+
+
+def build_sections(variables, id_, previous=None):
+    """Builds Titel and Absatz1 the way generate_election_text does; returns the sentences per topic."""
+    config = templates.load_for(variables['wahlart'], variables['ergebnis_art'])
+    engine = TemplateEngine(
+        templates=config['templates'], variables=variables, corrections=config['corrections'],
+        conditions=config['conditions'], pipelines=config['pipelines'], renderers=config['renderers'],
+        dependencies=config['dependencies'], topics=config['topics'],
+        decision_table=config['decision_table'], seed=variables_hash({}, id_),
+    )
+    return {topic: engine.build_text_incremental(filter_topic=topic, previous=previous and previous[topic])[1]
+            for _, topic in SECTIONS}
+
+
+def previous_snapshot(raw_data):
+    """Returns the variables of the same election with one Wahlbereich less counted."""
+    snapshot = copy.deepcopy(raw_data)
+    ergebnis = snapshot['wahl']['ergebnis']
+    ergebnis['gez_wahlbereiche'] = max(1, ergebnis['gez_wahlbereiche'] - 1)
+    return parse_election_data(snapshot)
+
+
+def time_stages(payloads):
+    """Runs the pipeline stage by stage and returns the timings per stage."""
+    clock = time.perf_counter
+    samples = {stage: [] for stage in STAGES}
+    for payload in payloads:
+        t0 = clock()
+        raw_data = json.loads(payload)
+        t1 = clock()
+        variables = parse_election_data(raw_data)
+        t2 = clock()
+        templates.load_for(variables['wahlart'], variables['ergebnis_art'])
+        t3 = clock()
+        id_ = election_id(raw_data)
+        build_sections(variables, id_)
+        t4 = clock()
+        previous = build_sections(previous_snapshot(raw_data), id_)
+        t5 = clock()
+        build_sections(variables, id_, previous)
+        t6 = clock()
+        generate_election_text(variables, id_)
+        t7 = clock()
+
+        for stage, start, end in zip(STAGES, (t0, t1, t2, t3, t5), (t1, t2, t3, t4, t6)):
+            samples[stage].append(end - start)
+        # End to end: json.loads + parse + generate_election_text (caches disabled)
+        samples['end_to_end'].append((t1 - t0) + (t2 - t1) + (t7 - t6))
+    return {stage: summarize(values) for stage, values in samples.items()}
+
+
+def time_load_for_cold(runs=10):
+    """Times building each configuration from scratch (first request after start or reload), best of runs."""
+    samples = {}
+    for ergebnis_art in ERGEBNIS_ARTEN:
+        best = float('inf')
+        for _ in range(runs):
+            templates.invalidate('Verhältniswahl', ergebnis_art)
+            start = time.perf_counter()
+            templates.load_for('Verhältniswahl', ergebnis_art)
+            best = min(best, time.perf_counter() - start)
+        samples[ergebnis_art] = round(best * 1e6, 3)
+    return samples
+
+
+def time_cli_cold_start(payload, runs):
+    """Runs `python -m ndrwahltexte` in a new interpreter per run; returns milliseconds."""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-m', 'ndrwahltexte'], input=payload.encode('utf-8'),
+                                capture_output=True, env=env, cwd=ROOT)
+        samples.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode('utf-8', 'replace'))
+    samples.sort()
+    return {
+        'n': runs,
+        'min_ms': round(samples[0] * 1000, 3),
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 3),
+        'max_ms': round(samples[-1] * 1000, 3),
+    }
+
+
+def git_revision():
+    """Returns the current commit of the repository, if available."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help='Elections per suite case')
+    parser.add_argument('--cold-runs', type=int, default=10, help='Runs of the CLI cold start')
+    parser.add_argument('--output', help='Writes the results as JSON to this file')
+    args = parser.parse_args()
+
+    OUTPUT_CACHE.resize(0)
+    SENTENCE_CACHE.resize(0)
+    suite = make_suite(args.repeat)
+    payloads = [json.dumps(election) for _, election in suite]
+
+    templates.preload()
+    time_stages(payloads[:200])  # warm-up
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'elections': len(payloads),
+        },
+        'stages': time_stages(payloads),
+        'by_ergebnis_art': {},
+        'load_for_cold_us': time_load_for_cold(),
+        'cli_cold_start': time_cli_cold_start(payloads[-1], args.cold_runs),
+    }
+    for ergebnis_art in ERGEBNIS_ARTEN:
+        subset = [p for (case, _), p in zip(suite, payloads) if case['ergebnis_art'] == ergebnis_art]
+        results['by_ergebnis_art'][ergebnis_art] = {
+            stage: timing['mean_us'] for stage, timing in time_stages(subset).items()
+        }
+
+    print(f"{'stage':<28} {'mean µs':>10} {'p50 µs':>10} {'p95 µs':>10}")
+    for stage, timing in results['stages'].items():
+        print(f"{stage:<28} {timing['mean_us']:>10.1f} {timing['p50_us']:>10.1f} {timing['p95_us']:>10.1f}")
+    for ergebnis_art, micros in results['load_for_cold_us'].items():
+        print(f"load_for cold ({ergebnis_art}): {micros / 1000:.2f} ms")
+    cold = results['cli_cold_start']
+    print(f"CLI cold start: p50 {cold['p50_ms']:.1f} ms, min {cold['min_ms']:.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
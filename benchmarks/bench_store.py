@@ -0,0 +1,53 @@
+"""
+Microbenchmark: writing results to the SQLite result store, one transaction
+per result vs. batched transactions, and re-submitting unchanged texts
+(which must not write anything).
+
+Usage:
+    python benchmarks/bench_store.py [--elections N] [--batch-size N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ndrwahltexte.ndrwahltexte import process_line  # noqa: E402
+from ndrwahltexte.store import ResultStore  # noqa: E402
+from synthetic import make_elections  # noqa: E402
+
+
+def write_all(path, results, batch_size):
+    """Stores all results and returns the time per result in microseconds and the store counters."""
+    start = time.perf_counter()
+    with ResultStore(path, batch_size=batch_size) as store:
+        for result in results:
+            store.put_result(result, 'Vorläufiges Endergebnis', None)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(results) * 1e6, store.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--elections', type=int, default=2000, help='Number of elections')
+    parser.add_argument('--batch-size', type=int, default=500, help='Results per transaction of the batched run')
+    args = parser.parse_args()
+
+    results = [process_line(election, i) for i, election in enumerate(make_elections(args.elections), start=1)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, batch_size in (('1 per transaction', 1), (f'{args.batch_size} per transaction', args.batch_size)):
+            path = os.path.join(directory, f'{batch_size}.db')
+            micros, stats = write_all(path, results, batch_size)
+            print(f"{label:<24} new: {micros:8.1f} µs/result ({stats['written']} written)")
+            micros, stats = write_all(path, results, batch_size)
+            print(f"{label:<24} unchanged: {micros:8.1f} µs/result ({stats['written']} written, "
+                  f"{stats['unchanged']} skipped)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares two result files of benchmarks/bench_stages.py.
+
+Exits with status 1 if a stage or the CLI cold start got slower by more than
+the threshold, so it can guard releases. Timings that only one of the files
+has (e.g. stages renamed between the two revisions) are listed, not compared.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 0.10]
+"""
+
+import argparse
+import json
+import sys
+
+
+def rows(results):
+    """Flattens a result file into (name, value) pairs of comparable timings."""
+    for stage, timing in results['stages'].items():
+        yield f'{stage} (p50 µs)', timing['p50_us']
+    for ergebnis_art, micros in results.get('load_for_cold_us', {}).items():
+        yield f'load_for cold {ergebnis_art} (µs)', micros
+    if 'cli_cold_start' in results:
+        yield 'CLI cold start (min ms)', results['cli_cold_start']['min_ms']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline', help='Result file of the reference run')
+    parser.add_argument('candidate', help='Result file of the run to check')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Allowed slowdown as a fraction (default: 0.10)')
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)
+
+    before = dict(rows(baseline))
+    after = dict(rows(candidate))
+    regressions = []
+    print(f"{baseline['meta'].get('revision')} -> {candidate['meta'].get('revision')}")
+    print(f"{'timing':<44} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for name, value in after.items():
+        if name not in before:
+            continue
+        change = value / before[name] - 1 if before[name] else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  slower'
+            regressions.append(name)
+        print(f"{name:<44} {before[name]:>10.1f} {value:>10.1f} {change:>+7.1%}{flag}")
+    # Stages renamed or added between the two revisions
+    for name in [name for name in before if name not in after] + [name for name in after if name not in before]:
+        print(f"{name:<44} {before.get(name, float('nan')):>10.1f} {after.get(name, float('nan')):>10.1f}  not compared")
+
+    if regressions:
+        print(f"{len(regressions)} timing(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Import-time budget check: fails when the startup of ndrwahltexte regresses.
+
+Runs `python -X importtime -c "import ndrwahltexte"` and the CLI on a
+'Kein Ergebnis' and an 'Endergebnis' payload in fresh interpreters and checks
+  - that `import ndrwahltexte` (as reported by -X importtime) stays below
+    --import-budget times a bare interpreter start and loads none of the
+    heavy dependencies,
+  - that the CLI does not load pandas, or argparse for a single document,
+  - that the CLI cold start stays below --cli-budget times a bare
+    interpreter start.
+Budgets are relative to the bare interpreter (`python -c pass`), timed in the
+same run, alternating with the measured command, and compared as medians of
+--runs starts, so a slower or busier machine does not fail the check.
+Exits with status 1 if a budget is exceeded.
+
+Usage:
+    python benchmarks/importtime.py [--runs N] [--import-budget MS] [--cli-budget MS]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_election  # noqa: E402
+
+# Must not be imported by `import ndrwahltexte`
+HEAVY_MODULES = {'pandas', 'numpy', 'simpleeval'}
+
+# Must not be imported by the CLI for a single document (only the pandas
+# parser backend needs pandas, only command line options need argparse)
+CLI_FORBIDDEN_MODULES = {'pandas', 'numpy', 'argparse'}
+
+ENV = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+
+
+def importtime(args, stdin=None):
+    """
+    Runs python -X importtime with args.
+
+    Returns:
+        dict: Module name -> cumulative import time in microseconds
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', *args], input=stdin,
+                            capture_output=True, env=ENV, cwd=ROOT)
+    modules = {}
+    for line in result.stderr.decode('utf-8', 'replace').splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def start_time(args, stdin=None):
+    """Returns the wall time of one fresh interpreter in milliseconds."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], input=stdin, capture_output=True, env=ENV, cwd=ROOT)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', 'replace'))
+    return elapsed * 1000
+
+
+def cold_start(args, runs, stdin=None):
+    """
+    Times runs fresh interpreters, each right after a bare interpreter.
+
+    Returns:
+        tuple: Median milliseconds of the command and of the bare interpreter
+    """
+    command, bare = [], []
+    for _ in range(runs):
+        bare.append(start_time(['-c', 'pass']))
+        command.append(start_time(args, stdin))
+    return statistics.median(command), statistics.median(bare)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=15, help='Interpreter starts per measurement')
+    parser.add_argument('--import-budget', type=float, default=0.25,
+                        help='Maximum time of `import ndrwahltexte` as a multiple of a bare interpreter '
+                             'start (default: 0.25)')
+    parser.add_argument('--cli-budget', type=float, default=4.5,
+                        help='Maximum CLI cold start as a multiple of a bare interpreter start (default: 4.5)')
+    args = parser.parse_args()
+
+    failures = []
+
+    bare = statistics.median(start_time(['-c', 'pass']) for _ in range(args.runs))
+    print(f"bare interpreter: {bare:.1f} ms")
+    import_ms = statistics.median(importtime(['-c', 'import ndrwahltexte']).get('ndrwahltexte', 0) / 1000
+                                  for _ in range(args.runs))
+    print(f"import ndrwahltexte: {import_ms:.1f} ms = {import_ms / bare:.2f}x bare "
+          f"(budget {args.import_budget:.2f}x)")
+    if import_ms > args.import_budget * bare:
+        failures.append(f"import ndrwahltexte took {import_ms:.1f} ms = {import_ms / bare:.2f}x bare")
+    heavy = HEAVY_MODULES & {name.split('.')[0] for name in importtime(['-c', 'import ndrwahltexte'])}
+    if heavy:
+        failures.append(f"import ndrwahltexte loads {', '.join(sorted(heavy))}")
+
+    for ergebnis_art in ('Kein Ergebnis', 'Vorläufiges Endergebnis'):
+        payload = json.dumps(make_election(0, 8, ergebnis_art)).encode('utf-8')
+
+        modules = importtime(['-m', 'ndrwahltexte'], payload)
+        forbidden = CLI_FORBIDDEN_MODULES & {name.split('.')[0] for name in modules}
+        if forbidden:
+            failures.append(f"CLI ({ergebnis_art}) loads {', '.join(sorted(forbidden))}")
+        slowest = sorted(modules.items(), key=lambda item: -item[1])[:5]
+
+        cli_ms, bare_ms = cold_start(['-m', 'ndrwahltexte'], args.runs, payload)
+        ratio = cli_ms / bare_ms
+        print(f"CLI cold start ({ergebnis_art}): {cli_ms:.1f} ms = {ratio:.2f}x bare "
+              f"(budget {args.cli_budget:.2f}x); "
+              f"slowest imports: {', '.join(f'{name} {micros / 1000:.1f} ms' for name, micros in slowest)}")
+        if ratio > args.cli_budget:
+            failures.append(f"CLI cold start ({ergebnis_art}) took {cli_ms:.1f} ms = {ratio:.2f}x bare")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
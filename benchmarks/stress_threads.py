@@ -0,0 +1,121 @@
+"""
+Stress test: generates texts from many threads at once and checks every
+result against a serial run.
+
+All threads share the configuration, output and sentence caches. Each round
+starts with dropped configurations (so they are built while threads wait for
+them) and a small output cache (so entries are evicted concurrently), and
+sends every election twice, as two counting snapshots, in random order.
+Measurements are enabled to check that no count is lost. Also compares
+generate_batch(threads=True) with a serial batch.
+
+With the GIL, threads are switched every --switch-interval seconds (much
+more often than by default) to provoke races. Exits with status 1 if a
+result differs or a count is lost. On a free-threaded CPython
+(3.13t and later) the threaded rounds should be faster than the serial run;
+with the GIL they are not.
+
+Usage:
+    python benchmarks/stress_threads.py [--threads N] [--rounds N] [--repeat N]
+"""
+
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ndrwahltexte import metrics, templates  # noqa: E402
+from ndrwahltexte.batch import generate_batch  # noqa: E402
+from ndrwahltexte.ndrwahltexte import generate  # noqa: E402
+from ndrwahltexte.text_generator import OUTPUT_CACHE, SENTENCE_CACHE  # noqa: E402
+from synthetic import make_suite  # noqa: E402
+
+
+def make_payloads(repeat):
+    """Returns every suite election followed by a second snapshot with one Wahlbereich less counted."""
+    payloads = []
+    for _, election in make_suite(repeat):
+        payloads.append(election)
+        snapshot = copy.deepcopy(election)
+        ergebnis = snapshot['wahl']['ergebnis']
+        ergebnis['gez_wahlbereiche'] = max(1, ergebnis['gez_wahlbereiche'] - 1)
+        payloads.append(snapshot)
+    return payloads
+
+
+def reset_caches(output_cache_size):
+    templates.invalidate()
+    OUTPUT_CACHE.clear()
+    OUTPUT_CACHE.resize(output_cache_size)
+    SENTENCE_CACHE.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8, help='Number of threads')
+    parser.add_argument('--rounds', type=int, default=5, help='Number of threaded rounds')
+    parser.add_argument('--repeat', type=int, default=2, help='Elections per suite combination')
+    parser.add_argument('--output-cache-size', type=int, default=64,
+                        help='Size of the output cache during the threaded rounds')
+    parser.add_argument('--switch-interval', type=float, default=1e-5,
+                        help='Thread switch interval in seconds during the threaded rounds')
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.repeat)
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"{len(payloads)} payloads, {args.threads} threads, GIL {'enabled' if gil else 'disabled'}")
+
+    reset_caches(4096)
+    start = time.perf_counter()
+    expected = [generate(payload) for payload in payloads]
+    serial = time.perf_counter() - start
+    print(f"serial:     {len(payloads) / serial:8.0f} texts/s")
+
+    rnd = random.Random(0)
+    failed = False
+    sys.setswitchinterval(args.switch_interval)
+    for round_number in range(1, args.rounds + 1):
+        order = list(range(len(payloads))) * 2
+        rnd.shuffle(order)
+        reset_caches(args.output_cache_size)
+        instrument = metrics.enable()
+        instrument.reset()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            start = time.perf_counter()
+            results = list(executor.map(lambda index: generate(payloads[index]), order))
+            elapsed = time.perf_counter() - start
+        parses = instrument.as_dict()['stages']['parse_election_data']['calls']
+        metrics.disable()
+
+        mismatches = [index for index, result in zip(order, results) if result != expected[index]]
+        print(f"round {round_number}:    {len(order) / elapsed:8.0f} texts/s, "
+              f"{len(mismatches)} mismatches, {parses} of {len(order)} parses counted")
+        if mismatches:
+            index = mismatches[0]
+            print(f"  payload {index}: expected {expected[index]}", file=sys.stderr)
+            failed = True
+        if parses != len(order):
+            failed = True
+
+    reset_caches(4096)
+    serial_batch = list(generate_batch(payloads, workers=1))
+    reset_caches(4096)
+    start = time.perf_counter()
+    threaded_batch = list(generate_batch(payloads, workers=args.threads, threads=True))
+    elapsed = time.perf_counter() - start
+    batch_ok = threaded_batch == serial_batch
+    print(f"batch:      {len(payloads) / elapsed:8.0f} texts/s, "
+          f"{'identical to' if batch_ok else 'DIFFERENT from'} the serial batch")
+
+    if failed or not batch_ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Synthetic election payloads for benchmarks.
+
+Generates {"wahl": ...} objects in the same format ndrwahltexte reads from stdin.
+"""
+
+import random
+
+PARTEIEN = [
+    'SPD', 'CDU', 'Grüne', 'AfD', 'FDP', 'Linke', 'BSW', 'Volt', 'FW-PB',
+    'dieBasis LV', 'Tierschutzpartei', 'MLPD', 'Bündnis Deutschland', 'Piraten', 'ÖDP',
+]
+
+ERGEBNIS_ARTEN = ['Kein Ergebnis', 'Zwischenergebnis', 'Vorläufiges Endergebnis']
+
+# Parties placed first (i.e. most likely among the leaders), per grammar case
+PARTY_MIXES = {
+    'standard': ['SPD', 'CDU', 'AfD', 'FDP', 'BSW'],
+    'gruene_linke': ['Grüne', 'Linke', 'SPD', 'CDU'],
+    'mit_partei_davor': ['Volt', 'dieBasis LV', 'FW-PB', 'Bündnis Deutschland'],
+    'waehlergruppen': [],
+}
+
+CANDIDATE_COUNTS = [2, 5, 10, 30]
+
+
+def make_election(index, num_candidates=8, ergebnis_art='Vorläufiges Endergebnis', rnd=None,
+                  parteien=None, tie=False):
+    """
+    Builds one synthetic election payload.
+
+    Args:
+        index: Running number, used for the election id and the Gemeinde name
+        num_candidates: Number of candidates (parties) in the election
+        ergebnis_art: Result type, e.g. 'Kein Ergebnis' or 'Zwischenergebnis'
+        rnd: random.Random instance (seeded from index if omitted)
+        parteien: Parties to rank first, in order (random parties if omitted);
+            the remaining candidates are filled up with Wählergruppen
+        tie: Give the two best candidates the same percentage
+
+    Returns:
+        dict: Election payload with 'wahl' key
+    """
+    rnd = rnd or random.Random(index)
+    if parteien is None:
+        namen = PARTEIEN + [f'WG {i}' for i in range(len(PARTEIEN), num_candidates)]
+        parteien = rnd.sample(namen, num_candidates)
+    else:
+        parteien = (list(parteien) + [f'WG {i}' for i in range(num_candidates)])[:num_candidates]
+
+    prozente = sorted((round(rnd.uniform(0, 45), 1) for _ in parteien), reverse=True)
+    if tie and len(prozente) > 1:
+        prozente[1] = prozente[0]
+
+    kandidaten = []
+    ergebnisse = []
+    for pos, (partei, prozent) in enumerate(zip(parteien, prozente), start=1):
+        kandidatur_id = 1000 + pos
+        kandidaten.append({'kandidatur_id': kandidatur_id, 'pos': pos, 'partei': partei})
+        prozent = 0.0 if ergebnis_art == 'Kein Ergebnis' else prozent
+        ergebnisse.append({'kandidatur_id': kandidatur_id, 'pos': pos, 'prozent': prozent})
+    rnd.shuffle(ergebnisse)
+
+    anz_wahlbereiche = rnd.randint(1, 200)
+    return {
+        'wahl': {
+            'id': f'synthetic-{index}',
+            'gks_name': f'Gemeinde {index}, Stadt',
+            'wahlart': 'Verhältniswahl',
+            'organ': 'Gemeinderat',
+            'anz_wahlbereiche': anz_wahlbereiche,
+            'anz_wahlberechtigte': rnd.randint(500, 1500000),
+            'kandidaten': kandidaten,
+            'ergebnis': {
+                'ergebnis_art': ergebnis_art,
+                'gez_wahlbereiche': rnd.randint(1, anz_wahlbereiche),
+                'wahlbeteil': round(rnd.uniform(30, 85), 1),
+                'kandidaten': ergebnisse,
+            },
+        }
+    }
+
+
+def make_elections(count, num_candidates=8, ergebnis_art='Vorläufiges Endergebnis', seed=0):
+    """Builds a list of synthetic election payloads."""
+    rnd = random.Random(seed)
+    return [make_election(i, num_candidates, ergebnis_art, rnd) for i in range(count)]
+
+
+def make_suite(repeat=10, seed=0):
+    """
+    Builds a benchmark suite covering every combination of candidate count,
+    party mix, tie and result type.
+
+    Args:
+        repeat: Number of elections per combination
+        seed: Seed for the random percentages
+
+    Returns:
+        list: (case, payload) pairs; case is a dict with the 'candidates', 'mix',
+        'tie' and 'ergebnis_art' of the payload
+    """
+    rnd = random.Random(seed)
+    suite = []
+    for num_candidates in CANDIDATE_COUNTS:
+        for mix, parteien in PARTY_MIXES.items():
+            for tie in (False, True):
+                for ergebnis_art in ERGEBNIS_ARTEN:
+                    case = {'candidates': num_candidates, 'mix': mix, 'tie': tie, 'ergebnis_art': ergebnis_art}
+                    for _ in range(repeat):
+                        election = make_election(len(suite), num_candidates, ergebnis_art, rnd, parteien, tie)
+                        suite.append((case, election))
+    return suite
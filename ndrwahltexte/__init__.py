@@ -1,5 +1,25 @@
-from .ndrwahltexte import main
-from .election import parse_election_data
-from .text_generator import generate_election_text
+import importlib
 
-__all__ = ['main', 'parse_election_data', 'generate_election_text']
\ No newline at end of file
+__all__ = ['main', 'parse_election_data', 'generate_election_text']
+
+# Public names and the submodules defining them. They are imported on first
+# access (PEP 562), so `import ndrwahltexte` does not load templates,
+# simpleeval or pandas.
+_EXPORTS = {
+    'main': '.ndrwahltexte',
+    'parse_election_data': '.election',
+    'generate_election_text': '.text_generator',
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,4 +1,4 @@
-from .ndrwahltexte import main
+from .client import main
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,199 @@
+########################
+#
+# Batch Generation
+# Generates texts for many elections on a pool of worker processes or threads
+# -> l.sander.fm@ndr.de
+#
+#########################
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from . import metrics, templates
+from .election import ElectionVariables, election_ergebnis_art, parse_elections
+from .ndrwahltexte import process_line
+
+# Default number of elections per chunk by parser: the pandas parser ranks a
+# whole chunk in one DataFrame pass and profits from larger chunks
+CHUNKSIZES = {'python': 32, 'pandas': 1024}
+
+
+def _init_worker(instrument: bool = False):
+    """Loads all template configurations once per worker process and enables measurements if requested."""
+    # Start from scratch: with the fork start method the parent's measurements are inherited
+    metrics.disable()
+    if instrument:
+        metrics.enable()
+    templates.preload()
+
+
+def _process_chunk(chunk: List[Tuple[int, Any]], parser: str = 'python', sources: bool = False,
+                   export: bool = True) -> Tuple[List[dict], Optional[List[tuple]], Optional[dict]]:
+    """
+    Generates the results for a chunk of (line number, election) pairs, skipping blank lines.
+
+    With parser='pandas', all elections of the chunk are parsed together by
+    parse_elections; elections it cannot parse are processed one by one, so
+    their error objects are the same as with the python parser.
+
+    Returns the results, their (ergebnis_art, input hash) for the result store
+    if sources is set (else None), and the measurements taken for them (None if
+    disabled or export is not set), which are reset afterwards, so the parent
+    can merge them.
+    """
+    chunk = [(line_number, election) for line_number, election in chunk
+             if not (isinstance(election, str) and not election.strip())]
+    described = None
+    if sources:
+        from .store import describe_input
+        described = [describe_input(election) if isinstance(election, (str, bytes))
+                     else (election, election_ergebnis_art(election), None)
+                     for _, election in chunk]
+        chunk = [(line_number, raw_data) for (line_number, _), (raw_data, _, _) in zip(chunk, described)]
+        described = [(ergebnis_art, digest) for _, ergebnis_art, digest in described]
+
+    if parser == 'pandas':
+        results = _process_chunk_vectorized(chunk)
+    else:
+        results = [process_line(election, line_number) for line_number, election in chunk]
+
+    instrument = metrics.current()
+    if instrument is None or not export:
+        return results, described, None
+    data = instrument.as_dict()
+    instrument.reset()
+    return results, described, data
+
+
+def _process_chunk_vectorized(chunk: List[Tuple[int, Any]]) -> List[dict]:
+    """Parses a chunk with parse_elections and generates the results."""
+    raw_elections = []
+    for line_number, election in chunk:
+        try:
+            raw_data = json.loads(election) if isinstance(election, (str, bytes)) else election
+        except Exception:
+            raw_data = None
+        raw_elections.append(raw_data if isinstance(raw_data, dict) else None)
+
+    instrument = metrics.current()
+    start = time.perf_counter()
+    parsed = parse_elections([raw_data for raw_data in raw_elections if raw_data is not None],
+                             return_exceptions=True)
+    if instrument is not None:
+        instrument.stage('parse_elections', time.perf_counter() - start)
+
+    variables = iter(parsed)
+    results = []
+    for (line_number, election), raw_data in zip(chunk, raw_elections):
+        parsed_variables = next(variables) if raw_data is not None else None
+        if isinstance(parsed_variables, ElectionVariables):
+            results.append(process_line(raw_data, line_number, parsed_variables))
+        else:
+            results.append(process_line(election, line_number))
+    return results
+
+
+def _chunks(elections: Iterable[Any], chunksize: int) -> Iterator[List[Tuple[int, Any]]]:
+    """Numbers the elections (1-based) and groups them into lists of chunksize."""
+    numbered = enumerate(elections, start=1)
+    while True:
+        chunk = list(islice(numbered, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def generate_batch(elections: Iterable[Any], workers: int = None, chunksize: int = None,
+                   parser: str = 'python', store=None, threads: bool = False) -> Iterator[dict]:
+    """
+    Generates texts for many elections, sharded across a process or thread pool.
+
+    Results are yielded in input order, each tagged with its 1-based position
+    ('line') and the election id, like the output of --ndjson. Blank JSON
+    documents are skipped. Only a bounded number of chunks is in flight, so
+    arbitrarily long streams can be processed with constant memory. If
+    measurements are enabled (metrics.enable()), those of the workers are
+    merged into the measurements of the calling process.
+
+    Args:
+        elections: Election objects ({"wahl": ...}) or their JSON documents
+        workers: Number of worker processes or threads (default: number of CPUs);
+            1 processes everything in the calling process
+        chunksize: Number of elections sent to a worker at once (default: CHUNKSIZES[parser])
+        parser: 'python' parses every election on its own, 'pandas' parses each chunk
+            in one DataFrame pass (see election.parse_elections)
+        store: ResultStore that receives every generated text (see store.ResultStore)
+        threads: Run the workers as threads of the calling process, which share its
+            configurations, caches and measurements. Chunks are not pickled, but
+            only a free-threaded CPython (3.13t and later) runs them on several cores.
+
+    Returns:
+        Iterator[dict]: One result object per election
+
+    Raises:
+        ValueError: If the parser is unknown
+    """
+    if parser not in CHUNKSIZES:
+        raise ValueError(f"Unknown parser: {parser}")
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(elections, chunksize or CHUNKSIZES[parser])
+    instrument = metrics.current()
+    sources = store is not None
+
+    def record(results, described):
+        if store is not None:
+            for result, (ergebnis_art, digest) in zip(results, described):
+                store.put_result(result, ergebnis_art, digest)
+        return results
+
+    if workers == 1:
+        for chunk in chunks:
+            # Measurements stay in this process's instrument
+            results, described, _ = _process_chunk(chunk, parser, sources, export=False)
+            yield from record(results, described)
+        return
+
+    def collect(future):
+        results, described, data = future.result()
+        if data is not None:
+            instrument.merge(data)
+        return record(results, described)
+
+    # Warm the parent as well: threads use its configs, and with the fork start
+    # method worker processes inherit them
+    templates.preload()
+    if threads:
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wahltext')
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(instrument is not None,))
+    with executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_process_chunk, chunk, parser, sources, not threads))
+            if len(pending) >= workers * 4:
+                yield from collect(pending.popleft())
+        while pending:
+            yield from collect(pending.popleft())
+
+
+def run_batch(infile, outfile, workers: int = None, chunksize: int = None, parser: str = 'python',
+              store=None, threads: bool = False):
+    """
+    Streams an NDJSON file through generate_batch.
+
+    Args:
+        infile: Text stream with one election object per line
+        outfile: Text stream that receives one result object per line
+        workers: Number of worker processes (default: number of CPUs)
+        chunksize: Number of lines sent to a worker at once (default: CHUNKSIZES[parser])
+        parser: 'python' or 'pandas', see generate_batch
+        store: ResultStore that receives every generated text
+        threads: Run the workers as threads instead of processes, see generate_batch
+    """
+    for result in generate_batch(infile, workers, chunksize, parser, store, threads):
+        outfile.write(json.dumps(result) + '\n')
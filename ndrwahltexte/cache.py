@@ -0,0 +1,78 @@
+"""
+Bounded LRU cache for generated texts
+"""
+
+from _thread import allocate_lock   # threading.Lock without importing threading (CLI start time)
+from collections import OrderedDict
+
+
+class OutputCache:
+    """
+    Least-recently-used cache with hit/miss/eviction counters.
+
+    All methods hold a lock, so one cache can be shared by threads.
+
+    Attributes:
+        maxsize (int): Maximum number of entries; 0 disables the cache.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups without a cached entry.
+        evictions (int): Number of entries dropped to stay within maxsize.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self._entries = OrderedDict()
+        self._lock = allocate_lock()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Returns the cached value for key or None, marking it as recently used."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Stores a value, evicting the least recently used entries if the cache is full."""
+        with self._lock:
+            if self.maxsize <= 0:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def resize(self, maxsize: int):
+        """Changes the maximum size, evicting entries if necessary."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        """Drops all entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def _evict(self):
+        while len(self._entries) > max(self.maxsize, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """Returns size and counters of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
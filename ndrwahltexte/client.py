@@ -0,0 +1,145 @@
+########################
+#
+# Client
+# Command line entry point that forwards to a running prefork server
+# (see prefork.py) instead of loading the text generation
+# -> l.sander.fm@ndr.de
+#
+#########################
+
+# Only modules the interpreter has already loaded at startup (os, sys, io, stat)
+# and the _socket extension are used here, so forwarding a call costs no imports.
+import io
+import os
+import stat
+import sys
+
+# Environment variable with the socket path of the prefork server
+SOCKET_ENV = 'NDRWAHLTEXTE_SOCKET'
+
+
+def private_directory() -> str:
+    """Per-user socket directory if XDG_RUNTIME_DIR is not set; the server creates it with mode 0700."""
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return f'/tmp/ndrwahltexte-{uid}'
+
+
+def socket_path() -> str:
+    """
+    Returns the socket path: NDRWAHLTEXTE_SOCKET, else ndrwahltexte.sock in
+    XDG_RUNTIME_DIR, else in private_directory().
+    """
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or private_directory(), 'ndrwahltexte.sock')
+
+
+def is_own_socket(path: str) -> bool:
+    """True if path is a Unix socket owned by the current user (anything else may belong to another user)."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def encode_request(data: bytes, encoding: str, errors: str) -> bytes:
+    """Builds a request: a header line with the encoding of stdin, then the stdin bytes."""
+    return f'{encoding} {errors}\n'.encode('ascii') + data
+
+
+def encode_response(code: int, stdout: str, stderr: str) -> bytes:
+    """Builds a response: a header line with exit code and output lengths, then stdout and stderr (UTF-8)."""
+    out, err = stdout.encode('utf-8', 'surrogateescape'), stderr.encode('utf-8', 'surrogateescape')
+    return f'{code} {len(out)} {len(err)}\n'.encode('ascii') + out + err
+
+
+def decode_response(response: bytes):
+    """Returns (exit code, stdout, stderr) of a response, None if it is incomplete."""
+    header, newline, body = response.partition(b'\n')
+    try:
+        code, out_length, err_length = (int(field) for field in header.split())
+    except ValueError:
+        return None
+    if not newline or len(body) != out_length + err_length:
+        return None
+    return (code, body[:out_length].decode('utf-8', 'surrogateescape'),
+            body[out_length:].decode('utf-8', 'surrogateescape'))
+
+
+def forward(path: str):
+    """
+    Sends stdin to the prefork server and returns its answer.
+
+    stdin is only read once the server accepted the connection. Only sockets
+    owned by the current user are used, and on Linux the server process must
+    run as the current user as well, so another user cannot answer calls.
+
+    Args:
+        path: Socket path of the server
+
+    Returns:
+        tuple: (exit code, stdout, stderr, None) as main() would have produced them,
+        or (None, None, None, stdin bytes already read) if no server answered
+    """
+    if not hasattr(os, 'getuid') or not is_own_socket(path):
+        return None, None, None, None
+    try:
+        import _socket
+        sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    except (ImportError, AttributeError, OSError):
+        return None, None, None, None
+    data = None
+    try:
+        sock.connect(path)
+        if hasattr(_socket, 'SO_PEERCRED'):
+            # struct ucred {pid_t pid; uid_t uid; gid_t gid;}
+            credentials = sock.getsockopt(_socket.SOL_SOCKET, _socket.SO_PEERCRED, 12)
+            if int.from_bytes(credentials[4:8], sys.byteorder) != os.getuid():
+                return None, None, None, None
+        data = sys.stdin.buffer.read()
+        sock.sendall(encode_request(data, sys.stdin.encoding, sys.stdin.errors))
+        sock.shutdown(_socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        return None, None, None, data
+    finally:
+        sock.close()
+    answer = decode_response(b''.join(chunks))
+    if answer is None:
+        return None, None, None, data
+    return answer + (None,)
+
+
+def main():
+    """
+    Console entry point of ndrwahltexte.
+
+    `ndrwahltexte --client` (without other arguments) has the JSON on stdin
+    processed by the prefork server at NDRWAHLTEXTE_SOCKET and writes its
+    stdout, stderr and exit code exactly as a local run would. Without a
+    reachable server, and for all other invocations, the text generation runs
+    in this process.
+    """
+    if sys.argv[1:] == ['--client']:
+        code, stdout, stderr, data = forward(socket_path())
+        if code is not None:
+            sys.stdout.write(stdout)
+            sys.stderr.write(stderr)
+            sys.stdout.flush()
+            if code:
+                sys.exit(code)
+            return
+        if data is not None:
+            # Already read from stdin for the server
+            sys.stdin = io.TextIOWrapper(io.BytesIO(data), encoding=sys.stdin.encoding, errors=sys.stdin.errors)
+
+    from .ndrwahltexte import main as run
+    # --client alone only asks for forwarding, which did not happen
+    run([] if sys.argv[1:] == ['--client'] else None)
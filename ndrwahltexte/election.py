@@ -6,97 +6,545 @@
 #
 #########################
 
-import pandas as pd
-import sys
-from typing import Dict, Any, Optional, Tuple
-from .templates.parties import PARTEI_PRONOMEN
-from .utils import write_error
+import re
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from .templates import parties
 
+# Prefixes of the variables of the best ranked parties, best first
+RANKS = ('gewinner', 'zweite', 'dritte', 'vierte', 'fuenfte')
 
-def parse_election_data(raw_data: Dict[str, Any]) -> Dict[str, Any]:
+# Variables of any rank: platz<N>_partei, platz<N>_prozent, platz<N>_vorsprung (N >= 1)
+RANK_VARIABLE = re.compile(r'platz([1-9][0-9]*)_(partei|prozent|vorsprung)')
+
+# Marks a derived value that has not been computed yet
+_UNSET = object()
+
+
+class ElectionVariables(Mapping):
+    """
+    Template variables of one election.
+
+    A compact, immutable record of the election metadata and the results of
+    all candidates. As a read-only Mapping it provides the keys templates use
+    ('name', 'num_parties', 'gewinner_partei', 'zweite_prozent', ...), so it
+    can be passed to str.format(**variables) and to the condition evaluator
+    like a dict. Records with equal values of equal types are equal and have
+    the same hash, so they can be used as cache keys directly.
+
+    Derived values are computed on first access and kept: the candidates are
+    only ranked once a condition or placeholder uses a ranked party, and the
+    pronoun only once 'gewinner_pronomen' is used. Besides the fixed keys
+    (gewinner ... fuenfte, 'vorsprung'), any rank can be looked up as
+    'platz<N>_partei', 'platz<N>_prozent' and 'platz<N>_vorsprung' (N >= 1,
+    None below the last candidate); these keys are not part of the iteration.
+
+    Attributes:
+        name (str): Name of the area (gks_name up to the first comma), also 'ortsname'.
+        wahlart (str): Election type.
+        wahlorgan (str): Elected body ('organ').
+        ergebnis_art (str): Result type.
+        anz_wahlbereiche (int): Number of counting districts.
+        gez_wahlbereiche (int): Number of counted districts.
+        num_parties (int): Number of candidates with a result.
+        wahlberechtigte (int): Number of eligible voters.
+        wahlbeteiligung (float): Turnout.
+        parteien (tuple): Parties of all candidates in the order of the results
+            (None for candidates without reference data).
+        prozente (tuple): Their percentages as floats (nan if missing).
+    """
+
+    __slots__ = ('name', 'wahlart', 'wahlorgan', 'ergebnis_art', 'anz_wahlbereiche', 'gez_wahlbereiche',
+                 'num_parties', 'wahlberechtigte', 'wahlbeteiligung', 'parteien', 'prozente',
+                 '_ranking', '_pronomen', '_hash')
+
+    # Fields in constructor order
+    FIELDS = __slots__[:-3]
+
+    def __init__(self, name, wahlart, wahlorgan, ergebnis_art, anz_wahlbereiche, gez_wahlbereiche,
+                 num_parties, wahlberechtigte, wahlbeteiligung, parteien: tuple = (), prozente: tuple = (),
+                 ranking: Sequence[int] = None):
+        """
+        Args:
+            ranking: Indices into parteien/prozente, best first, if the candidates
+                are already ranked (otherwise they are ranked by prozente when needed)
+        """
+        for field, value in zip(self.FIELDS, (name, wahlart, wahlorgan, ergebnis_art, anz_wahlbereiche,
+                                              gez_wahlbereiche, num_parties, wahlberechtigte, wahlbeteiligung,
+                                              tuple(parteien), tuple(prozente))):
+            object.__setattr__(self, field, value)
+        object.__setattr__(self, '_ranking', None if ranking is None else tuple(ranking))
+        object.__setattr__(self, '_pronomen', _UNSET)
+        object.__setattr__(self, '_hash', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, field) for field in self.FIELDS) + (self._ranking,)
+
+    def __getitem__(self, key):
+        getter = _GETTERS.get(key) or _rank_variable(key)
+        if getter is None:
+            raise KeyError(key)
+        return getter(self)
+
+    def get(self, key, default=None):
+        getter = _GETTERS.get(key) or _rank_variable(key)
+        return default if getter is None else getter(self)
+
+    def __contains__(self, key):
+        return key in _GETTERS or _rank_variable(key) is not None
+
+    def __iter__(self):
+        return iter(_GETTERS)
+
+    def __len__(self):
+        return len(_GETTERS)
+
+    def ranking(self) -> Tuple[int, ...]:
+        """Returns the indices of the candidates, best first (stable for equal percentages, nan last)."""
+        if self._ranking is None:
+            prozente = self.prozente
+            total = sum(prozente)
+            if total == total:      # no nan
+                ranking = sorted(range(len(prozente)), key=prozente.__getitem__, reverse=True)
+            else:
+                ranking = sorted(range(len(prozente)), key=lambda i: _prozent_key((None, prozente[i])),
+                                 reverse=True)
+            ranking = tuple(ranking)
+            object.__setattr__(self, '_ranking', ranking)
+        return self._ranking
+
+    def rank(self, position: int) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Returns party and percentage of the candidate at a rank.
+
+        Args:
+            position: Rank, 1 for the winner
+
+        Returns:
+            tuple: (partei, prozent), (None, None) below the last candidate
+        """
+        ranking = self.ranking()
+        if position < 1 or position > len(ranking):
+            return None, None
+        index = ranking[position - 1]
+        return self.parteien[index], self.prozente[index]
+
+    def margin(self, position: int) -> Optional[float]:
+        """
+        Returns the lead of the candidate at a rank over the next one in percentage points.
+
+        The difference is rounded to 10 decimal places, so e.g. 40.3 - 30.2 is 10.1.
+
+        Args:
+            position: Rank, 1 for the lead of the winner
+
+        Returns:
+            float: The lead, None if there is no next candidate
+        """
+        prozent, next_prozent = self.rank(position)[1], self.rank(position + 1)[1]
+        if prozent is None or next_prozent is None:
+            return None
+        return round(prozent - next_prozent, 10)
+
+    def pronoun(self) -> Optional[str]:
+        """Returns the pronoun of the winning party ('Sie' if it has none), None without a winner."""
+        if self._pronomen is _UNSET:
+            gewinner_partei = self.rank(1)[0]
+            pronomen = parties.PARTEI_PRONOMEN.get(gewinner_partei, 'Sie') if gewinner_partei else None
+            object.__setattr__(self, '_pronomen', pronomen)
+        return self._pronomen
+
+    def _key(self) -> tuple:
+        """All values paired with their type, so e.g. 1 and 1.0 (which render differently) differ."""
+        return tuple((type(value), value) for value in (
+            self.name, self.wahlart, self.wahlorgan, self.ergebnis_art, self.anz_wahlbereiche,
+            self.gez_wahlbereiche, self.num_parties, self.wahlberechtigte, self.wahlbeteiligung
+        )) + tuple((type(partei), partei) for partei in self.parteien) + self.prozente
+
+    def __eq__(self, other):
+        if isinstance(other, ElectionVariables):
+            return self._key() == other._key()
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash(self._key()))
+        return self._hash
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+def _rank_getter(position: int, field: str):
+    """Returns a getter for the party, percentage or lead of the candidate at a rank."""
+    if field == 'vorsprung':
+        return lambda variables: variables.margin(position)
+    index = position - 1
+    if field == 'partei':
+        def getter(variables):
+            ranking = variables._ranking or variables.ranking()
+            return variables.parteien[ranking[index]] if index < len(ranking) else None
+    else:
+        def getter(variables):
+            ranking = variables._ranking or variables.ranking()
+            return variables.prozente[ranking[index]] if index < len(ranking) else None
+    return getter
+
+
+@lru_cache(maxsize=256)
+def _rank_variable(key) -> Optional[Callable]:
+    """Returns the getter of a 'platz<N>_...' variable, None for other keys."""
+    match = RANK_VARIABLE.fullmatch(key) if isinstance(key, str) else None
+    return _rank_getter(int(match.group(1)), match.group(2)) if match else None
+
+
+# Variable name -> getter, in the order of the former variables dict
+_GETTERS = {
+    'ortsname': lambda variables: variables.name,
+    'name': lambda variables: variables.name,
+    'wahlart': lambda variables: variables.wahlart,
+    'wahlorgan': lambda variables: variables.wahlorgan,
+    'ergebnis_art': lambda variables: variables.ergebnis_art,
+    'anz_wahlbereiche': lambda variables: variables.anz_wahlbereiche,
+    'gez_wahlbereiche': lambda variables: variables.gez_wahlbereiche,
+    'num_parties': lambda variables: variables.num_parties,
+    'wahlberechtigte': lambda variables: variables.wahlberechtigte,
+    'wahlbeteiligung': lambda variables: variables.wahlbeteiligung,
+}
+for _position, _rank in enumerate(RANKS, start=1):
+    _GETTERS[f'{_rank}_partei'] = _rank_getter(_position, 'partei')
+    _GETTERS[f'{_rank}_prozent'] = _rank_getter(_position, 'prozent')
+    if _position == 1:
+        _GETTERS['gewinner_pronomen'] = ElectionVariables.pronoun
+_GETTERS['vorsprung'] = _rank_getter(1, 'vorsprung')
+del _position, _rank
+
+
+def parse_election_data(raw_data: Dict[str, Any], backend: str = 'python') -> ElectionVariables:
     """
     Parse raw election JSON and return template variables.
 
     Args:
         raw_data: Dictionary containing 'wahl' key with election data
+        backend: 'python' (default) joins candidates with plain dicts,
+            'pandas' uses a DataFrame merge. Both produce the same variables.
 
     Returns:
-        dict: All variables needed for templates
+        ElectionVariables: All variables needed for templates (a read-only Mapping)
+
+    Raises:
+        Exception: If the election data is malformed (missing keys, wrong types)
     """
-    try:
-        wahl = raw_data.get('wahl', {})
+    wahl = raw_data.get('wahl', {})
+
+    # Extract election metadata (without nested structures)
+    election_data = {k: v for k, v in wahl.items()
+                     if k not in ['ergebnis', 'kandidaten']}
+
+    # Extract results data
+    results_data = wahl.get('ergebnis', {})
+
+    # Join candidate results with candidate reference data (they are ranked when needed)
+    candidate_data = results_data.get('kandidaten', [])
+    candidate_ref = wahl.get('kandidaten', [])
+
+    if backend == 'pandas':
+        rows = _join_candidates_pandas(candidate_data, candidate_ref)
+    elif backend == 'python':
+        rows = _join_candidates(candidate_data, candidate_ref)
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    return _build_variables(election_data, results_data, rows)
 
-        # Extract election metadata (without nested structures)
-        election_data = {k: v for k, v in wahl.items()
-                         if k not in ['ergebnis', 'kandidaten']}
 
-        # Extract results data
-        results_data = wahl.get('ergebnis', {})
+def _build_variables(election_data: Dict[str, Any], results_data: Dict[str, Any],
+                     rows: List[Tuple[Optional[str], Any]]) -> ElectionVariables:
+    """
+    Builds the template variables of one election.
+
+    Candidates are ranked lazily by their percentages as floats. If a percentage
+    would rank differently as a float (strings, integers beyond 2**53, ...),
+    the candidates are ranked right away by the original values, which also
+    raises for values that cannot be ranked.
+
+    Args:
+        election_data: Election metadata ('wahl' without 'ergebnis' and 'kandidaten')
+        results_data: The 'ergebnis' object of the election
+        rows: Joined candidates as (partei, prozent) in the order of the results
 
-        # Build candidate dataframe
-        candidate_data = results_data.get('kandidaten', [])
-        candidate_ref = wahl.get('kandidaten', [])
+    Returns:
+        ElectionVariables: All variables needed for templates (a read-only Mapping)
+    """
+    parteien, prozente = tuple(zip(*rows)) or ((), ())
+    ranking = None
+    kinds = set(map(type, prozente))
+    if not kinds <= {float}:
+        if not kinds <= {float, int, type(None)} or not all(map(_is_frame_number, prozente)):
+            ranking = sorted(range(len(rows)), key=lambda i: _prozent_key(rows[i]), reverse=True)
+        prozente = tuple(float(prozent) if prozent is not None else float('nan') for prozent in prozente)
+    return ElectionVariables(
+        name=election_data.get('gks_name', '').split(',')[0],
+        wahlart=election_data.get('wahlart'),
+        wahlorgan=election_data.get('organ'),
+        ergebnis_art=results_data.get('ergebnis_art'),
+        anz_wahlbereiche=election_data.get('anz_wahlbereiche'),
+        gez_wahlbereiche=results_data.get('gez_wahlbereiche'),
+        num_parties=len(rows),
+        wahlberechtigte=election_data.get('anz_wahlberechtigte'),
+        wahlbeteiligung=results_data.get('wahlbeteil'),
+        parteien=parteien,
+        prozente=prozente,
+        ranking=ranking,
+    )
 
-        candidate_df = pd.DataFrame(candidate_data).merge(
-            pd.DataFrame(candidate_ref),
-            on=['kandidatur_id', 'pos'],
-            how='left'
-        )
-        candidate_df = candidate_df.sort_values(
-            'prozent', ascending=False
-        ).reset_index(drop=True)
 
+def parse_elections(raw_elections: Iterable[Dict[str, Any]],
+                    return_exceptions: bool = False) -> List[Union[ElectionVariables, Exception]]:
+    """
+    Parse many elections at once, joining the candidates of all of them in one DataFrame pass.
+
+    The candidate results of all elections are tagged with their position in
+    raw_elections and joined with all reference rows in a single merge,
+    instead of one merge per election. The variables are identical to parse_election_data(raw_data) for
+    every election. Elections the combined frame cannot represent exactly
+    (ids other than int/str, non-numeric percentages, malformed data) are
+    parsed one by one.
+
+    Args:
+        raw_elections: Dictionaries containing 'wahl' key with election data
+        return_exceptions: Put the exception of a malformed election in its place
+            in the result instead of raising it
+
+    Returns:
+        list: Variables (or exceptions) in the order of raw_elections
+
+    Raises:
+        Exception: The exception of the first malformed election if return_exceptions
+            is False, like [parse_election_data(raw_data) for raw_data in raw_elections]
+    """
+    import pandas as pd
+
+    raw_elections = list(raw_elections)
+    parsed = [None] * len(raw_elections)
+    prepared = {}
+    keys = ['_election', 'kandidatur_id', 'pos']
+    result_columns = {column: [] for column in keys + ['prozent']}
+    ref_columns = {column: [] for column in keys + ['partei']}
+    for index, raw_data in enumerate(raw_elections):
+        try:
+            election_data, results_data, results, refs = _candidate_rows(raw_data)
+        except Exception:
+            parsed[index] = _parse_one(raw_data)
+            continue
+        prepared[index] = (election_data, results_data)
+        _extend_columns(result_columns, index, results)
+        _extend_columns(ref_columns, index, refs)
+
+    results_df = pd.DataFrame(result_columns)
+    refs_df = pd.DataFrame({column: pd.Series(values, dtype=object) if column == 'partei' else values
+                            for column, values in ref_columns.items()})
+
+    # Elections the combined frame cannot represent exactly like _join_candidates are parsed one by one
+    unsupported = set()
+    for df in (results_df, refs_df):
+        for key in keys[1:]:
+            unsupported |= _unsupported_elections(df, key, _is_frame_key)
+    unsupported |= _unsupported_elections(results_df, 'prozent', _is_frame_number)
+    if unsupported:
+        results_df = results_df[~results_df['_election'].isin(unsupported)]
+        refs_df = refs_df[~refs_df['_election'].isin(unsupported)]
+        for index in unsupported:
+            del prepared[index]
+            parsed[index] = _parse_one(raw_elections[index])
+
+    results_df = results_df.astype({'prozent': float})
+    for key in keys:
+        if results_df[key].dtype != refs_df[key].dtype:
+            results_df = results_df.astype({key: object})
+            refs_df = refs_df.astype({key: object})
+
+    merged = results_df.merge(refs_df, on=keys, how='left', indicator=True)
+
+    rows = {}
+    for index, partei, prozent, matched in zip(merged['_election'].tolist(), merged['partei'].tolist(),
+                                               merged['prozent'].tolist(), (merged['_merge'] == 'both').tolist()):
+        rows.setdefault(index, []).append((partei if matched else None, prozent))
+
+    for index, (election_data, results_data) in prepared.items():
+        try:
+            parsed[index] = _build_variables(election_data, results_data, rows.get(index, []))
+        except Exception:
+            parsed[index] = _parse_one(raw_elections[index])
+
+    if not return_exceptions:
+        for variables in parsed:
+            if isinstance(variables, Exception):
+                raise variables
+    return parsed
+
+
+def _candidate_rows(raw_data: Dict[str, Any]) -> tuple:
+    """
+    Extract the rows of one election for parse_elections, like parse_election_data does.
+
+    Returns:
+        tuple: (election metadata, results data, result rows (kandidatur_id, pos, prozent),
+        reference rows (kandidatur_id, pos, partei))
+
+    Raises:
+        Exception: If the election data is malformed
+    """
+    wahl = raw_data.get('wahl', {})
+    election_data = {k: v for k, v in wahl.items()
+                     if k not in ['ergebnis', 'kandidaten']}
+    results_data = wahl.get('ergebnis', {})
+    results = [(c['kandidatur_id'], c['pos'], c['prozent'])
+               for c in results_data.get('kandidaten', [])]
+    refs = [(ref['kandidatur_id'], ref['pos'], ref.get('partei'))
+            for ref in wahl.get('kandidaten', [])]
+    return election_data, results_data, results, refs
+
+
+def _extend_columns(columns: Dict[str, list], index: int, rows: List[tuple]):
+    """Appends rows of one election to column lists whose first column is '_election'."""
+    names = list(columns)
+    columns['_election'] += [index] * len(rows)
+    for name, values in zip(names[1:], zip(*rows)):
+        columns[name] += values
+
+
+def _unsupported_elections(df, column: str, is_supported) -> set:
+    """Returns the elections with a value in column that is_supported rejects."""
+    dtype = df[column].dtype
+    if dtype == 'float64' and column == 'prozent':
+        return set()
+    if dtype == 'int64':
+        values = df[column]
+        if column == 'prozent':
+            return set(df['_election'][values.abs() > 2 ** 53])
+        return set()
+    supported = df[column].map(is_supported).astype(bool)
+    return set(df['_election'][~supported])
+
+
+def _is_frame_key(value: Any) -> bool:
+    """Keys that compare equal in a merge exactly when they do in a dict."""
+    return type(value) in (int, str)
+
+
+def _is_frame_number(value: Any) -> bool:
+    """Percentages that survive the conversion to float64 without changing their order."""
+    return value is None or type(value) is float or (type(value) is int and abs(value) <= 2 ** 53)
+
+
+def _parse_one(raw_data: Dict[str, Any]) -> Union[ElectionVariables, Exception]:
+    """parse_election_data that returns its exception instead of raising it."""
+    try:
+        return parse_election_data(raw_data)
     except Exception as e:
-        write_error(e)
-        sys.exit(1)
-
-    # Extract party data
-    gewinner_partei, gewinner_prozent = _get_party_at(candidate_df, 0)
-    zweite_partei, zweite_prozent = _get_party_at(candidate_df, 1)
-    dritte_partei, dritte_prozent = _get_party_at(candidate_df, 2)
-    vierte_partei, vierte_prozent = _get_party_at(candidate_df, 3)
-    fuenfte_partei, fuenfte_prozent = _get_party_at(candidate_df, 4)
-
-    # Extract basic metadata
-    name = election_data.get('gks_name', '').split(',')[0]
-
-    # Build variables dict - single source of truth
-    return {
-        'ortsname': name,
-        'name': name,
-        'wahlart': election_data.get('wahlart'),
-        'wahlorgan': election_data.get('organ'),
-        'ergebnis_art': results_data.get('ergebnis_art'),
-        'anz_wahlbereiche': election_data.get('anz_wahlbereiche'),
-        'gez_wahlbereiche': results_data.get('gez_wahlbereiche'),
-        'num_parties': len(candidate_df),
-        'wahlberechtigte': election_data.get('anz_wahlberechtigte'),
-        'wahlbeteiligung': results_data.get('wahlbeteil'),
-        'gewinner_partei': gewinner_partei,
-        'gewinner_prozent': gewinner_prozent,
-        'gewinner_pronomen': PARTEI_PRONOMEN.get(gewinner_partei, 'Sie') if gewinner_partei else None,
-        'zweite_partei': zweite_partei,
-        'zweite_prozent': zweite_prozent,
-        'dritte_partei': dritte_partei,
-        'dritte_prozent': dritte_prozent,
-        'vierte_partei': vierte_partei,
-        'vierte_prozent': vierte_prozent,
-        'fuenfte_partei': fuenfte_partei,
-        'fuenfte_prozent': fuenfte_prozent,
-    }
-
-
-def _get_party_at(df: pd.DataFrame, index: int) -> Tuple[Optional[str], Optional[float]]:
-    """
-    Safely extract party and percentage from dataframe at given index.
+        return e
+
+
+def election_id(raw_data: Dict[str, Any]) -> Optional[Any]:
+    """
+    Extract the id of an election from its raw JSON.
+
+    Args:
+        raw_data: Dictionary containing 'wahl' key with election data
+
+    Returns:
+        The election id or None if the data has none
+    """
+    wahl = raw_data.get('wahl') if isinstance(raw_data, dict) else None
+    if isinstance(wahl, dict):
+        return wahl.get('id')
+    return None
+
+
+def election_ergebnis_art(raw_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Extract the result type of an election from its raw JSON.
+
+    Args:
+        raw_data: Dictionary containing 'wahl' key with election data
+
+    Returns:
+        The ergebnis_art (e.g. 'Zwischenergebnis') or None if the data has none
+    """
+    wahl = raw_data.get('wahl') if isinstance(raw_data, dict) else None
+    ergebnis = wahl.get('ergebnis') if isinstance(wahl, dict) else None
+    if isinstance(ergebnis, dict):
+        return ergebnis.get('ergebnis_art')
+    return None
+
+
+def _join_candidates(candidate_data: List[dict], candidate_ref: List[dict]) -> List[Tuple[Optional[str], Any]]:
+    """
+    Join candidate results with their reference data.
+
+    Equivalent to a left merge on ('kandidatur_id', 'pos'), but uses a dict
+    index instead of building DataFrames.
 
     Args:
-        df: Candidate dataframe sorted by percentage
-        index: Row index
+        candidate_data: Candidate results ('kandidatur_id', 'pos', 'prozent')
+        candidate_ref: Candidate reference data ('kandidatur_id', 'pos', 'partei')
 
     Returns:
-        tuple: (partei, prozent) or (None, None) if index doesn't exist
+        list: (partei, prozent) of every joined row in the order of the results
+    """
+    ref_index = {}
+    for ref in candidate_ref:
+        ref_index.setdefault((ref['kandidatur_id'], ref['pos']), []).append(ref.get('partei'))
+
+    rows = []
+    for candidate in candidate_data:
+        prozent = candidate['prozent']
+        for partei in ref_index.get((candidate['kandidatur_id'], candidate['pos']), [None]):
+            rows.append((partei, prozent))
+    return rows
+
+
+def _join_candidates_pandas(candidate_data: List[dict], candidate_ref: List[dict]) -> List[Tuple[Optional[str], Any]]:
     """
-    if index < len(df):
-        return df.at[index, 'partei'], float(df.at[index, 'prozent'])
-    return None, None
\ No newline at end of file
+    DataFrame implementation of _join_candidates.
+
+    Args:
+        candidate_data: Candidate results ('kandidatur_id', 'pos', 'prozent')
+        candidate_ref: Candidate reference data ('kandidatur_id', 'pos', 'partei')
+
+    Returns:
+        list: (partei, prozent) of every joined row in the order of the results
+    """
+    import pandas as pd
+
+    def frame(rows, position):
+        # Keys as objects, so they compare like dict keys ('1' != 1); values are taken
+        # from the rows by position, so None stays None and large integers stay exact
+        return pd.DataFrame({
+            'kandidatur_id': pd.Series([row['kandidatur_id'] for row in rows], dtype=object),
+            'pos': pd.Series([row['pos'] for row in rows], dtype=object),
+            position: range(len(rows)),
+        })
+
+    candidate_df = frame(candidate_data, '_result').merge(
+        frame(candidate_ref, '_ref'),
+        on=['kandidatur_id', 'pos'],
+        how='left'
+    )
+    return [
+        (candidate_ref[int(ref)].get('partei') if ref == ref else None, candidate_data[result]['prozent'])
+        for result, ref in zip(candidate_df['_result'].tolist(), candidate_df['_ref'].tolist())
+    ]
+
+
+def _prozent_key(row: Tuple[Optional[str], Any]) -> Tuple[int, Any]:
+    """Sort key that ranks missing percentages last, like pandas does with NaN."""
+    prozent = row[1]
+    if prozent is None or prozent != prozent:
+        return (0, 0)
+    return (1, prozent)
@@ -0,0 +1,110 @@
+########################
+#
+# Metrics
+# Process-wide instrumentation of the text generation and its
+# export in the Prometheus text format
+# -> l.sander.fm@ndr.de
+#
+#########################
+
+import json
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .robotext import Instrumentation
+
+# Prometheus metrics per Instrumentation section:
+# section -> (label name, {field: (metric name, type, help)})
+PROMETHEUS_METRICS = {
+    'stages': ('stage', {
+        'calls': ('stage_calls_total', 'counter', 'Runs of a pipeline stage'),
+        'seconds': ('stage_seconds_total', 'counter', 'Time spent in a pipeline stage'),
+    }),
+    'conditions': ('template', {
+        'evaluations': ('condition_evaluations_total', 'counter', 'Evaluations of the conditions of a template'),
+        'matches': ('condition_matches_total', 'counter', 'Evaluations in which all conditions of a template were met'),
+        'seconds': ('condition_seconds_total', 'counter', 'Time spent evaluating the conditions of a template'),
+    }),
+    'renders': ('template', {
+        'renders': ('render_total', 'counter', 'Renders of a template'),
+        'seconds': ('render_seconds_total', 'counter', 'Time spent rendering a template'),
+    }),
+    'corrections': ('correction', {
+        'calls': ('correction_calls_total', 'counter', 'Applications of a correction'),
+        'hits': ('correction_hits_total', 'counter', 'Applications of a correction that changed the sentence'),
+        'seconds': ('correction_seconds_total', 'counter', 'Time spent applying a correction'),
+    }),
+    'counters': ('event', {
+        'count': ('events_total', 'counter', 'Named events of the text generation'),
+    }),
+}
+
+_INSTRUMENTATION = None
+
+
+def enable() -> 'Instrumentation':
+    """Starts recording measurements for all texts generated in this process and returns the recorder."""
+    global _INSTRUMENTATION
+    if _INSTRUMENTATION is None:
+        # Imported here: every text checks current(), but only enabled measurements need the recorder
+        from .robotext import Instrumentation
+        _INSTRUMENTATION = Instrumentation()
+    return _INSTRUMENTATION
+
+
+def disable():
+    """Stops recording measurements and drops the recorded ones."""
+    global _INSTRUMENTATION
+    _INSTRUMENTATION = None
+
+
+def current() -> Optional['Instrumentation']:
+    """Returns the recorder of this process, None if measurements are disabled."""
+    return _INSTRUMENTATION
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def to_prometheus(data: dict, prefix: str = 'ndrwahltexte',
+                  extra: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+    """
+    Formats measurements in the Prometheus text exposition format.
+
+    Args:
+        data: Instrumentation.as_dict() (e.g. merged from several processes)
+        prefix: Prefix of all metric names
+        extra: Additional unlabeled metrics as (name, type, help, value)
+
+    Returns:
+        str: The exposition text, one sample per line
+    """
+    lines = []
+    for name, metric_type, help_text, value in extra:
+        lines.append(f'# HELP {prefix}_{name} {help_text}')
+        lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+        lines.append(f'{prefix}_{name} {value}')
+    for section, (label, fields) in PROMETHEUS_METRICS.items():
+        entries = data.get(section, {})
+        for field, (name, metric_type, help_text) in fields.items():
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+            for entry, values in entries.items():
+                lines.append(f'{prefix}_{name}{{{label}="{_escape(entry)}"}} {values[field]}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics(path: str, data: dict):
+    """
+    Writes measurements to a file, as JSON if path ends with .json, else in Prometheus format.
+
+    Args:
+        path: Output file
+        data: Instrumentation.as_dict()
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            json.dump(data, f, indent=2)
+        else:
+            f.write(to_prometheus(data))
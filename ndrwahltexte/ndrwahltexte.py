@@ -8,16 +8,344 @@
 
 import json
 import sys
-from .election import parse_election_data
-from .text_generator import generate_election_text
-from .utils import write_error
+import time
+from . import metrics, templates
+from .election import parse_election_data, election_id
+from .text_generator import generate_election_text, resize_caches, EXCLUSIVE_TOPICS
+from .utils import write_error, error_object, validation_error_object
 
 
-def main():
+def generate(raw_data, variables=None):
+    """
+    Generates the election text for one parsed JSON payload.
+
+    Args:
+        raw_data: Dictionary containing 'wahl' key with election data
+        variables: The result of parse_election_data(raw_data), if already parsed
+
+    Returns:
+        dict: Dictionary with 'Titel' and 'Absatz1' keys, or 'error' key if generation failed
+
+    Raises:
+        Exception: If the election data or its configuration is invalid
+    """
+    if variables is None:
+        instrument = metrics.current()
+        if instrument is None:
+            variables = parse_election_data(raw_data)
+        else:
+            start = time.perf_counter()
+            variables = parse_election_data(raw_data)
+            instrument.stage('parse_election_data', time.perf_counter() - start)
+    return generate_election_text(variables, election_id(raw_data))
+
+
+def process_line(line: str, line_number: int, variables: dict = None) -> dict:
+    """
+    Generates the output object for one line of an NDJSON stream.
+
+    Args:
+        line: JSON document of one election (or the already parsed object)
+        line_number: 1-based line number in the stream
+        variables: The result of parse_election_data for the election, if already parsed
+
+    Returns:
+        dict: Generated text or error object, tagged with line number and election id
+    """
+    result = {'line': line_number, 'id': None}
+    try:
+        raw_data = json.loads(line) if isinstance(line, (str, bytes)) else line
+        result['id'] = election_id(raw_data)
+        output = generate(raw_data, variables)
+    except Exception as e:
+        result.update(error_object(e))
+        return result
+
+    if 'error' in output:
+        result.update(validation_error_object(output['error']))
+    else:
+        result.update(output)
+    return result
+
+
+def run_ndjson(infile, outfile, store=None):
+    """
+    Streams elections from infile to outfile, one JSON object per line.
+
+    Every input line is processed as soon as it arrives, so memory stays constant
+    regardless of the stream length. Invalid records produce an error object on
+    their line instead of stopping the stream.
+
+    Args:
+        infile: Text stream with one election object per line
+        outfile: Text stream that receives one result object per line
+        store: ResultStore that receives every generated text (see store.ResultStore)
+    """
+    if store is not None:
+        from .store import describe_input
+    for line_number, line in enumerate(infile, start=1):
+        if not line.strip():
+            continue
+        if store is None:
+            result = process_line(line, line_number)
+        else:
+            raw_data, ergebnis_art, digest = describe_input(line)
+            result = process_line(raw_data, line_number)
+            store.put_result(result, ergebnis_art, digest)
+        outfile.write(json.dumps(result) + '\n')
+        outfile.flush()
+
+
+def build_parser():
+    """Builds the command line parser."""
+    # argparse (with gettext, shutil and locale) is only imported when there are arguments to parse
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='ndrwahltexte',
+        description='Erstellt Fließtext basierend auf dem Wahlergebnis'
+    )
+    parser.add_argument('--ndjson', action='store_true',
+                        help='Liest ein Wahl-Objekt pro Zeile und schreibt ein Ergebnis pro Zeile')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Verteilt --ndjson bzw. watch auf N Prozesse (Reihenfolge bleibt erhalten), '
+                             'bzw. Anzahl Prozesse von prefork und spool work')
+    parser.add_argument('--parser', choices=['python', 'pandas'], default=None,
+                        help='pandas liest bei --ndjson jeweils einen Block von Wahlen in einem DataFrame ein')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Anzahl Wahlen pro Block bei --workers bzw. --parser (default: 32, mit pandas 1024)')
+    parser.add_argument('--cache-size', type=int, default=None,
+                        help='Maximale Anzahl zwischengespeicherter Texte und Wahlen mit gespeicherten Sätzen '
+                             'der letzten Meldung (0 schaltet beide Caches ab)')
+    parser.add_argument('--metrics', metavar='DATEI', default=None,
+                        help='Schreibt nach --ndjson Laufzeitmessungen je Schritt, Template und Korrektur '
+                             'in DATEI (Prometheus-Format, JSON bei Endung .json)')
+    parser.add_argument('--sqlite', metavar='DATEI', default=None,
+                        help='Speichert die Texte bei --ndjson, serve und watch in der SQLite-Datenbank DATEI '
+                             '(nur geänderte Texte werden geschrieben)')
+    parser.add_argument('--client', action='store_true',
+                        help='Lässt die Eingabe von einem laufenden prefork-Server (Socket aus '
+                             'NDRWAHLTEXTE_SOCKET) verarbeiten; ohne Server wie ohne --client')
+    subparsers = parser.add_subparsers(dest='command')
+
+    serve = subparsers.add_parser('serve', help='Startet einen HTTP-Server, der Wahltexte erzeugt')
+    serve.add_argument('--host', default='127.0.0.1', help='Adresse des Servers (default: 127.0.0.1)')
+    serve.add_argument('--port', type=int, default=8080, help='Port des Servers (default: 8080)')
+    serve.add_argument('--cache-size', type=int, default=argparse.SUPPRESS,
+                       help='Maximale Anzahl zwischengespeicherter Texte und Wahlen mit gespeicherten Sätzen '
+                            'der letzten Meldung (0 schaltet beide Caches ab)')
+    serve.add_argument('--metrics', action='store_true', default=argparse.SUPPRESS,
+                       help='Misst Laufzeiten je Schritt, Template und Korrektur (GET /metrics)')
+    serve.add_argument('--sqlite', metavar='DATEI', default=argparse.SUPPRESS,
+                       help='Speichert die Texte in der SQLite-Datenbank DATEI (GET /changes?since=T)')
+    serve.add_argument('--threads', type=int, default=1,
+                       help='Bearbeitet bis zu N Anfragen gleichzeitig in einem Thread-Pool (default: 1)')
+
+    watch = subparsers.add_parser('watch', help='Überwacht ein Verzeichnis und erzeugt Texte für neue oder geänderte Dateien')
+    watch.add_argument('directory', help='Verzeichnis, in das die Wahl-Dateien (*.json) geliefert werden')
+    watch.add_argument('--output', required=True, help='Verzeichnis für die erzeugten Texte (gleiche Dateinamen)')
+    watch.add_argument('--debounce', type=float, default=0.5,
+                       help='Sekunden, die eine Datei unverändert sein muss, bevor sie verarbeitet wird (default: 0.5)')
+    watch.add_argument('--interval', type=float, default=0.2,
+                       help='Sekunden zwischen zwei Durchläufen des Verzeichnisses (default: 0.2)')
+    watch.add_argument('--concurrency', type=int, default=8,
+                       help='Maximale Anzahl gleichzeitig verarbeiteter Dateien (default: 8)')
+    watch.add_argument('--once', action='store_true',
+                       help='Beendet sich, sobald alle vorhandenen Dateien verarbeitet sind')
+    watch.add_argument('--sqlite', metavar='DATEI', default=argparse.SUPPRESS,
+                       help='Speichert die Texte zusätzlich in der SQLite-Datenbank DATEI')
+
+    changes = subparsers.add_parser('changes', help='Gibt die seit einem Zeitpunkt geänderten Texte aus --sqlite aus')
+    changes.add_argument('--sqlite', metavar='DATEI', default=argparse.SUPPRESS,
+                         help='SQLite-Datenbank, in die --ndjson, serve oder watch geschrieben haben')
+    changes.add_argument('--since', type=float, default=0.0,
+                         help='Unix-Zeitstempel; nur Texte, die danach geändert wurden (default: 0, alle)')
+    changes.add_argument('--after', metavar='ID', default=None,
+                         help='Wahl-ID; liefert auch Texte, die genau zum Zeitpunkt --since geändert wurden '
+                              'und deren ID danach sortiert (Fortsetzung nach updated_at und id des letzten Textes)')
+    changes.add_argument('--limit', type=int, default=None, help='Maximale Anzahl Texte (älteste zuerst)')
+
+    subparsers.add_parser('check', help='Prüft die Vorlagen auf unerreichbare Vorlagen und Titel, '
+                                         'die gleichzeitig zutreffen können')
+
+    prefork = subparsers.add_parser('prefork', help='Lädt Vorlagen einmal und beantwortet --client-Aufrufe '
+                                                    'über einen Unix-Socket mit vorab gestarteten Prozessen')
+    prefork.add_argument('--socket', metavar='PFAD', default=None,
+                         help='Pfad des Sockets (default: NDRWAHLTEXTE_SOCKET, sonst ndrwahltexte.sock in '
+                              'XDG_RUNTIME_DIR bzw. /tmp/ndrwahltexte-<uid>/)')
+
+    spool = subparsers.add_parser('spool', help='Verteilt Wahlen über ein gemeinsames Verzeichnis auf mehrere Rechner')
+    spool_commands = spool.add_subparsers(dest='spool_command', required=True)
+    submit = spool_commands.add_parser('submit', help='Teilt die Wahlen von stdin (NDJSON) in Arbeitspakete auf')
+    submit.add_argument('directory', help='Spool-Verzeichnis')
+    submit.add_argument('--size', type=int, default=100, help='Wahlen pro Arbeitspaket (default: 100)')
+    submit.add_argument('--job', default=None, help='Name des Auftrags (default: aktuelle Uhrzeit)')
+    work = spool_commands.add_parser('work', help='Bearbeitet Arbeitspakete, bis es beendet wird')
+    work.add_argument('directory', help='Spool-Verzeichnis')
+    work.add_argument('--node', default=None, help='Name des Rechners in der Statistik (default: Hostname)')
+    work.add_argument('--stale', type=float, default=60.0,
+                      help='Sekunden, nach denen ein nicht mehr bearbeitetes Paket neu vergeben wird (default: 60)')
+    work.add_argument('--interval', type=float, default=0.5,
+                      help='Sekunden Wartezeit, wenn kein Paket vorliegt (default: 0.5)')
+    work.add_argument('--once', action='store_true',
+                      help='Beendet sich, sobald kein Paket mehr offen oder in Bearbeitung ist')
+    status = spool_commands.add_parser('status', help='Gibt offene, laufende und erledigte Pakete und den '
+                                                      'Durchsatz je Rechner als JSON aus')
+    status.add_argument('directory', help='Spool-Verzeichnis')
+    collect = spool_commands.add_parser('collect', help='Gibt die Ergebnisse (NDJSON) in Eingabereihenfolge aus')
+    collect.add_argument('directory', help='Spool-Verzeichnis')
+    collect.add_argument('--job', default=None, help='Nur die Ergebnisse dieses Auftrags')
+
+    return parser
+
+
+def check_templates(out) -> bool:
+    """
+    Writes the analysis of all template modules (see templates.analyze).
+
+    Overlaps are only reported for the title topic (EXCLUSIVE_TOPICS): the
+    sentences of the other topics are meant to be combined.
+
+    Args:
+        out: Text stream for the report
+
+    Returns:
+        bool: False if a template can never be selected
+    """
+    ok = True
+    for (wahlart_module, ergebnis_module), table in templates.analyze().items():
+        print(f"{wahlart_module}/{ergebnis_module}: {len(table.features)} features", file=out)
+        for key in table.unreachable:
+            print(f"  unreachable: {key}", file=out)
+            ok = False
+        for key in table.residual:
+            print(f"  evaluated at runtime: {key}", file=out)
+        for topic, key, other in table.overlapping(EXCLUSIVE_TOPICS):
+            print(f"  overlapping in {topic}: {key}, {other}", file=out)
+    return ok
+
+
+def main(argv=None):
     """
     Main entry point for election text generation.
     Reads JSON from stdin, generates text, writes to stdout.
+    With --ndjson, streams one election per line instead.
+    With the `serve` command, runs a persistent HTTP server instead.
+    With the `watch` command, generates texts for files dropped into a directory.
+    With the `check` command, reports unreachable templates and overlapping titles.
+    With the `spool` commands, distributes elections across nodes through a
+    shared directory (see spool.py).
+    With the `prefork` command, answers `--client` calls from warm worker processes
+    (see client.py; --client itself is handled before this module is imported).
+    With --sqlite, texts are also stored in an SQLite database; the `changes`
+    command prints those that changed since a point in time.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
     """
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        # The common single-document call needs no option parsing
+        run_document()
+        return
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers is not None and not args.ndjson and args.command not in ('watch', 'prefork', 'spool'):
+        parser.error('--workers requires --ndjson, watch, prefork or spool work')
+    if args.workers is not None and args.command == 'spool' and args.spool_command != 'work':
+        parser.error('--workers requires --ndjson, watch, prefork or spool work')
+    if args.command != 'serve' and args.metrics is not None and not args.ndjson:
+        parser.error('--metrics requires --ndjson or serve')
+    if (args.parser is not None or args.chunksize is not None) and not args.ndjson:
+        parser.error('--parser and --chunksize require --ndjson')
+    if args.sqlite is not None and not args.ndjson and args.command not in ('serve', 'watch', 'changes'):
+        parser.error('--sqlite requires --ndjson, serve, watch or changes')
+    if args.command == 'changes' and args.sqlite is None:
+        parser.error('changes requires --sqlite')
+    if args.command == 'serve' and args.threads < 1:
+        parser.error('--threads must be at least 1')
+
+    store = None
+    if args.sqlite is not None:
+        from .store import ResultStore
+        store = ResultStore(args.sqlite)
+
+    if args.cache_size is not None:
+        resize_caches(args.cache_size)
+
+    if args.command == 'serve':
+        from .server import serve
+        if args.metrics:
+            metrics.enable()
+        serve(args.host, args.port, store, args.threads)
+        return
+
+    if args.command == 'changes':
+        for result in store.changed_since(args.since, args.limit, args.after):
+            sys.stdout.write(json.dumps(result) + '\n')
+        store.close()
+        return
+
+    if args.command == 'prefork':
+        from .prefork import serve_prefork
+        try:
+            serve_prefork(args.socket, args.workers)
+        except RuntimeError as e:
+            parser.error(str(e))
+        return
+
+    if args.command == 'spool':
+        from . import spool
+        if args.spool_command == 'submit':
+            try:
+                items = spool.submit(sys.stdin, args.directory, args.size, args.job)
+            except ValueError as e:
+                parser.error(str(e))
+            print(f"ndrwahltexte: {items} work items submitted to {args.directory}", file=sys.stderr)
+        elif args.spool_command == 'work':
+            spool.work(args.directory, args.workers or 1, args.node, args.stale, args.interval, args.once)
+        elif args.spool_command == 'status':
+            json.dump(spool.status(args.directory), sys.stdout, indent=2)
+            sys.stdout.write('\n')
+        elif spool.collect(args.directory, sys.stdout, args.job):
+            # Not all work items of the job are done
+            sys.exit(1)
+        return
+
+    if args.command == 'check':
+        if not check_templates(sys.stdout):
+            sys.exit(1)
+        return
+
+    if args.command == 'watch':
+        from .watch import watch
+        watch(args.directory, args.output, args.debounce, args.interval,
+              args.concurrency, args.workers, args.once, store)
+        if store is not None:
+            store.close()
+        return
+
+    if args.ndjson:
+        if args.metrics is not None:
+            metrics.enable()
+        if args.workers is not None or args.parser is not None or args.chunksize is not None:
+            from .batch import run_batch
+            run_batch(sys.stdin, sys.stdout, args.workers or 1, args.chunksize, args.parser or 'python', store)
+        else:
+            run_ndjson(sys.stdin, sys.stdout, store)
+        if store is not None:
+            store.close()
+        if args.metrics is not None:
+            metrics.write_metrics(args.metrics, metrics.current().as_dict())
+        return
+
+    run_document()
+
+
+def run_document():
+    """Generates the text for the JSON document on stdin and writes it to stdout (errors to stderr, exit code 1)."""
     # Read input
     try:
         raw_data = json.load(sys.stdin)
@@ -25,21 +353,16 @@ def main():
         write_error(e)
         sys.exit(1)
 
-    # Parse election data
-    variables = parse_election_data(raw_data)
-
-    # Generate text
-    output = generate_election_text(variables)
+    # Parse election data and generate text
+    try:
+        output = generate(raw_data)
+    except Exception as e:
+        write_error(e)
+        sys.exit(1)
 
     # Handle errors
     if 'error' in output:
-        error_obj = {
-            "error": {
-                "type": "ValidationError",
-                "message": output['error'],
-                "traceback": ""
-            }
-        }
+        error_obj = validation_error_object(output['error'])
         print(json.dumps(error_obj, indent=2), file=sys.stderr)
         sys.exit(1)
 
@@ -48,4 +371,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
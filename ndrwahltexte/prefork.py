@@ -0,0 +1,203 @@
+########################
+#
+# Prefork Server
+# Loads the text generation once and answers `ndrwahltexte --client`
+# calls from forked worker processes behind a Unix socket
+# -> l.sander.fm@ndr.de
+#
+#########################
+
+import io
+import os
+import signal
+import socket
+import stat
+import sys
+import traceback
+from . import templates
+from .client import encode_response, is_own_socket, private_directory, socket_path
+from .ndrwahltexte import main
+
+# Pending connections the socket queues while all workers are busy
+BACKLOG = 128
+
+
+def run_main(data: bytes, encoding: str = 'utf-8', errors: str = 'strict', argv=()):
+    """
+    Runs main() on a stdin document like the command line does.
+
+    Args:
+        data: Bytes the command would read from stdin
+        encoding: Encoding of stdin on the calling side
+        errors: Error handler of stdin on the calling side
+        argv: Command line arguments
+
+    Returns:
+        tuple: (exit code, stdout, stderr) as the interpreter would end the command
+    """
+    saved = sys.stdin, sys.stdout, sys.stderr
+    sys.stdin = io.TextIOWrapper(io.BytesIO(data), encoding=encoding, errors=errors)
+    sys.stdout, sys.stderr = io.StringIO(), io.StringIO()
+    try:
+        main(list(argv))
+        code = 0
+    except SystemExit as e:
+        # Same exit codes as the interpreter: None is 0, other non-integers are printed and 1
+        if e.code is None or isinstance(e.code, int):
+            code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except Exception:
+        traceback.print_exc()
+        code = 1
+    finally:
+        stdout, stderr = sys.stdout.getvalue(), sys.stderr.getvalue()
+        sys.stdin, sys.stdout, sys.stderr = saved
+    return code, stdout, stderr
+
+
+def handle_connection(connection: socket.socket):
+    """Reads one request up to EOF and answers it."""
+    chunks = []
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    header, _, data = b''.join(chunks).partition(b'\n')
+    encoding, errors = header.decode('ascii').split(' ')
+    connection.sendall(encode_response(*run_main(data, encoding, errors)))
+
+
+def warm():
+    """Loads everything a call needs, so forked workers start warm and share it."""
+    templates.preload()
+    import simpleeval  # noqa: F401 - imported by the first evaluated condition otherwise
+    # Generate one text (and one error object) so lazily imported modules are loaded as well
+    run_main(b'{"wahl": {"wahlart": "Verh\\u00e4ltniswahl", "ergebnis": {"ergebnis_art": "Kein Ergebnis"}}}')
+    run_main(b'{')
+
+
+def _work(listener: socket.socket):
+    """Accepts and answers connections until the process is terminated."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    while True:
+        connection, _ = listener.accept()
+        with connection:
+            try:
+                handle_connection(connection)
+            except Exception:
+                # The client gets no complete answer and runs the call itself
+                pass
+
+
+def _fork(listener: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _work(listener)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def _is_served(path: str) -> bool:
+    """True if a server answers at path."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def _prepare_path(path: str):
+    """
+    Makes sure the server can safely bind path.
+
+    Creates a missing directory with mode 0700; the default directory in /tmp
+    must belong to the current user and not be accessible by others. An existing
+    file at path is only removed if it is a stale socket of the current user.
+
+    Raises:
+        RuntimeError: If path or its directory may be controlled by another user,
+            or another server answers at path
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700)
+    if directory == private_directory():
+        st = os.lstat(directory)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+            raise RuntimeError(f'{directory} must be a directory of the current user with mode 0700')
+    if os.path.lexists(path):
+        if not is_own_socket(path):
+            raise RuntimeError(f'{path} exists and is not a socket of the current user')
+        if _is_served(path):
+            raise RuntimeError(f'a server is already running at {path}')
+        os.unlink(path)
+
+
+def serve_prefork(path: str = None, workers: int = None):
+    """
+    Runs the prefork server until interrupted (SIGINT or SIGTERM).
+
+    Templates, corrections and simpleeval are loaded once, then the given
+    number of worker processes is forked. They accept connections on a Unix
+    socket and answer each `ndrwahltexte --client` call by running main() on
+    its stdin. Workers that exit are replaced.
+
+    Args:
+        path: Socket path (default: client.socket_path(), i.e. NDRWAHLTEXTE_SOCKET,
+            XDG_RUNTIME_DIR or a private directory in /tmp)
+        workers: Number of worker processes (default: number of CPUs)
+
+    Raises:
+        RuntimeError: If the platform cannot fork, another server answers at path
+            or path is not safe to bind (see _prepare_path)
+    """
+    if not hasattr(os, 'fork') or not hasattr(socket, 'AF_UNIX'):
+        raise RuntimeError('prefork requires os.fork and Unix sockets')
+    path = path or socket_path()
+    workers = workers or os.cpu_count() or 1
+    _prepare_path(path)
+
+    warm()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    os.chmod(path, 0o600)
+    listener.listen(BACKLOG)
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, terminate)
+
+    children = set()
+    try:
+        for _ in range(workers):
+            children.add(_fork(listener))
+        print(f"ndrwahltexte: {workers} workers serving on {path} "
+              f"(export NDRWAHLTEXTE_SOCKET={path})", file=sys.stderr)
+        while True:
+            pid, _ = os.wait()
+            if pid in children:
+                children.discard(pid)
+                children.add(_fork(listener))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        listener.close()
+        if os.path.exists(path):
+            os.unlink(path)
@@ -6,10 +6,14 @@
 # -> l.sander.fm@ndr.de 
 # 
 #########################
-import random
+import operator
 import re
-from typing import Dict, List, Tuple
-from simpleeval import simple_eval
+import time
+from _thread import allocate_lock
+from bisect import bisect_left
+from functools import partial
+from string import Formatter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 #functions that are safe to be used in the conditions of templates
 SAFE_FUNCTIONS = {
@@ -24,6 +28,553 @@ SAFE_FUNCTIONS = {
         "float": float
     }
 
+def template_placeholders(text) -> List[str]:
+    """
+    Returns the names of all placeholders in a template text.
+
+    Args:
+        text (str or list of str): The sentence template(s).
+
+    Returns:
+        List[str]: Field names in order of appearance, without duplicates.
+    """
+    texts = text if isinstance(text, list) else [text]
+    names = []
+    for alternative in texts:
+        for _, field_name, _, _ in Formatter().parse(alternative):
+            if field_name and field_name not in names:
+                names.append(field_name)
+    return names
+
+
+def compile_conditions(templates: dict) -> Dict[str, Tuple[Tuple[str, Optional[object]], ...]]:
+    """
+    Precompiles the conditions of all templates.
+
+    Each template's condition list is extended (in the compiled copy only) with an
+    existence check for every placeholder in its text, and every condition is parsed
+    once into a syntax tree that can be evaluated repeatedly.
+
+    Args:
+        templates (dict): Dictionary of sentence templates keyed by name.
+
+    Returns:
+        dict: Template key -> tuple of (condition, parsed tree) pairs. The parsed tree
+        is None for conditions that cannot be parsed; they never match.
+    """
+    from simpleeval import SimpleEval
+
+    parser = SimpleEval()
+    compiled = {}
+    for key, template in templates.items():
+        conditions = list(template.get("conditions", []))
+        conditions += [name for name in template_placeholders(template.get("text", ""))
+                       if name not in conditions]
+        parsed = []
+        for cond in conditions:
+            try:
+                parsed.append((cond, parser.parse(cond)))
+            except Exception:
+                parsed.append((cond, None))
+        compiled[key] = tuple(parsed)
+    return compiled
+
+
+def compile_corrections(corrections: dict, template_keys: Iterable[str]) -> Dict[str, Tuple[Tuple[str, Callable[[str], str]], ...]]:
+    """
+    Precompiles the corrections into one ordered pipeline per template key.
+
+    Every pipeline only contains the corrections that apply to its template, in the
+    order of the corrections dict, with each pattern compiled once. A correction
+    may provide a "transform" function (str -> str) instead of a "replacement";
+    its key is then only used as a label.
+
+    Args:
+        corrections (dict): A dictionary of regex-based text corrections.
+        template_keys (Iterable[str]): Keys of the templates the corrections are used for.
+
+    Returns:
+        dict: Template key -> tuple of (pattern, correction function) pairs.
+    """
+    steps = [
+        (pattern, corr.get("applies_to", None),
+         corr["transform"] if "transform" in corr else partial(re.compile(pattern).sub, corr["replacement"]))
+        for pattern, corr in corrections.items()
+    ]
+    pipelines = {}
+    for key in template_keys:
+        pipelines[key] = tuple(
+            (pattern, correct) for pattern, applies_to, correct in steps
+            if not applies_to or key in applies_to
+        )
+    return pipelines
+
+
+def compile_topics(templates: dict) -> Dict[str, Tuple[str, ...]]:
+    """
+    Indexes the templates by topic.
+
+    Args:
+        templates (dict): Dictionary of sentence templates keyed by name.
+
+    Returns:
+        dict: Topic -> tuple of the keys of its templates, in template order.
+    """
+    topics = {}
+    for key, template in templates.items():
+        topics.setdefault(template.get("topic"), []).append(key)
+    return {topic: tuple(keys) for topic, keys in topics.items()}
+
+
+def compile_dependencies(conditions: dict) -> Dict[str, Tuple[str, ...]]:
+    """
+    Determines the variables every template depends on.
+
+    Args:
+        conditions (dict): Output of compile_conditions, which already contains an
+            existence check for every placeholder of the template texts.
+
+    Returns:
+        dict: Template key -> sorted tuple of the variable names used by the
+        template's conditions and placeholders.
+    """
+    import ast
+
+    dependencies = {}
+    for key, parsed in conditions.items():
+        names = set()
+        for cond, node in parsed:
+            if node is None:
+                continue
+            names.update(n.id for n in ast.walk(node) if isinstance(n, ast.Name))
+        dependencies[key] = tuple(sorted(names))
+    return dependencies
+
+
+class TemplateRenderer:
+    """
+    A template text pre-parsed into literal parts and fields.
+
+    Rendering gives the same result as text.format(**variables), but the format
+    string is parsed only once and only the referenced fields are looked up.
+    Texts with positional, attribute or index fields or nested format specs fall
+    back to str.format.
+
+    An optional formatter (value -> str) is applied to fields without format spec
+    or conversion, e.g. to write numbers in a locale-specific way.
+
+    Attributes:
+        text (str): The template text.
+        fields (List[str]): Names of the variables used by the text.
+    """
+
+    CONVERSIONS = {'s': str, 'r': repr, 'a': ascii}
+
+    def __init__(self, text: str, formatter: Callable[[object], str] = None):
+        self.text = text
+        self.formatter = formatter
+        self.parts = []
+        self.fields = []
+        for literal, field_name, format_spec, conversion in Formatter().parse(text):
+            if field_name is None:
+                self.parts.append((literal, None, '', None))
+                continue
+            if not field_name.isidentifier() or '{' in format_spec:
+                self.parts = None
+                break
+            self.parts.append((literal, field_name, format_spec, self.CONVERSIONS[conversion] if conversion else None))
+            if field_name not in self.fields:
+                self.fields.append(field_name)
+
+    def __call__(self, variables: dict) -> str:
+        """Fills in the variables."""
+        if self.parts is None:
+            return self.text.format(**variables)
+        formatter = self.formatter
+        out = []
+        for literal, field_name, format_spec, convert in self.parts:
+            out.append(literal)
+            if field_name is not None:
+                value = variables[field_name]
+                if convert is not None:
+                    value = convert(value)
+                elif formatter is not None and not format_spec:
+                    out.append(formatter(value))
+                    continue
+                out.append(format(value, format_spec))
+        return ''.join(out)
+
+
+def compile_renderers(templates: dict, formatter: Callable[[object], str] = None) -> Dict[str, Tuple[TemplateRenderer, ...]]:
+    """
+    Pre-parses the texts of all templates.
+
+    Args:
+        templates (dict): Dictionary of sentence templates keyed by name.
+        formatter (callable, optional): Formats values of fields without format spec.
+
+    Returns:
+        dict: Template key -> tuple of renderers, one per text alternative.
+    """
+    compiled = {}
+    for key, template in templates.items():
+        text = template.get("text", "")
+        texts = text if isinstance(text, list) else [text]
+        compiled[key] = tuple(TemplateRenderer(alternative, formatter) for alternative in texts)
+    return compiled
+
+
+# Largest number of feature vectors a decision table may distinguish
+MAX_DECISION_TABLE_SIZE = 4096
+
+# Values of a feature comparing two variables if one or both are None
+_BOTH_NONE = 'both None'
+_ONE_NONE = 'one None'
+
+# Value of a feature the decision table cannot decide for a set of variables
+_UNDECIDABLE = object()
+
+
+def _lookup(variables, name):
+    try:
+        return variables[name]
+    except Exception:
+        return _UNDECIDABLE
+
+
+def _is_number(value) -> bool:
+    return type(value) in (int, float) and value == value
+
+
+def _truthy(variables, name) -> bool:
+    """Same result as evaluating the condition `name` (missing or unusable values are not met)."""
+    try:
+        return bool(variables[name])
+    except Exception:
+        return False
+
+
+def _feature_value(feature, variables):
+    """
+    Computes the value of one feature of a decision table.
+
+    Features are (kind, variable names, constants):
+        - 'number': position of a number among the sorted constants, 2*i+1 if it
+          equals constants[i], 2*i if it lies below constants[i] (and above the
+          previous one); _ONE_NONE for None.
+        - 'equals': index of the string constant the variable equals, -1 for none.
+        - 'compare': sign of the difference of two numbers, _BOTH_NONE or _ONE_NONE.
+
+    Returns:
+        The feature value, _UNDECIDABLE for values the conditions cannot be
+        decided for from the feature (e.g. missing variables).
+    """
+    kind, names, constants = feature
+    value = _lookup(variables, names[0])
+    if kind == 'number':
+        if value is None:
+            return _ONE_NONE
+        if not _is_number(value):
+            return _UNDECIDABLE
+        i = bisect_left(constants, value)
+        return 2 * i + 1 if i < len(constants) and constants[i] == value else 2 * i
+    if kind == 'equals':
+        if value is None or _is_number(value) or type(value) is str:
+            return constants.index(value) if value in constants else -1
+        return _UNDECIDABLE
+    other = _lookup(variables, names[1])
+    if _is_number(value) and _is_number(other):
+        return (value > other) - (value < other)
+    if value is None and other is None:
+        return _BOTH_NONE
+    if (value is None and (other is None or _is_number(other) or type(other) is str)) or \
+            (other is None and (_is_number(value) or type(value) is str)):
+        return _ONE_NONE
+    return _UNDECIDABLE
+
+
+def _feature_domain(feature) -> list:
+    """Returns all values a feature can take except _UNDECIDABLE."""
+    kind, _, constants = feature
+    if kind == 'number':
+        return list(range(2 * len(constants) + 1)) + [_ONE_NONE]
+    if kind == 'equals':
+        return list(range(len(constants))) + [-1]
+    return [-1, 0, 1, _BOTH_NONE, _ONE_NONE]
+
+
+def _comparison_test(op, position: int) -> Callable[[object], bool]:
+    """Decides `variable op constant` from a 'number' feature (constant at position) or `a op b` from a 'compare' feature (position 0)."""
+    def test(value):
+        if value == _BOTH_NONE:
+            return op is operator.eq
+        if value == _ONE_NONE:
+            return op is operator.ne        # None == x is False, ordering None raises
+        return op((value > position) - (value < position), 0)
+    return test
+
+
+def _equality_test(op, index: int) -> Callable[[object], bool]:
+    """Decides `variable == constant` or `variable != constant` from an 'equals' feature."""
+    return lambda value: (value == index) is (op is operator.eq)
+
+
+def _decidable(node, functions: dict):
+    """
+    Classifies a parsed condition.
+
+    Returns:
+        ('truth', names, None, None) for a plain variable name,
+        (kind, names, constant, operator) for a comparison of a variable with a
+        number, a string (== and != only) or another variable, None for
+        conditions the decision table leaves to evaluation.
+    """
+    import ast
+    from simpleeval import MAX_STRING_LENGTH
+
+    operators = {ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt,
+                 ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge}
+    if isinstance(node, ast.Expr):
+        node = node.value
+    if isinstance(node, ast.Name) and node.id not in functions:
+        return 'truth', (node.id,), None, None
+    if not (isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in operators):
+        return None
+    left, right, op = node.left, node.comparators[0], operators[type(node.ops[0])]
+    if not isinstance(left, ast.Name) or left.id in functions:
+        return None
+    if isinstance(right, ast.Name) and right.id not in functions:
+        return 'compare', (left.id, right.id), None, op
+    if isinstance(right, ast.Constant):
+        if _is_number(right.value):
+            return 'number', (left.id,), right.value, op
+        if type(right.value) is str and len(right.value) <= MAX_STRING_LENGTH and op in (operator.eq, operator.ne):
+            return 'equals', (left.id,), right.value, op
+    return None
+
+
+class DecisionTable:
+    """
+    Selection of templates per feature vector (see compile_decision_table).
+
+    Every template is reduced to the values each feature may take for its
+    comparisons to hold. The selection per vector is computed on first use and
+    kept, so a recurring feature vector costs one dictionary lookup. Threads
+    can share a table: a selection computed twice concurrently is the same.
+
+    Attributes:
+        features (tuple): (kind, variable names, constants) per feature.
+        templates (dict): Topic -> ((key, allowed, names, residual), ...) in template
+            order; allowed is a tuple of (feature index, allowed values). A template
+            whose comparisons hold is selected if all variables in names are truthy
+            and all residual (condition, parsed tree) pairs are met.
+        decided (dict): Template key -> number of its conditions decided by the table.
+        table (dict): Feature vector -> {topic: {key: (names, residual)}}.
+        residual (tuple): Keys of templates with conditions that are evaluated at runtime.
+        unreachable (tuple): Keys of templates that no feature vector selects.
+    """
+
+    def __init__(self, features: tuple, templates: dict, decided: dict = None):
+        self.features = features
+        self.templates = templates
+        self.decided = decided or {}
+        self.table = {}
+        entries = [entry for topic_entries in templates.values() for entry in topic_entries]
+        self.residual = tuple(key for key, _, _, residual in entries if residual)
+        self.unreachable = tuple(key for key, allowed, _, _ in entries
+                                 if any(not values for _, values in allowed))
+
+    def overlapping(self, topics: Iterable[str]) -> List[Tuple[str, str, str]]:
+        """
+        Finds conditional templates that are selected together for some feature vector.
+
+        Only meaningful for topics of which a single template is meant to be
+        selected (e.g. a title); the sentences of other topics are combined.
+
+        Args:
+            topics: Topics to check.
+
+        Returns:
+            List[Tuple[str, str, str]]: (topic, key, key) per overlapping pair.
+        """
+        overlapping = []
+        for topic in topics:
+            conditional = [(key, dict(allowed)) for key, allowed, _, _ in self.templates.get(topic, ())
+                           if allowed and key not in self.unreachable]
+            for i, (key, allowed) in enumerate(conditional):
+                for other, other_allowed in conditional[i + 1:]:
+                    if all(allowed[feature] & other_allowed[feature]
+                           for feature in allowed.keys() & other_allowed.keys()):
+                        overlapping.append((topic, key, other))
+        return overlapping
+
+    def vector(self, variables: dict) -> Optional[tuple]:
+        """Returns the feature vector of variables, None if the table cannot decide for them."""
+        vector = tuple(_feature_value(feature, variables) for feature in self.features)
+        return None if _UNDECIDABLE in vector else vector
+
+    def select(self, vector: tuple, topic: str) -> dict:
+        """Returns key -> (names, residual) of the templates of a topic selected for a feature vector."""
+        selection = self.table.get(vector)
+        if selection is None:
+            selection = {
+                topic: {key: (names, residual) for key, allowed, names, residual in entries
+                        if all(vector[i] in values for i, values in allowed)}
+                for topic, entries in self.templates.items()
+            }
+            selection = self.table.setdefault(vector, selection)
+        return selection.get(topic, {})
+
+
+def compile_decision_table(templates: dict, conditions: dict = None, topics: dict = None) -> DecisionTable:
+    """
+    Compiles the conditions of all templates into a decision table.
+
+    Conditions that compare a variable with a number, a string or another variable
+    (e.g. `num_parties >= 2`, `gewinner_prozent == zweite_prozent`,
+    `gewinner_partei == 'Grüne'`) are decided from a few discrete features derived
+    from the compared constants. Plain variable names are checked directly; all
+    other conditions remain to be evaluated at runtime. If there are more than
+    MAX_DECISION_TABLE_SIZE feature vectors, the features with the most values are
+    left to evaluation as well.
+
+    Args:
+        templates (dict): Dictionary of sentence templates keyed by name.
+        conditions (dict, optional): Output of compile_conditions(templates).
+        topics (dict, optional): Output of compile_topics(templates).
+
+    Returns:
+        DecisionTable: The table and the analysis of the templates.
+    """
+    conditions = conditions if conditions is not None else compile_conditions(templates)
+    topics = topics if topics is not None else compile_topics(templates)
+
+    analyzed = {}
+    constants = {}
+    for key in templates:
+        analyzed[key] = [(cond, node, _decidable(node, SAFE_FUNCTIONS) if node is not None else None)
+                         for cond, node in conditions[key]]
+        for _, _, info in analyzed[key]:
+            if info is not None and info[0] != 'truth':
+                values = constants.setdefault((info[0], info[1]), set())
+                if info[2] is not None:
+                    values.add(info[2])
+    features = {name: (name[0], name[1], tuple(sorted(values))) for name, values in constants.items()}
+
+    def size():
+        total = 1
+        for feature in features.values():
+            total *= len(_feature_domain(feature))
+        return total
+
+    while features and size() > MAX_DECISION_TABLE_SIZE:
+        del features[max(features, key=lambda name: len(_feature_domain(features[name])))]
+    index = {name: i for i, name in enumerate(features)}
+
+    compiled = {}
+    for key, atoms in analyzed.items():
+        allowed, names, residual = {}, [], []
+        for cond, node, info in atoms:
+            if info is not None and info[0] == 'truth':
+                names.append(info[1][0])
+            elif info is not None and (info[0], info[1]) in index:
+                kind, variables, constant, op = info
+                feature = features[(kind, variables)]
+                if kind == 'equals':
+                    test = _equality_test(op, feature[2].index(constant))
+                else:
+                    test = _comparison_test(op, 2 * feature[2].index(constant) + 1 if kind == 'number' else 0)
+                i = index[(kind, variables)]
+                values = allowed.get(i, frozenset(_feature_domain(feature)))
+                allowed[i] = frozenset(value for value in values if test(value))
+            else:
+                residual.append((cond, node))
+        compiled[key] = (key, tuple(sorted(allowed.items())), tuple(names), tuple(residual))
+
+    return DecisionTable(
+        features=tuple(features.values()),
+        templates={topic: tuple(compiled[key] for key in keys) for topic, keys in topics.items()},
+        decided={key: len(atoms) - len(compiled[key][3]) for key, atoms in analyzed.items()},
+    )
+
+
+class Instrumentation:
+    """
+    Collects timings and counts of TemplateEngine runs.
+
+    Pass an instance as `instrument` to one or many engines; engines without one
+    skip all measurements. Times are summed in seconds. Engines in several
+    threads can share one instance.
+
+    Sections of as_dict():
+        stages: calls and seconds per engine method (select_templates, ...)
+        conditions: evaluations, matches and seconds per template key
+        renders: renders and seconds per template key
+        corrections: calls, hits (sentence changed) and seconds per correction
+        counters: named event counts
+    """
+
+    FIELDS = {
+        'stages': ('calls', 'seconds'),
+        'conditions': ('evaluations', 'matches', 'seconds'),
+        'renders': ('renders', 'seconds'),
+        'corrections': ('calls', 'hits', 'seconds'),
+        'counters': ('count',),
+    }
+
+    def __init__(self):
+        self._data = {section: {} for section in self.FIELDS}
+        self._lock = allocate_lock()
+
+    def _add(self, section: str, name: str, values: tuple):
+        with self._lock:
+            entry = self._data[section].get(name)
+            if entry is None:
+                entry = self._data[section][name] = [0] * len(values)
+            for index, value in enumerate(values):
+                entry[index] += value
+
+    def stage(self, name: str, seconds: float):
+        """Records one run of a stage."""
+        self._add('stages', name, (1, seconds))
+
+    def condition(self, key: str, seconds: float, matched: bool):
+        """Records the evaluation of a template's conditions."""
+        self._add('conditions', key, (1, int(matched), seconds))
+
+    def render(self, key: str, seconds: float):
+        """Records the rendering of a template."""
+        self._add('renders', key, (1, seconds))
+
+    def correction(self, label: str, seconds: float, hit: bool):
+        """Records one application of a correction."""
+        self._add('corrections', label, (1, int(hit), seconds))
+
+    def count(self, name: str, n: int = 1):
+        """Increments a named counter."""
+        self._add('counters', name, (n,))
+
+    def as_dict(self) -> dict:
+        """Returns all measurements as {section: {name: {field: value}}}."""
+        with self._lock:
+            return {
+                section: {name: dict(zip(self.FIELDS[section], values)) for name, values in entries.items()}
+                for section, entries in self._data.items()
+            }
+
+    def merge(self, data: dict):
+        """Adds the measurements of another instance, given as its as_dict()."""
+        for section, entries in data.items():
+            fields = self.FIELDS[section]
+            for name, values in entries.items():
+                self._add(section, name, tuple(values[field] for field in fields))
+
+    def reset(self):
+        """Drops all measurements."""
+        with self._lock:
+            self._data = {section: {} for section in self.FIELDS}
+
+
 class TemplateEngine:
     """
     TemplateEngine is a rule-based system for generating natural language text 
@@ -32,15 +583,33 @@ class TemplateEngine:
     Templates can be filtered by topic or specific keys and include conditional logic 
     that determines whether they should be included based on the current variables.
 
+    An engine holds the state of one text (its variables, memoized conditions,
+    the article) and is used by one thread. Templates and the compiled
+    configuration (conditions, pipelines, renderers, dependencies, topics,
+    decision table) are only read, so engines in several threads can share
+    them; create one engine per text.
+
     Attributes:
         templates (dict): Dictionary of sentence templates keyed by name.
         variables (dict): Dictionary of dynamic values to be substituted into templates.
         corrections (dict): Optional dictionary of text correction patterns (regex-based).
+        conditions (dict): Precompiled conditions per template key (see compile_conditions).
+        pipelines (dict): Precompiled corrections per template key (see compile_corrections).
+        renderers (dict): Pre-parsed template texts per template key (see compile_renderers).
+        dependencies (dict): Variable names per template key (see compile_dependencies).
+        topics (dict): Template keys per topic (see compile_topics).
+        decision_table (DecisionTable): Selects the templates of a topic without evaluating
+            their conditions (see compile_decision_table), None to evaluate them all.
+        seed (str): Seed for choosing between text alternatives, None for the global random state.
+        instrument (Instrumentation): Receives timings and counts, None to measure nothing.
         article (dict): Generated text stored by section name.
     """
     
     
-    def __init__(self, templates: dict, variables: dict, corrections: dict = None):
+    def __init__(self, templates: dict, variables: dict, corrections: dict = None, conditions: dict = None,
+                 pipelines: dict = None, renderers: dict = None, seed: str = None, dependencies: dict = None,
+                 instrument: Instrumentation = None, topics: dict = None,
+                 decision_table: DecisionTable = None):
         """
         Initializes the TemplateEngine.
 
@@ -51,36 +620,213 @@ class TemplateEngine:
                 - 'conditions' (list of str, optional): Boolean expressions using `variables`.
             variables (dict): A dictionary of values used to format the templates.
             corrections (dict, optional): A dictionary of regex-based text corrections.
+            conditions (dict, optional): Output of compile_conditions(templates). Pass it
+                when the same templates are used for many engines; otherwise the
+                conditions are compiled for this engine.
+            pipelines (dict, optional): Output of compile_corrections(corrections, templates),
+                likewise compiled for this engine if omitted.
+            renderers (dict, optional): Output of compile_renderers(templates),
+                likewise compiled for this engine if omitted.
+            seed (str, optional): If given, the alternative of a list-valued text is
+                chosen deterministically from seed, template key and the values of
+                the variables the template depends on.
+            dependencies (dict, optional): Output of compile_dependencies(conditions),
+                likewise compiled for this engine if omitted.
+            instrument (Instrumentation, optional): Records timings per stage, template
+                and correction. Without it nothing is measured.
+            topics (dict, optional): Output of compile_topics(templates), likewise
+                compiled for this engine if omitted.
+            decision_table (DecisionTable, optional): Output of compile_decision_table(templates).
+                If given, templates are selected by topic with a table lookup wherever
+                the table can decide for the variables; otherwise all conditions are
+                evaluated.
+
+        The result of every condition is memoized per engine, so conditions shared
+        by several templates are evaluated once. Create a new engine for new or
+        changed variables.
         """
         self.templates = templates                  # Sentence templates
         self.variables = variables                  # Variables to fill in
         self.corrections = corrections or {}        # Grammar/style corrections
+        self.conditions = conditions if conditions is not None else compile_conditions(templates)
+        self.pipelines = pipelines if pipelines is not None else compile_corrections(self.corrections, templates)
+        self.renderers = renderers if renderers is not None else compile_renderers(templates)
+        self.dependencies = dependencies if dependencies is not None else compile_dependencies(self.conditions)
+        self.topics = topics if topics is not None else compile_topics(templates)
+        self.decision_table = decision_table
+        self.seed = seed
+        self.instrument = instrument
         self.article = {}                           # Full generated article
+        self._evaluator = None                      # Created on the first condition that is evaluated
+        self._memo = {}                             # Condition -> result for these variables
+        self._vector = _UNDECIDABLE                 # Feature vector of the decision table, computed on first use
+
+    def dependency_values(self, key: str, template: dict = None) -> tuple:
+        """
+        Returns the current values of the variables a template depends on.
+
+        Values are paired with their type, so e.g. 1 and 1.0 (which are equal but
+        render differently) count as different values.
+
+        Args:
+            key (str): Template key.
+            template (dict, optional): The template, if it is not self.templates[key].
+
+        Returns:
+            tuple: ((type, value), ...) in the order of the template's dependencies.
+        """
+        if template is None:
+            template = self.templates[key]
+        names = self.dependencies.get(key) if self.templates.get(key) is template else None
+        if names is None:
+            names = compile_dependencies(compile_conditions({key: template}))[key]
+        get = self.variables.get
+        return tuple((type(value), value) for value in map(get, names))
 
     def check_conditions(self, conditions: List[str], template_text: str = None) -> bool:
         """
         Evaluates all given condition strings using current variables.
+        Every placeholder in template_text must exist and be truthy as well.
 
         Args:
             conditions (List[str]): A list of boolean expressions as strings.
+            template_text (str or list of str, optional): The template whose
+                placeholders are checked in addition to the conditions.
 
         Returns:
             bool: True if all conditions are met or if the list is empty.
             This means that sentences that are to always be used can be templated
             without a condition
         """
-        #print(template_text)
-        matches = re.findall(r'\{([^}]+)\}', template_text)
-        #print(matches)
-        conditions.extend(matches)
+        template = {"conditions": conditions, "text": template_text or ""}
+        return self._evaluate(compile_conditions({None: template})[None])
+
+    def check_template(self, key: str) -> bool:
+        """
+        Evaluates the precompiled conditions of a template using current variables.
+
+        Args:
+            key (str): Template key.
+
+        Returns:
+            bool: True if all conditions of the template are met.
+        """
+        conditions = self.conditions.get(key)
+        if conditions is None:
+            template = self.templates[key]
+            conditions = compile_conditions({key: template})[key]
+        if self.instrument is None:
+            return self._evaluate(conditions)
+        start = time.perf_counter()
+        matched = self._evaluate(conditions)
+        self.instrument.condition(key, time.perf_counter() - start, matched)
+        return matched
 
-        if not conditions:
-            return True
+    def _evaluate(self, conditions) -> bool:
+        """Evaluates (condition, parsed tree) pairs, reusing memoized results of identical conditions."""
+        memo = self._memo
+        for cond, node in conditions:
+            result = memo.get(cond)
+            if result is None:
+                result = memo[cond] = self._evaluate_condition(cond, node)
+                if self.instrument is not None:
+                    self.instrument.count('condition_evaluations')
+            elif self.instrument is not None:
+                self.instrument.count('condition_evaluations_saved')
+            if not result:
+                return False
+        return True
+
+    def _evaluate_condition(self, cond: str, node) -> bool:
+        """Evaluates one condition; conditions that cannot be parsed or evaluated are not met."""
+        if node is None:
+            return False
+        if self._evaluator is None:
+            from simpleeval import SimpleEval
+            self._evaluator = SimpleEval(names=self.variables, functions=SAFE_FUNCTIONS)
         try:
-            return all(simple_eval(cond, names=self.variables, functions=SAFE_FUNCTIONS) for cond in conditions)
+            return bool(self._evaluator.eval(cond, previously_parsed=node))
         except Exception:
             return False
 
+    def decide_topic(self, filter_topic: str) -> Optional[List[str]]:
+        """
+        Selects the templates of a topic with the decision table.
+
+        Args:
+            filter_topic (str): Topic.
+
+        Returns:
+            List[str]: Keys of the selected templates in template order, None if there
+            is no decision table or it cannot decide for the variables.
+        """
+        selection = self._table_selection(filter_topic)
+        if selection is None:
+            return None
+        if self.instrument is not None:
+            return [key for key in self.topic_keys(filter_topic) if self._check_selected(key, selection)]
+        variables = self.variables
+        return [key for key, (names, residual) in selection.items()
+                if all(_truthy(variables, name) for name in names) and (not residual or self._evaluate(residual))]
+
+    def _table_selection(self, filter_topic: str) -> Optional[dict]:
+        """Returns key -> (names, residual) of the templates the decision table selects, None if it cannot decide."""
+        table = self.decision_table
+        if table is None or not filter_topic or not isinstance(filter_topic, str):
+            return None
+        if self.instrument is None:
+            if self._vector is _UNDECIDABLE:
+                self._vector = table.vector(self.variables)
+            return table.select(self._vector, filter_topic) if self._vector is not None else None
+        start = time.perf_counter()
+        if self._vector is _UNDECIDABLE:
+            self._vector = table.vector(self.variables)
+        if self._vector is None:
+            self.instrument.count('decision_table_fallbacks')
+            return None
+        selection = table.select(self._vector, filter_topic)
+        self.instrument.stage('decision_table_lookup', time.perf_counter() - start)
+        self.instrument.count('decision_table_lookups')
+        return selection
+
+    def _check_selected(self, key: str, selection: dict) -> bool:
+        """
+        Same as check_template(key) for a template of a topic the decision table selected from.
+
+        Only the plain variable names and residual conditions of a selected template
+        are checked; the conditions the table decided count as saved evaluations.
+        """
+        if self.instrument is None:
+            entry = selection.get(key)
+            return entry is not None and all(_truthy(self.variables, name) for name in entry[0]) \
+                and (not entry[1] or self._evaluate(entry[1]))
+        start = time.perf_counter()
+        entry = selection.get(key)
+        matched = entry is not None and all(_truthy(self.variables, name) for name in entry[0]) \
+            and (not entry[1] or self._evaluate(entry[1]))
+        self.instrument.condition(key, time.perf_counter() - start, matched)
+        saved = self.decision_table.decided.get(key, 0)
+        if saved:
+            self.instrument.count('condition_evaluations_saved', saved)
+        return matched
+
+    def topic_keys(self, filter_topic: str = None) -> Iterable[str]:
+        """
+        Returns the keys of the templates of a topic, in template order.
+
+        Args:
+            filter_topic (str, optional): Topic; all templates if empty.
+
+        Returns:
+            Iterable[str]: Template keys.
+        """
+        if not filter_topic:
+            return self.templates.keys()
+        keys = self.topics.get(filter_topic) if isinstance(filter_topic, str) else None
+        if keys is None:
+            keys = [key for key, template in self.templates.items() if template.get("topic") == filter_topic]
+        return keys
+
     def select_templates(self, filter_topic=None) -> List[Tuple[str, dict]]:
         """
         Selects templates either by a topic string or a list of template keys.
@@ -93,23 +839,28 @@ class TemplateEngine:
         Returns:
             List[Tuple[str, dict]]: A list of (template_key, template_dict) tuples.
         """
+        start = time.perf_counter() if self.instrument is not None else None
         selected = []
 
         # Case 1: A list of template keys (names)
         if isinstance(filter_topic, list):
             for key in filter_topic:
                 template = self.templates.get(key)
-                if template and self.check_conditions(template.get("conditions", []), template.get("text", "")):
+                if template and self.check_template(key):
                     selected.append((key, template))
 
         # Case 2: A single topic string
         else:
-            for key, template in self.templates.items():
-                if filter_topic and template.get("topic") != filter_topic:
-                    continue
-                if self.check_conditions(template.get("conditions", []), template.get("text", "")):
-                    selected.append((key, template))
+            decided = self.decide_topic(filter_topic)
+            if decided is not None:
+                selected = [(key, self.templates[key]) for key in decided]
+            else:
+                for key in self.topic_keys(filter_topic):
+                    if self.check_template(key):
+                        selected.append((key, self.templates[key]))
 
+        if start is not None:
+            self.instrument.stage('select_templates', time.perf_counter() - start)
         return selected
 
     def generate_text(self, selected_templates: List[Tuple[str, dict]] = None) -> List[Tuple[str, str]]:
@@ -125,17 +876,56 @@ class TemplateEngine:
         """
         if selected_templates is None:
             selected_templates = self.select_templates()
+        start = time.perf_counter() if self.instrument is not None else None
         sentences = []
         for key, template in selected_templates:
-            text_options = template["text"]
-            if isinstance(text_options, list):
-                template_text = random.choice(text_options)
+            if self.templates.get(key) is template:
+                renderers = self.renderers[key]
             else:
-                template_text = text_options
-            sentence = template_text.format(**self.variables)
-            sentences.append((key, sentence))
+                renderers = compile_renderers({key: template})[key]
+            sentences.append((key, self._render(key, template, renderers)))
+        if start is not None:
+            self.instrument.stage('generate_text', time.perf_counter() - start)
         return sentences
 
+    def _render(self, key: str, template: dict, renderers) -> str:
+        """Renders a template, choosing between its text alternatives if it has several."""
+        render = self._choose(key, template, renderers)
+        if self.instrument is None:
+            return render(self.variables)
+        start = time.perf_counter()
+        sentence = render(self.variables)
+        self.instrument.render(key, time.perf_counter() - start)
+        return sentence
+
+    def _choose(self, key: str, template: dict, renderers) -> TemplateRenderer:
+        """Picks the renderer of one text alternative (seeded, see __init__)."""
+        if not isinstance(template["text"], list):
+            return renderers[0]
+        import random
+
+        if self.seed is None:
+            return random.choice(renderers)
+        values = [value for _, value in self.dependency_values(key, template)]
+        return random.Random(f"{self.seed}:{key}:{values!r}").choice(renderers)
+
+    def _correct(self, key: str, sentence: str) -> str:
+        """Applies the correction pipeline of a template to one sentence."""
+        pipeline = self.pipelines.get(key)
+        if pipeline is None:
+            pipeline = compile_corrections(self.corrections, [key])[key]
+        if self.instrument is None:
+            for _, correct in pipeline:
+                sentence = correct(sentence)
+            return sentence
+        clock = time.perf_counter
+        for label, correct in pipeline:
+            start = clock()
+            corrected = correct(sentence)
+            self.instrument.correction(label, clock() - start, corrected != sentence)
+            sentence = corrected
+        return sentence
+
     def text_corrections(self, sentences: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
         """
         Applies regex-based corrections to generated sentences.
@@ -146,15 +936,11 @@ class TemplateEngine:
         Returns:
             List[Tuple[str, str]]: Corrected sentences.
         """
-        corrected_sentences = []
-        for key, sentence in sentences:
-            for pattern, corr in self.corrections.items():
-                applies_to = corr.get("applies_to", None)
-                if applies_to and key not in applies_to:
-                    continue
-                sentence = re.sub(pattern, corr["replacement"], sentence)
-            corrected_sentences.append((key, sentence))
-        return corrected_sentences
+        start = time.perf_counter() if self.instrument is not None else None
+        corrected = [(key, self._correct(key, sentence)) for key, sentence in sentences]
+        if start is not None:
+            self.instrument.stage('text_corrections', time.perf_counter() - start)
+        return corrected
 
     def build_text(self, selected_templates: List[Tuple[str, dict]] = None) -> List[str]:
         """
@@ -172,6 +958,66 @@ class TemplateEngine:
         corrected = self.text_corrections(generated)
         return " ".join([sentence for _, sentence in corrected])
 
+    def build_text_incremental(self, filter_topic: str = None, previous: dict = None) -> Tuple[str, dict]:
+        """
+        Same as build_text(select_templates(filter_topic)), reusing a previous result.
+
+        Templates whose dependencies (see dependency_values) have the same values as
+        in the previous run are neither re-evaluated nor re-rendered nor corrected
+        again; their previous outcome is reused. All other templates are processed
+        as usual, so the text is identical to a full rebuild.
+
+        Args:
+            filter_topic (str, optional): Topic of the templates to use, all templates if None.
+            previous (dict, optional): Sentences returned by an earlier call for the
+                same templates and topic (e.g. the previous snapshot of an election).
+
+        Returns:
+            Tuple[str, dict]: The text and its sentences, template key ->
+            (dependency values, corrected sentence or None if not selected).
+        """
+        instrument = self.instrument
+        start = time.perf_counter() if instrument is not None else None
+        previous = previous or {}
+        sentences = {}
+        reused = 0
+        selecting = rendering = correcting = 0.0
+        selection = self._table_selection(filter_topic)
+        for key in self.topic_keys(filter_topic):
+            template = self.templates[key]
+            values = self.dependency_values(key)
+            cached = previous.get(key)
+            if cached is not None and cached[0] == values:
+                sentences[key] = cached
+                reused += 1
+                continue
+            sentence = None
+            if instrument is None:
+                if self._check_selected(key, selection) if selection is not None else self.check_template(key):
+                    sentence = self._correct(key, self._render(key, template, self.renderers[key]))
+            else:
+                # Same steps, timed as the stages of build_text(select_templates(filter_topic))
+                checked = time.perf_counter()
+                matched = self._check_selected(key, selection) if selection is not None else self.check_template(key)
+                rendered = time.perf_counter()
+                selecting += rendered - checked
+                if matched:
+                    sentence = self._render(key, template, self.renderers[key])
+                    corrected = time.perf_counter()
+                    rendering += corrected - rendered
+                    sentence = self._correct(key, sentence)
+                    correcting += time.perf_counter() - corrected
+            sentences[key] = (values, sentence)
+        text = " ".join(sentence for _, sentence in sentences.values() if sentence is not None)
+        if start is not None:
+            instrument.stage('select_templates', selecting)
+            instrument.stage('generate_text', rendering)
+            instrument.stage('text_corrections', correcting)
+            instrument.stage('build_text_incremental', time.perf_counter() - start)
+            self.instrument.count('templates_reused', reused)
+            self.instrument.count('templates_rebuilt', len(sentences) - reused)
+        return text, sentences
+
     def build_article(self, sections_dict: Dict[str, List[Tuple[str, dict]]]) -> Dict[str, List[str]]:
         """
         Builds a structured article composed of multiple sections.
@@ -0,0 +1,269 @@
+########################
+#
+# HTTP Server
+# Persistent server mode that keeps templates, corrections and pandas warm
+# -> l.sander.fm@ndr.de
+#
+#########################
+
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from . import metrics
+from .ndrwahltexte import generate
+from .templates import cache_info, reload
+from .text_generator import OUTPUT_CACHE, SENTENCE_CACHE
+from .utils import error_object, validation_error_object
+
+
+class LatencyStats:
+    """
+    Collects per-request latencies of the server.
+
+    Attributes:
+        count (int): Number of handled requests.
+        errors (int): Number of requests that produced an error object.
+        total (float): Summed processing time in seconds.
+        max (float): Slowest processing time in seconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, error: bool = False):
+        """Records the processing time of one request."""
+        with self._lock:
+            self.count += 1
+            self.errors += int(error)
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict:
+        """Returns the statistics in milliseconds."""
+        with self._lock:
+            return {
+                'requests': self.count,
+                'errors': self.errors,
+                'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+                'max_ms': round(self.max * 1000, 3),
+            }
+
+
+def handle_payload(body: bytes, store=None):
+    """
+    Generates the election text for a raw request body.
+
+    Args:
+        body: JSON document in the same format the CLI reads from stdin
+        store: ResultStore that receives the generated text (see store.ResultStore)
+
+    Returns:
+        tuple: (HTTP status, response object) - the response object is either
+        the generated text or an error object as written by the CLI to stderr
+    """
+    try:
+        raw_data = json.loads(body)
+    except Exception as e:
+        return 400, error_object(e)
+
+    try:
+        output = generate(raw_data)
+    except Exception as e:
+        return 422, error_object(e)
+
+    if 'error' in output:
+        return 422, validation_error_object(output['error'])
+
+    if store is not None:
+        store.put_payload(raw_data, output, body)
+    return 200, output
+
+
+class WahltextHandler(BaseHTTPRequestHandler):
+    """
+    Request handler of the server.
+
+    POST /       accepts a {"wahl": ...} payload and returns Titel/Absatz1 as JSON
+    POST /reload re-imports templates and corrections and drops cached configurations
+    GET /stats   returns the latency and cache statistics of the server
+    GET /changes?since=T returns the texts in the result store (--sqlite) whose
+                 text changed after the Unix timestamp T, oldest first, and
+                 the cursor of the next poll as "until": {"since": T, "after": id}
+    GET /metrics returns the statistics and, if enabled, the timings per stage,
+                 template and correction in the Prometheus text format
+    """
+
+    server_version = 'ndrwahltexte'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+
+        if self.path.rstrip('/') == '/reload':
+            reload()
+            self._send_json(200, cache_info())
+            return
+
+        start = time.perf_counter()
+        status, response = handle_payload(body, self.server.store)
+        elapsed = time.perf_counter() - start
+
+        self.server.stats.add(elapsed, error=status != 200)
+        self._send_json(status, response, elapsed)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            stats = self.server.stats.as_dict()
+            stats['config_cache'] = cache_info()
+            stats['output_cache'] = OUTPUT_CACHE.stats()
+            stats['sentence_cache'] = SENTENCE_CACHE.stats()
+            instrument = metrics.current()
+            if instrument is not None:
+                stats['instrumentation'] = instrument.as_dict()
+            if self.server.store is not None:
+                stats['result_store'] = self.server.store.stats()
+            self._send_json(200, stats)
+        elif urlsplit(self.path).path.rstrip('/') == '/changes':
+            self._send_changes()
+        elif self.path.rstrip('/') == '/metrics':
+            self._send_metrics()
+        else:
+            self._send_json(404, {'error': {'type': 'NotFound', 'message': self.path, 'traceback': ''}})
+
+    def _send_changes(self):
+        store = self.server.store
+        if store is None:
+            self._send_json(404, {'error': {'type': 'NotFound', 'message': 'no result store (--sqlite)',
+                                            'traceback': ''}})
+            return
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            since = float(query.get('since', ['0'])[0])
+            limit = int(query['limit'][0]) if 'limit' in query else None
+        except ValueError as e:
+            self._send_json(400, error_object(e))
+            return
+        after = query['after'][0] if 'after' in query else None
+        changes = store.changed_since(since, limit, after)
+        if changes:
+            until = {'since': changes[-1]['updated_at'], 'after': changes[-1]['id']}
+        else:
+            until = {'since': since, 'after': after}
+        self._send_json(200, {'changes': changes, 'until': until})
+
+    def _send_metrics(self):
+        stats = self.server.stats
+        output_cache = OUTPUT_CACHE.stats()
+        sentence_cache = SENTENCE_CACHE.stats()
+        extra = [
+            ('requests_total', 'counter', 'Handled requests', stats.count),
+            ('request_errors_total', 'counter', 'Requests that produced an error object', stats.errors),
+            ('request_seconds_total', 'counter', 'Summed processing time of all requests', stats.total),
+            ('request_seconds_max', 'gauge', 'Slowest processing time of a request', stats.max),
+            ('output_cache_hits_total', 'counter', 'Requests answered from the output cache', output_cache['hits']),
+            ('output_cache_size', 'gauge', 'Entries in the output cache', output_cache['size']),
+            ('sentence_cache_hits_total', 'counter', 'Snapshots reused from the sentence cache',
+             sentence_cache['hits']),
+            ('sentence_cache_size', 'gauge', 'Elections in the sentence cache', sentence_cache['size']),
+        ]
+        instrument = metrics.current()
+        data = instrument.as_dict() if instrument is not None else {}
+        body = metrics.to_prometheus(data, extra=extra).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, obj: dict, elapsed: float = None):
+        data = json.dumps(obj, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if elapsed is not None:
+            self.send_header('Server-Timing', f'generate;dur={elapsed * 1000:.3f}')
+        self.end_headers()
+        self.wfile.write(data)
+        if elapsed is not None:
+            self.log_message('%s %d %.3fms', self.path, status, elapsed * 1000)
+
+    def log_request(self, code='-', size='-'):
+        # Requests are logged together with their latency in _send_json
+        pass
+
+
+class WahltextServer(HTTPServer):
+    """
+    HTTPServer that keeps latency statistics across requests and optionally stores the texts.
+
+    With threads > 1, requests are handled on a pool of that many threads, which
+    share the cached configurations and texts. On a free-threaded CPython
+    (3.13t and later) they generate texts on several cores in parallel, without
+    the pickling of a process pool; with the GIL, threads only help while
+    requests wait for the network or the result store.
+    """
+
+    def __init__(self, server_address, handler_class=WahltextHandler, store=None, threads: int = 1):
+        super().__init__(server_address, handler_class)
+        self.stats = LatencyStats()
+        self.store = store
+        self.threads = threads
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wahltext') if threads > 1 else None
+
+    def process_request(self, request, client_address):
+        if self._executor is None:
+            super().process_request(request, client_address)
+        else:
+            self._executor.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        # Same as socketserver.ThreadingMixIn.process_request_thread
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def service_actions(self):
+        # Called between requests: write texts still collected by the result store
+        if self.store is not None:
+            self.store.flush()
+
+    def server_close(self):
+        super().server_close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+def serve(host: str = '127.0.0.1', port: int = 8080, store=None, threads: int = 1):
+    """
+    Runs the server until interrupted.
+
+    Templates and corrections are loaded on the first request for each
+    (wahlart, ergebnis_art) and stay cached for the lifetime of the process.
+
+    Args:
+        host: Address to bind to
+        port: Port to bind to
+        store: ResultStore that receives every generated text (see store.ResultStore)
+        threads: Number of requests handled at the same time (see WahltextServer)
+    """
+    server = WahltextServer((host, port), store=store, threads=threads)
+    print(f"ndrwahltexte: serving on http://{host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if store is not None:
+            store.close()
@@ -0,0 +1,358 @@
+########################
+#
+# Spool Queue
+# Distributes text generation across nodes through a shared directory
+# -> l.sander.fm@ndr.de
+#
+#########################
+
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from . import templates
+from .ndrwahltexte import process_line
+from .watch import write_atomic
+
+# Subdirectories of a spool directory
+PENDING = 'pending'     # work items waiting for a worker
+CLAIMED = 'claimed'     # work items being processed, renamed to <item>@<worker>
+DONE = 'done'           # work items whose results are written
+RESULTS = 'results'     # one NDJSON result file per work item (same name)
+FAILED = 'failed'       # work items that could not be processed, with <item>.error
+NODES = 'nodes'         # throughput of every worker process, <worker>.json
+DIRECTORIES = (PENDING, CLAIMED, DONE, RESULTS, FAILED, NODES)
+
+# Separates item and worker in the names of claimed items
+CLAIM_SEPARATOR = '@'
+
+
+def _items(directory: str) -> list:
+    """Returns the sorted names of the work items in directory (temporary files start with a dot)."""
+    try:
+        return sorted(name for name in os.listdir(directory) if not name.startswith('.'))
+    except FileNotFoundError:
+        return []
+
+
+def _in_job(name: str, job: str) -> bool:
+    """True if the work item name (or claim or result name) belongs to job."""
+    return job is None or name.partition(CLAIM_SEPARATOR)[0].rsplit('-', 1)[0] == job
+
+
+def init_spool(spool_dir: str):
+    """Creates the subdirectories of a spool directory."""
+    for name in DIRECTORIES:
+        os.makedirs(os.path.join(spool_dir, name), exist_ok=True)
+
+
+def submit(infile, spool_dir: str, size: int = 100, job: str = None) -> int:
+    """
+    Splits an NDJSON stream into work items in the pending directory.
+
+    Every item holds `size` consecutive input lines and is named after the job
+    and the number of its first line, e.g. 20240609-180000-0000000101.ndjson,
+    so results keep the line numbers of the input. Items are written to a
+    temporary file and renamed, so workers never claim partial items.
+
+    Args:
+        infile: Text stream with one election object per line
+        spool_dir: Spool directory (created if missing)
+        size: Number of lines per work item
+        job: Name prefix of the items (default: the current time)
+
+    Returns:
+        int: Number of work items written
+
+    Raises:
+        ValueError: If size is less than 1 or job contains the claim separator
+    """
+    if size < 1:
+        raise ValueError('size must be at least 1')
+    job = job or time.strftime('%Y%m%d-%H%M%S')
+    if CLAIM_SEPARATOR in job or os.sep in job:
+        raise ValueError(f"Invalid job name: {job}")
+    init_spool(spool_dir)
+    items = 0
+    first_line = 1
+    while True:
+        lines = list(islice(infile, size))
+        if not lines:
+            return items
+        text = ''.join(line if line.endswith('\n') else line + '\n' for line in lines)
+        write_atomic(os.path.join(spool_dir, PENDING, f'{job}-{first_line:010d}.ndjson'), text)
+        items += 1
+        first_line += len(lines)
+
+
+def requeue_stale(spool_dir: str, stale: float) -> int:
+    """
+    Moves claims back to pending that were not touched for `stale` seconds.
+
+    Workers touch their claim while they process it, so a stale claim belongs
+    to a crashed or disconnected worker. If that worker finishes the item after
+    all, the item is generated twice with identical results.
+
+    Returns:
+        int: Number of requeued items
+    """
+    requeued = 0
+    now = time.time()
+    for name in _items(os.path.join(spool_dir, CLAIMED)):
+        path = os.path.join(spool_dir, CLAIMED, name)
+        try:
+            if now - os.stat(path).st_mtime < stale:
+                continue
+            os.rename(path, os.path.join(spool_dir, PENDING, name.partition(CLAIM_SEPARATOR)[0]))
+        except FileNotFoundError:
+            # Finished or requeued by someone else in the meantime
+            continue
+        requeued += 1
+        print(f"ndrwahltexte: requeued stale claim {name}", file=sys.stderr)
+    return requeued
+
+
+class SpoolWorker:
+    """
+    Claims work items from a spool directory and writes their results.
+
+    An item is claimed by renaming it from pending/ to claimed/<item>@<worker>;
+    the rename is atomic on a shared filesystem, so exactly one worker gets
+    each item and no lock server is needed. Results are written to
+    results/<item>, then the item is moved to done/. Workers also requeue
+    stale claims (see requeue_stale), so the clocks of the nodes must roughly
+    agree. The throughput of the worker is kept in nodes/<worker>.json.
+
+    Attributes:
+        items (int): Number of work items processed.
+        elections (int): Number of elections processed.
+        errors (int): Number of results that contain an error object.
+        busy (float): Seconds spent processing work items.
+    """
+
+    def __init__(self, spool_dir: str, node: str = None, stale: float = 60.0, interval: float = 0.5):
+        """
+        Args:
+            spool_dir: Spool directory
+            node: Name of this node in the statistics (default: host name)
+            stale: Seconds after which an untouched claim is requeued
+            interval: Seconds to wait when no work item is pending
+        """
+        self.spool_dir = spool_dir
+        self.node = node or socket.gethostname()
+        self.worker = f'{self.node}.{os.getpid()}'
+        self.stale = stale
+        self.interval = interval
+        self.items = 0
+        self.elections = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.started = time.time()
+        self._claim = None
+
+    def _path(self, directory: str, name: str) -> str:
+        return os.path.join(self.spool_dir, directory, name)
+
+    def claim(self):
+        """Claims the first pending item another worker did not get first; returns its name or None."""
+        for name in _items(os.path.join(self.spool_dir, PENDING)):
+            claimed = self._path(CLAIMED, name + CLAIM_SEPARATOR + self.worker)
+            try:
+                # rename keeps the mtime, which has to be the start of the claim,
+                # or the claim could be requeued as stale right away
+                os.utime(self._path(PENDING, name))
+                os.rename(self._path(PENDING, name), claimed)
+            except FileNotFoundError:
+                continue
+            self._claim = claimed
+            return name
+        return None
+
+    def process(self, name: str):
+        """Generates the results of a claimed item and moves it to done/ (failed/ if that raised)."""
+        start = time.perf_counter()
+        first_line = int(name.rsplit('-', 1)[-1].split('.')[0])
+        heartbeat = self.stale / 3
+        touched = time.monotonic()
+        try:
+            with open(self._claim, encoding='utf-8') as f:
+                lines = f.readlines()
+            results = []
+            for offset, line in enumerate(lines):
+                if not line.strip():
+                    continue
+                result = process_line(line, first_line + offset)
+                self.errors += int('error' in result)
+                results.append(json.dumps(result) + '\n')
+                if time.monotonic() - touched > heartbeat:
+                    try:
+                        os.utime(self._claim)
+                    except FileNotFoundError:
+                        pass
+                    touched = time.monotonic()
+            write_atomic(self._path(RESULTS, name), ''.join(results))
+            destination = self._path(DONE, name)
+        except Exception as e:
+            print(f"ndrwahltexte: {name} failed: {e}", file=sys.stderr)
+            write_atomic(self._path(FAILED, name + '.error'), f'{type(e).__name__}: {e}\n')
+            destination = self._path(FAILED, name)
+            results = ()
+        try:
+            os.rename(self._claim, destination)
+        except FileNotFoundError:
+            # Requeued as stale meanwhile; the next worker writes the same results
+            pass
+        self._claim = None
+        self.items += 1
+        self.elections += len(results)
+        self.busy += time.perf_counter() - start
+        self.write_stats()
+
+    def release(self):
+        """Moves the current claim back to pending/ (used when the worker is interrupted)."""
+        if self._claim is None:
+            return
+        name = os.path.basename(self._claim).partition(CLAIM_SEPARATOR)[0]
+        try:
+            os.rename(self._claim, self._path(PENDING, name))
+        except FileNotFoundError:
+            pass
+        self._claim = None
+
+    def stats(self) -> dict:
+        """Returns the counters of this worker."""
+        return {'node': self.node, 'pid': os.getpid(), 'started': self.started, 'updated': time.time(),
+                'items': self.items, 'elections': self.elections, 'errors': self.errors, 'busy': self.busy}
+
+    def write_stats(self):
+        write_atomic(self._path(NODES, self.worker + '.json'), json.dumps(self.stats()))
+
+    def run(self, once: bool = False) -> dict:
+        """
+        Processes work items until interrupted.
+
+        Args:
+            once: Stop as soon as no item is pending or claimed
+
+        Returns:
+            dict: The counters of this worker (see stats)
+        """
+        init_spool(self.spool_dir)
+        self.write_stats()
+        try:
+            while True:
+                name = self.claim()
+                if name is not None:
+                    self.process(name)
+                    continue
+                requeue_stale(self.spool_dir, self.stale)
+                if once and not _items(os.path.join(self.spool_dir, PENDING)) \
+                        and not _items(os.path.join(self.spool_dir, CLAIMED)):
+                    break
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            self.release()
+        return self.stats()
+
+
+def _run_worker(spool_dir: str, node: str, stale: float, interval: float, once: bool) -> dict:
+    templates.preload()
+    return SpoolWorker(spool_dir, node, stale, interval).run(once)
+
+
+def work(spool_dir: str, workers: int = 1, node: str = None, stale: float = 60.0, interval: float = 0.5,
+         once: bool = False) -> list:
+    """
+    Runs spool workers on this node and reports their throughput on stderr.
+
+    Args:
+        spool_dir: Spool directory
+        workers: Number of worker processes
+        node: Name of this node in the statistics (default: host name)
+        stale: Seconds after which an untouched claim is requeued
+        interval: Seconds to wait when no work item is pending
+        once: Stop as soon as no item is pending or claimed
+
+    Returns:
+        list: The counters of every worker (see SpoolWorker.stats)
+    """
+    if workers == 1:
+        results = [_run_worker(spool_dir, node, stale, interval, once)]
+    else:
+        templates.preload()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_worker, spool_dir, node, stale, interval, once)
+                       for _ in range(workers)]
+            try:
+                results = [future.result() for future in futures]
+            except KeyboardInterrupt:
+                # The workers got the signal as well and release their claims
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                results = [future.result() for future in futures]
+    elections = sum(result['elections'] for result in results)
+    busy = sum(result['busy'] for result in results)
+    print(f"ndrwahltexte: {results[0]['node']}: {sum(result['items'] for result in results)} items, "
+          f"{elections} elections, {sum(result['errors'] for result in results)} errors, "
+          f"{_rate(results):.0f} elections/s ({busy:.1f}s busy on {len(results)} workers)", file=sys.stderr)
+    return results
+
+
+def _rate(workers: list) -> float:
+    """Elections per second of a node: the sum of the rates of its workers while busy."""
+    return sum(worker['elections'] / worker['busy'] for worker in workers if worker['busy'])
+
+
+def status(spool_dir: str) -> dict:
+    """
+    Returns the state of a spool directory.
+
+    Returns:
+        dict: Number of items per subdirectory, and for every node the number of
+        worker processes, processed items, elections and errors, and elections
+        per second while busy (summed over its workers)
+    """
+    state = {name: len(_items(os.path.join(spool_dir, name))) for name in (PENDING, CLAIMED, DONE)}
+    state[FAILED] = sum(1 for name in _items(os.path.join(spool_dir, FAILED)) if not name.endswith('.error'))
+    workers = {}
+    for name in _items(os.path.join(spool_dir, NODES)):
+        try:
+            with open(os.path.join(spool_dir, NODES, name), encoding='utf-8') as f:
+                worker = json.load(f)
+        except (OSError, ValueError):
+            continue
+        workers.setdefault(worker['node'], []).append(worker)
+    state['nodes'] = {
+        node: {'workers': len(stats), 'items': sum(worker['items'] for worker in stats),
+               'elections': sum(worker['elections'] for worker in stats),
+               'errors': sum(worker['errors'] for worker in stats),
+               'per_second': round(_rate(stats), 1)}
+        for node, stats in sorted(workers.items())
+    }
+    return state
+
+
+def collect(spool_dir: str, outfile, job: str = None) -> int:
+    """
+    Writes the results of all done items to outfile in input order.
+
+    Args:
+        spool_dir: Spool directory
+        outfile: Text stream that receives one result object per line
+        job: Only the items of this job (see submit)
+
+    Returns:
+        int: Number of items of the job that are still pending, claimed or failed
+    """
+    for name in _items(os.path.join(spool_dir, RESULTS)):
+        if _in_job(name, job):
+            with open(os.path.join(spool_dir, RESULTS, name), encoding='utf-8') as f:
+                outfile.write(f.read())
+    missing = 0
+    for directory in (PENDING, CLAIMED, FAILED):
+        missing += sum(1 for name in _items(os.path.join(spool_dir, directory))
+                       if _in_job(name, job) and not name.endswith('.error'))
+    return missing
@@ -0,0 +1,245 @@
+########################
+#
+# Result Store
+# SQLite sink for generated texts that only records actual changes
+# -> l.sander.fm@ndr.de
+#
+#########################
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional, Tuple, Union
+from .election import election_ergebnis_art, election_id
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    election_id TEXT PRIMARY KEY,
+    ergebnis_art TEXT,
+    titel TEXT,
+    absatz1 TEXT,
+    input_hash TEXT,
+    updated_at REAL NOT NULL
+);
+DROP INDEX IF EXISTS results_updated_at;
+CREATE INDEX IF NOT EXISTS results_changes ON results (updated_at, election_id);
+"""
+
+# Inserts a result, or updates it only if the generated text differs from the stored one
+UPSERT = """
+INSERT INTO results (election_id, ergebnis_art, titel, absatz1, input_hash, updated_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (election_id) DO UPDATE SET
+    ergebnis_art = excluded.ergebnis_art,
+    titel = excluded.titel,
+    absatz1 = excluded.absatz1,
+    input_hash = excluded.input_hash,
+    updated_at = excluded.updated_at
+WHERE titel IS NOT excluded.titel
+   OR absatz1 IS NOT excluded.absatz1
+   OR ergebnis_art IS NOT excluded.ergebnis_art
+"""
+
+COLUMNS = ('id', 'ergebnis_art', 'Titel', 'Absatz1', 'input_hash', 'updated_at')
+
+
+def input_hash(document: Union[str, bytes]) -> str:
+    """Returns the hash of an input document, ignoring surrounding whitespace."""
+    if isinstance(document, str):
+        document = document.encode('utf-8')
+    return hashlib.sha1(document.strip()).hexdigest()
+
+
+def describe_input(document: Union[str, bytes]) -> Tuple[Any, Optional[str], str]:
+    """
+    Parses an input document for the result store.
+
+    Args:
+        document: JSON document of one election
+
+    Returns:
+        tuple: (parsed document, or the document itself if it is not valid JSON,
+        ergebnis_art or None, input hash)
+    """
+    try:
+        raw_data = json.loads(document)
+    except Exception:
+        return document, None, input_hash(document)
+    return raw_data, election_ergebnis_art(raw_data), input_hash(document)
+
+
+class ResultStore:
+    """
+    Keeps the latest generated text per election in an SQLite database.
+
+    Results are collected and written in one transaction once batch_size results
+    are collected, the oldest collected result is older than max_delay seconds,
+    or flush is called. A result whose Titel, Absatz1 and ergebnis_art equal the
+    stored ones is not written at all, so updated_at (and changed_since) only
+    moves when the published text changes. input_hash identifies the input the
+    stored text was generated from.
+
+    updated_at is the time a batch is committed, not the time its results were
+    collected, and every batch is stamped later than all batches committed
+    before it. A reader paging with changed_since therefore never passes a
+    result that is committed afterwards.
+
+    The database uses write-ahead logging, so other processes (e.g. the CMS)
+    can read while results are written. Within the process, the store can be
+    shared by threads (e.g. those of serve --threads).
+
+    Attributes:
+        path (str): Database file.
+        batch_size (int): Number of results collected before they are written.
+        max_delay (float): Seconds a collected result waits at most for the next write
+            (checked whenever a result is added).
+        written (int): Number of results inserted or updated.
+        unchanged (int): Number of results skipped because their text did not change.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, max_delay: float = 1.0):
+        """
+        Args:
+            path: Database file, created with its table and indexes if missing
+            batch_size: Number of results written per transaction
+            max_delay: Seconds after which collected results are written anyway
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.written = 0
+        self.unchanged = 0
+        self._pending = []
+        self._oldest = None     # time.monotonic() when the first pending result was added
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+
+    def put(self, election_id: Any, ergebnis_art: Optional[str], titel: str, absatz1: str,
+            input_hash: Optional[str] = None, timestamp: float = None):
+        """
+        Adds a generated text, writing the batch once it is full.
+
+        Args:
+            election_id: Id of the election (stored as text)
+            ergebnis_art: Result type the text was generated for
+            titel: Generated Titel
+            absatz1: Generated Absatz1
+            input_hash: Hash of the input document (see input_hash)
+            timestamp: updated_at in seconds since the epoch (default: when the result is committed)
+        """
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append((str(election_id), ergebnis_art, titel, absatz1, input_hash, timestamp))
+            if len(self._pending) >= self.batch_size or time.monotonic() - self._oldest >= self.max_delay:
+                self.flush()
+
+    def put_result(self, result: dict, ergebnis_art: Optional[str], input_hash: Optional[str] = None) -> bool:
+        """
+        Adds a result object as produced by --ndjson.
+
+        Returns:
+            bool: False if the result was not added because it is an error or has no election id
+        """
+        if 'error' in result or result.get('id') is None:
+            return False
+        self.put(result['id'], ergebnis_art, result.get('Titel'), result.get('Absatz1'), input_hash)
+        return True
+
+    def put_payload(self, raw_data: dict, output: dict, document: Union[str, bytes]) -> bool:
+        """
+        Adds the output generated for a parsed payload.
+
+        Args:
+            raw_data: The parsed payload ({"wahl": ...})
+            output: The generated text ({"Titel": ..., "Absatz1": ...})
+            document: The payload as received, for its input hash
+
+        Returns:
+            bool: False if the payload has no election id
+        """
+        result = dict(output, id=election_id(raw_data))
+        return self.put_result(result, election_ergebnis_art(raw_data), input_hash(document))
+
+    def flush(self):
+        """Writes all collected results in one transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            with self._connection:
+                # Holds the write lock until the commit, so no other writer commits in between
+                self._connection.execute('BEGIN IMMEDIATE')
+                latest, = self._connection.execute('SELECT MAX(updated_at) FROM results').fetchone()
+                now = time.time()
+                if latest is not None and now <= latest:
+                    now = latest + 1e-6
+                cursor = self._connection.executemany(
+                    UPSERT, [row if row[5] is not None else row[:5] + (now,) for row in pending])
+            self.written += cursor.rowcount
+            self.unchanged += len(pending) - cursor.rowcount
+
+    def get(self, election_id: Any) -> Optional[dict]:
+        """Returns the stored result of an election, None if there is none."""
+        with self._lock:
+            self.flush()
+            row = self._connection.execute(
+                'SELECT election_id, ergebnis_art, titel, absatz1, input_hash, updated_at '
+                'FROM results WHERE election_id = ?', (str(election_id),)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def changed_since(self, timestamp: float = 0.0, limit: int = None, after: Any = None) -> List[dict]:
+        """
+        Returns the results whose text changed after a point in time.
+
+        Results are ordered by (updated_at, id), which is also the cursor: to
+        page through the changes, pass updated_at and id of the last result of
+        the previous call as timestamp and after. Results that share an
+        updated_at (e.g. written in the same batch) are then never skipped,
+        even if a page ends between them.
+
+        Args:
+            timestamp: Seconds since the epoch
+            limit: Maximum number of results (oldest changes first)
+            after: Election id; also returns results changed exactly at timestamp
+                whose id sorts after it (default: only results changed after timestamp)
+
+        Returns:
+            List[dict]: Results with the keys in COLUMNS, ordered by updated_at and id
+        """
+        # (updated_at, election_id) > (timestamp, after), spelled out for SQLite before 3.15
+        if after is None:
+            condition, parameters = 'updated_at > ?', (timestamp,)
+        else:
+            condition = 'updated_at > ? OR (updated_at = ? AND election_id > ?)'
+            parameters = (timestamp, timestamp, str(after))
+        with self._lock:
+            self.flush()
+            rows = self._connection.execute(
+                'SELECT election_id, ergebnis_art, titel, absatz1, input_hash, updated_at '
+                f'FROM results WHERE {condition} ORDER BY updated_at, election_id LIMIT ?',
+                parameters + (-1 if limit is None else limit,)).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def stats(self) -> dict:
+        """Returns the write counters of the store."""
+        with self._lock:
+            return {'path': self.path, 'written': self.written, 'unchanged': self.unchanged,
+                    'pending': len(self._pending)}
+
+    def close(self):
+        """Writes the collected results and closes the database."""
+        with self._lock:
+            self.flush()
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -4,28 +4,125 @@ Automatically merges corrections from three layers:
   1. Shared corrections (all elections)
   2. Wahlart-level corrections (e.g., Verhältniswahl)
   3. Template-level corrections (specific template file)
+
+Built configurations are cached per (wahlart module, ergebnis module).
+Use invalidate() to drop cached configurations and reload() to re-import
+the template and correction modules after they changed on disk.
+Configurations are read-only and can be shared by threads.
 """
 
 import importlib
+import os
 import sys
-from .shared_corrections import build_shared_corrections
-from ..utils import write_error
-from .party_grammar import build_party_corrections
+from _thread import RLock, allocate_lock   # threading.(R)Lock without importing threading (CLI start time)
+from types import MappingProxyType
+from . import parties, party_grammar, shared_corrections
+from ..robotext import (compile_conditions, compile_corrections, compile_decision_table, compile_dependencies,
+                        compile_renderers, compile_topics)
 
 
-def load_for(wahlart, ergebnis_art):
+class ConfigCache:
     """
-    Auto-load templates and corrections by convention.
+    Cache of built configurations keyed by (wahlart module, ergebnis module).
+
+    Safe to use from several threads: a configuration is built only once even
+    if it is requested concurrently, and invalidation waits for running builds.
+
+    Attributes:
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that had to build a configuration.
+        version (int): Incremented whenever cached configurations are dropped,
+            so derived caches can tell outdated entries apart.
+    """
+
+    def __init__(self):
+        self._configs = {}
+        self._lock = allocate_lock()        # Guards the entries and counters
+        self.build_lock = RLock()           # Held while configurations are built, invalidated or reloaded
+        self.hits = 0
+        self.misses = 0
+        self.version = 0
+
+    def get(self, key):
+        """Returns the cached configuration for key or None, counting hits and misses."""
+        with self._lock:
+            config = self._configs.get(key)
+            if config is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return config
+
+    def put(self, key, config):
+        """Stores a configuration and returns it."""
+        with self._lock:
+            self._configs[key] = config
+        return config
+
+    def get_or_build(self, key, build):
+        """
+        Returns the configuration for key, building and storing it on a miss.
+
+        Args:
+            key: (wahlart module, ergebnis module)
+            build: Called as build(*key) to build a missing configuration
+
+        Returns:
+            Mapping: The configuration
+        """
+        config = self.get(key)
+        if config is None:
+            with self.build_lock:
+                # Another thread may have built it while this one waited
+                config = self._configs.get(key)
+                if config is None:
+                    config = self.put(key, build(*key))
+        return config
+
+    def invalidate(self, key=None):
+        """Drops the configuration for key, or all configurations if key is None."""
+        with self.build_lock, self._lock:
+            if key is None:
+                self._configs.clear()
+            else:
+                self._configs.pop(key, None)
+            self.version += 1
+
+    def keys(self):
+        """Returns the keys of all cached configurations."""
+        with self._lock:
+            return list(self._configs)
+
+    def info(self):
+        """Returns hit/miss counters and size of the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._configs),
+                'version': self.version,
+            }
+
+
+_CACHE = ConfigCache()
+
+# Template modules per Wahlart package, see config_key
+ERGEBNIS_MODULES = ['kein_ergebnis', 'zwischenergebnis', 'endergebnis']
+
+
+def config_key(wahlart, ergebnis_art):
+    """
+    Normalize election and result type to the module names of their templates.
 
     Args:
         wahlart: Election type (e.g., 'Verhältniswahl', 'Mehrheitswahl')
         ergebnis_art: Result type (e.g., 'Kein Ergebnis', 'Vorläufiges Endergebnis')
 
     Returns:
-        dict: {'templates': dict, 'corrections': dict}
+        tuple: (wahlart module, ergebnis module), e.g. ('verhaeltniswahl', 'endergebnis')
 
     Raises:
-        Writes error to stderr and exits on failure
+        ValueError: If the result type is unknown
     """
     # Normalize names to module names
     wahlart_module = wahlart.lower().replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue')
@@ -37,52 +134,171 @@ def load_for(wahlart, ergebnis_art):
         ergebnis_module = 'endergebnis'
     elif 'Zwischenergebnis' in ergebnis_art:
         ergebnis_module = 'zwischenergebnis'
+    else:
+        raise ValueError(f"Unknown ergebnis_art: {ergebnis_art}")
+
+    return wahlart_module, ergebnis_module
+
+
+def load_for(wahlart, ergebnis_art):
+    """
+    Auto-load templates and corrections by convention.
+
+    The configuration is built on the first call for each election type and
+    cached, so long-running processes (e.g. the server mode) build it only once.
+
+    Args:
+        wahlart: Election type (e.g., 'Verhältniswahl', 'Mehrheitswahl')
+        ergebnis_art: Result type (e.g., 'Kein Ergebnis', 'Vorläufiges Endergebnis')
+
+    Returns:
+        Mapping: read-only {'templates', 'corrections', 'conditions', 'dependencies',
+                 'topics', 'decision_table', 'pipelines', 'renderers', 'version'}
+
+    Raises:
+        ValueError: If no template file exists for the given election type
+    """
+    key = config_key(wahlart, ergebnis_art)
+    try:
+        return _CACHE.get_or_build(key, _build_config)
+    except ImportError as e:
+        raise ValueError(
+            f"Missing templates for {wahlart}/{ergebnis_art}.\n"
+            f"Expected file: templates/{key[0]}/{key[1]}.py\n"
+            f"Error: {e}"
+        ) from e
+
+
+def _build_config(wahlart_module, ergebnis_module):
+    """
+    Import templates and merge all correction layers for one election type.
+
+    Args:
+        wahlart_module: Normalized election type, e.g. 'verhaeltniswahl'
+        ergebnis_module: Normalized result type, e.g. 'endergebnis'
+
+    Returns:
+        Mapping: read-only configuration (see load_for)
 
+    Raises:
+        ImportError: If the template module does not exist
+    """
     module_path = f'ndrwahltexte.templates.{wahlart_module}.{ergebnis_module}'
     corrections_path = f'ndrwahltexte.templates.{wahlart_module}.corrections'
 
+    # Load templates
+    templates_mod = importlib.import_module(module_path)
+    templates = templates_mod.TEMPLATES
+
+    # initialize corrections
+    corrections = {}
+
+    # Layer 1: Wahlart-level corrections
     try:
-        # Load templates
-        templates_mod = importlib.import_module(module_path)
-        templates = templates_mod.TEMPLATES
+        corrections_mod = importlib.import_module(corrections_path)
+        wahlart_corrections = corrections_mod.build_verhaeltniswahl_corrections(templates.keys())
+        corrections.update(wahlart_corrections)
+    except (ImportError, AttributeError) as e:
+        pass
+
+    # Layer 2: Template-level corrections (optional)
+    if hasattr(templates_mod, 'LOCAL_CORRECTIONS'):
+        corrections.update(templates_mod.LOCAL_CORRECTIONS)
 
-        # initialize corrections
-        corrections = {}
+    # Layer 3: Party grammar corrections (all election types)
+    party_corrections = party_grammar.build_party_corrections(templates)  # Changed: pass templates dict, not keys
+    corrections.update(party_corrections)
 
-        # Layer 1: Wahlart-level corrections
-        try:
-            corrections_mod = importlib.import_module(corrections_path)
-            wahlart_corrections = corrections_mod.build_verhaeltniswahl_corrections(templates.keys())
-            corrections.update(wahlart_corrections)
-        except (ImportError, AttributeError) as e:
-            pass
+    # Layer 4: Shared corrections (apply to all)
+    corrections.update(shared_corrections.build_shared_corrections())
 
-        # Layer 2: Template-level corrections (optional)
-        if hasattr(templates_mod, 'LOCAL_CORRECTIONS'):
-            corrections.update(templates_mod.LOCAL_CORRECTIONS)
+    conditions = compile_conditions(templates)
+    topics = compile_topics(templates)
+    return MappingProxyType({
+        'templates': MappingProxyType(templates),
+        'corrections': MappingProxyType(corrections),
+        'conditions': MappingProxyType(conditions),
+        'dependencies': MappingProxyType(compile_dependencies(conditions)),
+        'topics': MappingProxyType(topics),
+        'decision_table': compile_decision_table(templates, conditions, topics),
+        'pipelines': MappingProxyType(compile_corrections(corrections, templates)),
+        'renderers': MappingProxyType(compile_renderers(templates, shared_corrections.format_german_number)),
+        'version': _CACHE.version,
+    })
 
-        # Layer 3: Party grammar corrections (all election types)
-        party_corrections = build_party_corrections(templates)  # Changed: pass templates dict, not keys
-        corrections.update(party_corrections)
 
-        # Layer 4: Shared corrections (apply to all)
-        corrections.update(build_shared_corrections())
+def preload():
+    """
+    Build and cache the configurations of all template modules in this package.
+
+    Used to warm worker processes before they receive elections.
 
-        return {
-            'templates': templates,
-            'corrections': corrections,
-        }
+    Returns:
+        list: Keys (wahlart module, ergebnis module) of the loaded configurations
+    """
+    import pkgutil
 
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    loaded = []
+    for wahlart in pkgutil.iter_modules([package_dir]):
+        if not wahlart.ispkg:
+            continue
+        modules = {module.name for module in pkgutil.iter_modules([os.path.join(package_dir, wahlart.name)])}
+        for ergebnis_module in ERGEBNIS_MODULES:
+            if ergebnis_module not in modules:
+                continue
+            key = (wahlart.name, ergebnis_module)
+            _CACHE.get_or_build(key, _build_config)
+            loaded.append(key)
+    return loaded
 
 
-    except ImportError as e:
-        error = ValueError(
-            f"Missing templates for {wahlart}/{ergebnis_art}.\n"
-            f"Expected file: templates/{wahlart_module}/{ergebnis_module}.py\n"
-            f"Error: {e}"
-        )
-        write_error(error)
-        sys.exit(1)
-    except Exception as e:
-        write_error(e)
-        sys.exit(1)
\ No newline at end of file
+def analyze():
+    """
+    Build the configurations of all template modules and return their decision tables.
+
+    Returns:
+        dict: (wahlart module, ergebnis module) -> DecisionTable, whose residual,
+              unreachable and overlapping attributes describe the templates
+    """
+    return {key: _CACHE.get(key)['decision_table'] for key in preload()}
+
+
+def invalidate(wahlart=None, ergebnis_art=None):
+    """
+    Drop cached configurations.
+
+    Args:
+        wahlart: Election type to drop; drops all configurations if omitted
+        ergebnis_art: Result type to drop (required together with wahlart)
+    """
+    if wahlart is None:
+        _CACHE.invalidate()
+    else:
+        _CACHE.invalidate(config_key(wahlart, ergebnis_art))
+
+
+def reload():
+    """
+    Re-import party data, grammar, shared corrections and all loaded template
+    modules, then drop all cached configurations.
+    """
+    # No configuration is built from half-reloaded modules meanwhile
+    with _CACHE.build_lock:
+        for module in (parties, party_grammar, shared_corrections):
+            importlib.reload(module)
+        prefix = __name__ + '.'
+        for name, module in list(sys.modules.items()):
+            if name.startswith(prefix) and name.count('.') > 2 and module is not None:
+                importlib.reload(module)
+        _CACHE.invalidate()
+
+
+def cache_info():
+    """
+    Return hit/miss counters of the configuration cache.
+
+    Returns:
+        dict: {'hits': int, 'misses': int, 'size': int, 'version': int}
+    """
+    return _CACHE.info()
@@ -2,7 +2,8 @@
 Corrections specific to German party name grammar (articles, cases).
 """
 
-from .parties import PARTEIEN, PARTEI_NAMEN, DATIV_FORMS, PLURAL_PARTEIEN
+import re
+from .parties import PARTEIEN, PARTEI_NAMEN, PLURAL_PARTEIEN
 
 # === Article Mapping ===
 ARTICLES = {
@@ -50,127 +51,125 @@ def get_templates_by_case(templates, case):
     ]
 
 
-def build_nominative_corrections(scoped_templates):
+# Grammatical cases handled by the party grammar engine
+CASES = ['nominativ', 'akkusativ', 'dativ']
+
+_WORD = re.compile(r'\w+')
+
+
+def build_lexicon():
     """
-    Build nominative case corrections (standalone patterns only).
+    Build the party lexicon used by PartyGrammar.
 
-    Args:
-        scoped_templates: List of template keys for nominative scope
+    Every party name is indexed by its first word (lowercase), so a sentence
+    can be matched against all parties with one dict lookup per word.
 
     Returns:
-        dict: Nominative correction patterns
+        dict: first word -> list of (party, articles, form), longest names first.
+              articles maps each case to the article, form is the text inserted
+              after the article (None: the party name as written in the sentence).
     """
-    corrections = {}
+    lexicon = {}
 
-    if not scoped_templates:
-        return corrections
-
-    article = ARTICLES['nominativ']
+    def add(party, articles, form=None):
+        first_word = _WORD.match(party).group().lower()
+        lexicon.setdefault(first_word, []).append((party, articles, form))
 
     # Handle regular genders
     for gender in ['maskulin', 'feminin', 'neutrum']:
-        if gender not in PARTEIEN or not PARTEIEN[gender]:
-            continue
-
-        parties = PARTEIEN[gender]
-        gender_article = article[gender]
-        party_pattern = '|'.join(parties)
-
-        corrections[rf'\b({party_pattern})\b'] = {
-            "replacement": rf"{gender_article} \1",
-            "applies_to": scoped_templates
-        }
+        for party in PARTEIEN.get(gender, []):
+            add(party, {case: ARTICLES[case][gender] for case in CASES})
 
     # Handle plural gender with special declension
-    if 'plural' in PARTEIEN and PARTEIEN['plural']:
-        parties = PARTEIEN['plural']
-        gender_article = article['plural']
-
-        for party in parties:
-            declined_form = PLURAL_PARTEIEN[party]
-            corrections[rf'\b{party}\b'] = {
-                "replacement": f"{gender_article} {declined_form}",
-                "applies_to": scoped_templates
-            }
+    for party in PARTEIEN.get('plural', []):
+        add(party, {case: ARTICLES[case]['plural'] for case in CASES}, PLURAL_PARTEIEN[party])
 
     # Handle "mit Partei davor" category
-    if 'mit_partei_davor' in PARTEIEN and PARTEIEN['mit_partei_davor']:
-        for partei_key in PARTEIEN['mit_partei_davor']:
-            partei_name = PARTEI_NAMEN[partei_key]
+    for partei_key in PARTEIEN.get('mit_partei_davor', []):
+        add(partei_key, {'nominativ': 'die', 'akkusativ': 'die', 'dativ': 'der'},
+            f"Partei {PARTEI_NAMEN[partei_key]}")
 
-            corrections[rf'\b{partei_key}\b'] = {
-                "replacement": f"die Partei {partei_name}",
-                "applies_to": scoped_templates
-            }
+    for entries in lexicon.values():
+        entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+    return lexicon
 
-    return corrections
 
+LEXICON = build_lexicon()
 
-def build_preposition_corrections(case, scoped_templates):
-    """
-    Build preposition-based corrections for accusative and dative.
-
-    Args:
-        case: 'akkusativ' or 'dativ'
-        scoped_templates: List of template keys for this case's scope
 
-    Returns:
-        dict: Preposition-based correction patterns
+class PartyGrammar:
     """
-    corrections = {}
-
-    if not scoped_templates:
-        return corrections
+    Single-pass party grammar for a set of grammatical cases.
 
-    prepositions = PREPOSITIONS.get(case, [])
-    article = ARTICLES[case]
+    Scans a sentence word by word and looks every word up in the party lexicon.
+    A party name gets its article (and declined form) inserted:
+      - nominativ: wherever the name appears with its exact spelling
+      - akkusativ/dativ: when it directly follows a preposition of that case
+        (preposition and name matched case-insensitively)
 
-    # Handle regular genders
-    for gender in ['maskulin', 'feminin', 'neutrum']:
-        if gender not in PARTEIEN or not PARTEIEN[gender]:
-            continue
-
-        parties = PARTEIEN[gender]
-        gender_article = article[gender]
-        party_pattern = '|'.join(parties)
-
-        for prep in prepositions:
-            corrections[rf'(?i)\b{prep} ({party_pattern})\b'] = {
-                "replacement": rf"{prep} {gender_article} \1",
-                "applies_to": scoped_templates
-            }
-
-    # Handle plural gender with special declension
-    if 'plural' in PARTEIEN and PARTEIEN['plural']:
-        parties = PARTEIEN['plural']
-        gender_article = article['plural']
-
-        for party in parties:
-            declined_form = PLURAL_PARTEIEN[party]
-
-            for prep in prepositions:
-                corrections[rf'(?i)\b{prep} {party}\b'] = {
-                    "replacement": f"{prep} {gender_article} {declined_form}",
-                    "applies_to": scoped_templates
-                }
-
-    # Handle "mit Partei davor" category
-    if 'mit_partei_davor' in PARTEIEN and PARTEIEN['mit_partei_davor']:
-        for partei_key in PARTEIEN['mit_partei_davor']:
-            partei_name = PARTEI_NAMEN[partei_key]
-
-            if case == 'akkusativ':
-                gender_article = 'die'
-            else:  # dativ
-                gender_article = 'der'
+    This gives the same result as one regex per preposition, gender and party,
+    but the cost per sentence does not grow with the number of parties.
+    """
 
-            for prep in prepositions:
-                corrections[rf'(?i)\b{prep} {partei_key}\b'] = {
-                    "replacement": f"{prep} {gender_article} Partei {partei_name}",
-                    "applies_to": scoped_templates
-                }
+    def __init__(self, cases):
+        """
+        Args:
+            cases: Grammatical cases of the template ('nominativ', 'akkusativ', 'dativ')
+        """
+        self.nominativ = 'nominativ' in cases
+        self.prepositions = {
+            prep.lower(): (prep, case)
+            for case in ['akkusativ', 'dativ'] if case in cases
+            for prep in PREPOSITIONS.get(case, [])
+        }
 
-    return corrections
+    def __call__(self, sentence):
+        """Returns the sentence with articles inserted before all party names."""
+        pieces = []
+        last = 0        # end of the text already copied to pieces
+        previous = None  # previous word in the sentence
+        for word in _WORD.finditer(sentence):
+            start = word.start()
+            if start < last:
+                continue
+            replacement = self._replace(sentence, word, previous, last)
+            previous = word
+            if replacement is None:
+                continue
+            replace_start, end, text = replacement
+            pieces.append(sentence[last:replace_start])
+            pieces.append(text)
+            last = end
+
+        if not pieces:
+            return sentence
+        pieces.append(sentence[last:])
+        return ''.join(pieces)
+
+    def _replace(self, sentence, word, previous, last):
+        """Returns (start, end, replacement) for a party name starting at word, or None."""
+        entries = LEXICON.get(word.group().lower())
+        if not entries:
+            return None
+
+        start = word.start()
+        for party, articles, form in entries:
+            end = start + len(party)
+            matched = sentence[start:end]
+            if end < len(sentence) and (sentence[end].isalnum() or sentence[end] == '_'):
+                continue  # no word boundary after the name
+
+            if self.nominativ and matched == party:
+                return start, end, f"{articles['nominativ']} {form or matched}"
+
+            if (self.prepositions and previous is not None and previous.start() >= last
+                    and previous.end() == start - 1 and sentence[start - 1] == ' '
+                    and matched.lower() == party.lower()):
+                preposition = self.prepositions.get(previous.group().lower())
+                if preposition:
+                    prep, case = preposition
+                    return previous.start(), end, f"{prep} {articles[case]} {form or matched}"
+        return None
 
 
 def build_party_corrections(templates):
@@ -178,27 +177,35 @@ def build_party_corrections(templates):
     Build all party grammar corrections.
 
     Strategy:
-    1. Extract template scopes for each case from grammar metadata
-    2. Nominative: Standalone patterns (scoped)
-    3. Akkusativ/Dativ: Preposition-based patterns (scoped)
+    1. Group templates by the grammatical cases in their grammar metadata
+    2. One PartyGrammar pass per group (nominative names, akkusativ/dativ
+       names after prepositions), scoped to the templates of that group
+    3. Capitalization patterns for all templates
 
     Args:
         templates: Dict of all templates with their metadata
 
     Returns:
-        dict: All party grammar correction patterns
+        dict: All party grammar corrections
     """
     corrections = {}
 
-    # Extract scopes once for all cases
-    nominativ_templates = get_templates_by_case(templates, 'nominativ')
-    akkusativ_templates = get_templates_by_case(templates, 'akkusativ')
-    dativ_templates = get_templates_by_case(templates, 'dativ')
+    # Extract scopes once for all case combinations
+    scopes = {}
+    for case in CASES:
+        for key in get_templates_by_case(templates, case):
+            scopes.setdefault(key, []).append(case)
+
+    groups = {}
+    for key, cases in scopes.items():
+        groups.setdefault(tuple(cases), []).append(key)
 
     # Build corrections
-    corrections.update(build_nominative_corrections(nominativ_templates))
-    corrections.update(build_preposition_corrections('akkusativ', akkusativ_templates))
-    corrections.update(build_preposition_corrections('dativ', dativ_templates))
+    for cases, scoped_templates in groups.items():
+        corrections[f"<party grammar: {', '.join(cases)}>"] = {
+            "transform": PartyGrammar(cases),
+            "applies_to": scoped_templates
+        }
 
     # === CAPITALIZATION: Die Linke ===
     corrections[r'\bdie Linke\b'] = {
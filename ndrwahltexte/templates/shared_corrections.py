@@ -1,29 +1,57 @@
 """
 Shared corrections that apply across all election types.
 Mainly number formatting and common German grammar rules.
+
+Numbers are formatted when they are filled into the templates
+(see format_german_number), not by corrections on the finished text.
 """
 
+import math
+
+
+def format_german_number(value):
+    """
+    Format a template variable, writing numbers the German way.
+
+    Integral values lose their trailing .0, the decimal point becomes a comma
+    and numbers with five or more digits get a dot between thousands
+    (12345.6 -> 12.345,6). Everything that is not an int or float is
+    formatted as str.format would.
+
+    Args:
+        value: The value of a template variable
+
+    Returns:
+        str: The formatted value
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return format(value, '')
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return str(value)
+        if value.is_integer():
+            value = int(value)
+
+    text = str(value)
+    if 'e' in text:
+        return text
+
+    integer, _, fraction = text.partition('.')
+    sign = '-' if integer.startswith('-') else ''
+    digits = integer.lstrip('-')
+    if len(digits) >= 5:
+        digits = f"{int(digits):,}".replace(",", ".")
+    return sign + digits + (',' + fraction if fraction else '')
+
 
 def build_shared_corrections():
     """Build corrections that apply to all templates across all election types."""
     corrections = {}
 
-    # === NUMBER FORMATTING: remove trailing .0 ===
-    corrections[r'\b(\d+)\.0\b'] = {
-        "replacement": r"\1",
-        "applies_to": None  # None means applies to ALL templates
-    }
-
-    # === NUMBER FORMATTING: Decimal point to comma ===
-    corrections[r'\b(\d+)\.(\d+)\b'] = {
-        "replacement": r"\1,\2",
-        "applies_to": None
-    }
-
     # === LOCATION: in Kreis → im Kreis ===
     corrections[r'\b([iI])n Kreis\b'] = {
         "replacement": r"\1m Kreis",
-        "applies_to": None
+        "applies_to": None  # None means applies to ALL templates
     }
 
     # === COUNTING: von 1 von → von einem von ===
@@ -41,14 +69,4 @@ def build_shared_corrections():
         "applies_to": None
     }
 
-    # === NUMBER FORMATTING: Add . between thousands ===
-    def format_german_number(m):
-        num = m.group(1)
-        return f"{int(num):,}".replace(",", ".")
-
-    corrections[r'\b(\d{5,})\b'] = {
-        "replacement": format_german_number,
-        "applies_to": None
-    }
-
-    return corrections
\ No newline at end of file
+    return corrections
@@ -6,46 +6,131 @@
 #
 #########################
 
-from typing import Dict
+import hashlib
+import json
+import time
+from typing import Any, Dict, Mapping
+from . import metrics
+from .cache import OutputCache
+from .election import ElectionVariables
 from .robotext import TemplateEngine
 from .templates import load_for
 
+# Generated texts keyed by (config version, hash of election id, variables record)
+# or, for plain dicts, (config version, hash of election id and variables)
+OUTPUT_CACHE = OutputCache()
 
-def generate_election_text(variables: Dict) -> Dict[str, str]:
+# Sentences of the latest snapshot per election, keyed by
+# (config version, wahlart, ergebnis_art, hash of election id), see build_text_incremental
+SENTENCE_CACHE = OutputCache()
+
+# Topics of the generated sections, in output order
+SECTIONS = (('Titel', 'ergebnis'), ('Absatz1', 'absatz1'))
+
+# Topics of which a single template is meant to be selected (the title is one sentence)
+EXCLUSIVE_TOPICS = ('ergebnis',)
+
+
+def resize_caches(maxsize: int):
+    """Sets the maximum number of entries of OUTPUT_CACHE and SENTENCE_CACHE (0 disables both)."""
+    OUTPUT_CACHE.resize(maxsize)
+    SENTENCE_CACHE.resize(maxsize)
+
+
+def variables_hash(variables: Mapping, election_id: Any = None) -> str:
+    """
+    Stable hash of an election's variables (and id).
+
+    Args:
+        variables: Election data variables (ElectionVariables or a dict)
+        election_id: Id of the election, if known
+
+    Returns:
+        str: Hex digest that only changes when id or variables change
+    """
+    if not isinstance(variables, dict):
+        variables = dict(variables)
+    data = json.dumps([election_id, variables], sort_keys=True, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def generate_election_text(variables: Mapping, election_id: Any = None, use_cache: bool = True) -> Dict[str, str]:
     """
     Generate election text from template variables.
 
+    Templates with several text alternatives are chosen with a seed derived from
+    election id and the variables of the template, so identical inputs always
+    produce the same text. Results are kept in OUTPUT_CACHE and returned from
+    there for identical inputs. For elections with an id, the sentences of the
+    latest snapshot are kept in SENTENCE_CACHE, so a new snapshot (e.g. the next
+    Zwischenergebnis) only re-renders the templates whose variables changed.
+
     Args:
-        variables: Dictionary of election data variables
+        variables: Election data variables (ElectionVariables or a dict)
+        election_id: Id of the election, part of the seed and the cache key
+        use_cache: Look up and store the result in OUTPUT_CACHE
 
     Returns:
         dict: Dictionary with 'Titel' and 'Absatz1' keys, or 'error' key if generation failed
     """
+    instrument = metrics.current()
+    start = time.perf_counter() if instrument is not None else None
+
     # Load templates and corrections based on election type
     config = load_for(variables['wahlart'], variables['ergebnis_art'])
 
+    election_seed = variables_hash({}, election_id)
+    if isinstance(variables, ElectionVariables):
+        cache_key = (config['version'], election_seed, variables)
+    else:
+        cache_key = (config['version'], variables_hash(variables, election_id))
+    if use_cache:
+        cached = OUTPUT_CACHE.get(cache_key)
+        if cached is not None:
+            if instrument is not None:
+                instrument.count('output_cache_hits')
+            return dict(cached)
+
     # Initialize template engine
     engine = TemplateEngine(
         templates=config['templates'],
         variables=variables,
-        corrections=config['corrections']
+        corrections=config['corrections'],
+        conditions=config['conditions'],
+        pipelines=config['pipelines'],
+        renderers=config['renderers'],
+        dependencies=config['dependencies'],
+        topics=config['topics'],
+        decision_table=config['decision_table'],
+        seed=election_seed,
+        instrument=instrument
     )
 
-    # Generate title
-    titel_selected = engine.select_templates(filter_topic="ergebnis")
-    titel = engine.build_text(titel_selected)
-
-    # Generate first paragraph
-    absatz1_selected = engine.select_templates(filter_topic="absatz1")
-    absatz1 = engine.build_text(absatz1_selected)
+    # Generate title and first paragraph, reusing the sentences of the previous snapshot
+    snapshot_key = (config['version'], variables['wahlart'], variables['ergebnis_art'], election_seed)
+    previous = SENTENCE_CACHE.get(snapshot_key) if use_cache and election_id is not None else None
+    texts, snapshot = {}, {}
+    for section, topic in SECTIONS:
+        texts[section], snapshot[topic] = engine.build_text_incremental(
+            filter_topic=topic, previous=previous and previous[topic]
+        )
+    if use_cache and election_id is not None:
+        SENTENCE_CACHE.put(snapshot_key, snapshot)
+    titel, absatz1 = texts['Titel'], texts['Absatz1']
 
     # Validate output
     if not titel or not titel.strip() or not absatz1 or not absatz1.strip():
-        return {
+        output = {
             'error': 'Für diese Daten konnte kein Wahltext geschrieben werden.'
         }
+    else:
+        output = {
+            'Titel': titel,
+            'Absatz1': absatz1
+        }
 
-    return {
-        'Titel': titel,
-        'Absatz1': absatz1
-    }
\ No newline at end of file
+    if use_cache:
+        OUTPUT_CACHE.put(cache_key, dict(output))
+    if instrument is not None:
+        instrument.stage('generate_election_text', time.perf_counter() - start)
+    return output
@@ -4,16 +4,33 @@ Shared utility functions for ndrwahltexte
 
 import json
 import sys
-import traceback
 
 
-def write_error(e):
-    """Gibt Fehler als JSON auf stderr aus."""
-    error_obj = {
+def error_object(e):
+    """Baut das Fehler-Objekt für eine Exception."""
+    # traceback (with linecache/tokenize) is only imported once an error occurs
+    import traceback
+
+    return {
         "error": {
             "type": type(e).__name__,
             "message": str(e),
             "traceback": traceback.format_exc()
         }
     }
-    print(json.dumps(error_obj, indent=2), file=sys.stderr)
\ No newline at end of file
+
+
+def validation_error_object(message):
+    """Baut das Fehler-Objekt für einen nicht erzeugbaren Wahltext."""
+    return {
+        "error": {
+            "type": "ValidationError",
+            "message": message,
+            "traceback": ""
+        }
+    }
+
+
+def write_error(e):
+    """Gibt Fehler als JSON auf stderr aus."""
+    print(json.dumps(error_object(e), indent=2), file=sys.stderr)
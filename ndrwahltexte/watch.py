@@ -0,0 +1,221 @@
+########################
+#
+# Directory Watcher
+# Generates texts for election files dropped into a directory
+# -> l.sander.fm@ndr.de
+#
+#########################
+
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+from . import templates
+from .election import election_ergebnis_art
+from .ndrwahltexte import process_line
+from .store import input_hash
+
+
+def _generate_file(data: bytes) -> Tuple[dict, Optional[str]]:
+    """Generates the result object for the content of one election file and returns it with its ergebnis_art."""
+    document = data.decode('utf-8')
+    try:
+        raw_data = json.loads(document)
+    except Exception:
+        raw_data = document
+    result = process_line(raw_data, 1)
+    del result['line']
+    return result, election_ergebnis_art(raw_data)
+
+
+def _init_worker():
+    """Loads all template configurations; Ctrl+C is handled by the watching process only."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    templates.preload()
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def write_atomic(path: str, text: str):
+    """Writes text to path via a temporary file, so readers never see partial files."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class DirectoryWatcher:
+    """
+    Watches a drop directory for election JSON files and writes their texts.
+
+    A file is processed once it has not changed for `debounce` seconds, so
+    files that are still being written or rewritten in quick succession are
+    only processed once. Files whose content did not change since they were
+    last processed are skipped, as are files whose output is already newer
+    than the input when the watcher starts. With a result store, every
+    generated text is also stored there (see store.ResultStore).
+
+    Attributes:
+        processed (int): Number of files for which a result was written.
+        skipped (int): Number of files skipped because their content did not change.
+        errors (int): Number of results that contain an error object.
+    """
+
+    def __init__(self, input_dir: str, output_dir: str, debounce: float = 0.5, interval: float = 0.2,
+                 concurrency: int = 8, executor=None, store=None):
+        """
+        Args:
+            input_dir: Directory the election files (*.json) are delivered to
+            output_dir: Directory the results are written to (same file names)
+            debounce: Seconds a file must stay unchanged before it is processed
+            interval: Seconds between two scans of the input directory
+            concurrency: Maximum number of files processed at the same time
+            executor: Executor for text generation (default: a process pool)
+            store: ResultStore that receives every generated text
+        """
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.debounce = debounce
+        self.interval = interval
+        self.concurrency = concurrency
+        self.executor = executor
+        self.store = store
+        self.processed = 0
+        self.skipped = 0
+        self.errors = 0
+        self._pending = {}      # name -> (signature, time the signature was first seen)
+        self._done = {}         # name -> signature of the last processed version
+        self._digests = {}      # name -> content hash of the last processed version
+        self._in_flight = set()
+
+    def _scan(self) -> dict:
+        """Returns {name: (mtime_ns, size)} for all election files in the input directory."""
+        files = {}
+        with os.scandir(self.input_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def _mark_existing_outputs(self, files: dict):
+        """Treats inputs as processed whose output is at least as new as the input."""
+        for name, signature in files.items():
+            try:
+                if os.stat(os.path.join(self.output_dir, name)).st_mtime_ns >= signature[0]:
+                    self._done[name] = signature
+            except FileNotFoundError:
+                pass
+
+    async def _process(self, name: str, signature: tuple, semaphore: asyncio.Semaphore):
+        """Generates and writes the result for one file."""
+        loop = asyncio.get_running_loop()
+        try:
+            async with semaphore:
+                start = time.perf_counter()
+                data = await loop.run_in_executor(None, _read_file, os.path.join(self.input_dir, name))
+                digest = hashlib.sha1(data).hexdigest()
+                if self._digests.get(name) == digest:
+                    self.skipped += 1
+                    self._done[name] = signature
+                    return
+
+                result, ergebnis_art = await loop.run_in_executor(self.executor, _generate_file, data)
+                if self.store is not None:
+                    self.store.put_result(result, ergebnis_art, input_hash(data))
+                result['source'] = name
+                text = json.dumps(result, indent=2)
+                await loop.run_in_executor(None, write_atomic, os.path.join(self.output_dir, name), text)
+
+                self._digests[name] = digest
+                self._done[name] = signature
+                self.processed += 1
+                self.errors += int('error' in result)
+                print(f"ndrwahltexte: {name} {'error' if 'error' in result else 'ok'} "
+                      f"{(time.perf_counter() - start) * 1000:.1f}ms", file=sys.stderr)
+        except Exception as e:
+            self.errors += 1
+            print(f"ndrwahltexte: {name} failed: {e}", file=sys.stderr)
+        finally:
+            self._in_flight.discard(name)
+
+    async def run(self, once: bool = False):
+        """
+        Watches the input directory until cancelled.
+
+        Args:
+            once: Stop as soon as all files present are processed
+        """
+        loop = asyncio.get_running_loop()
+        os.makedirs(self.output_dir, exist_ok=True)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+
+        self._mark_existing_outputs(await loop.run_in_executor(None, self._scan))
+        while True:
+            now = loop.time()
+            files = await loop.run_in_executor(None, self._scan)
+            for name in list(self._pending):
+                if name not in files:
+                    del self._pending[name]
+
+            for name, signature in files.items():
+                if name in self._in_flight or self._done.get(name) == signature:
+                    continue
+                pending = self._pending.get(name)
+                if pending is None or pending[0] != signature:
+                    self._pending[name] = (signature, now)
+                elif now - pending[1] >= self.debounce:
+                    del self._pending[name]
+                    self._in_flight.add(name)
+                    task = asyncio.ensure_future(self._process(name, signature, semaphore))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+            if self.store is not None:
+                self.store.flush()
+            if once and not self._pending and not tasks:
+                return
+            await asyncio.sleep(self.interval)
+
+
+def watch(input_dir: str, output_dir: str, debounce: float = 0.5, interval: float = 0.2,
+          concurrency: int = 8, workers: int = None, once: bool = False, store=None):
+    """
+    Runs a DirectoryWatcher with a process pool for text generation.
+
+    Args:
+        input_dir: Directory the election files (*.json) are delivered to
+        output_dir: Directory the results are written to
+        debounce: Seconds a file must stay unchanged before it is processed
+        interval: Seconds between two scans of the input directory
+        concurrency: Maximum number of files processed at the same time
+        workers: Number of worker processes (default: number of CPUs)
+        once: Stop as soon as all files present are processed
+        store: ResultStore that receives every generated text
+    """
+    templates.preload()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        watcher = DirectoryWatcher(input_dir, output_dir, debounce, interval, concurrency, executor, store)
+        try:
+            asyncio.run(watcher.run(once))
+        except KeyboardInterrupt:
+            pass
+    print(f"ndrwahltexte: {watcher.processed} processed, {watcher.skipped} unchanged, "
+          f"{watcher.errors} errors", file=sys.stderr)
@@ -0,0 +1,18 @@
+"""
+Shared fixtures of the tests: the synthetic elections of the benchmarks.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from synthetic import make_election, make_elections, make_suite  # noqa: E402,F401
+
+
+def enabled_metrics(test):
+    """Enables measurements for the duration of a unittest.TestCase and returns the recorder."""
+    from ndrwahltexte import metrics
+    metrics.disable()
+    test.addCleanup(metrics.disable)
+    return metrics.enable()
@@ -0,0 +1,96 @@
+import copy
+import random
+import unittest
+
+from ndrwahltexte.election import parse_election_data
+from ndrwahltexte.text_generator import OUTPUT_CACHE, SENTENCE_CACHE, generate_election_text
+
+from support import make_election
+
+
+def count_more(wahl, rnd):
+    ergebnis = wahl['ergebnis']
+    ergebnis['gez_wahlbereiche'] = min(ergebnis['gez_wahlbereiche'] + rnd.randint(1, 5), wahl['anz_wahlbereiche'])
+    ergebnis['wahlbeteil'] = round(ergebnis['wahlbeteil'] + rnd.uniform(-1, 1), 1)
+    for kandidat in rnd.sample(ergebnis['kandidaten'], min(2, len(ergebnis['kandidaten']))):
+        kandidat['prozent'] = round(max(kandidat['prozent'] + rnd.uniform(-2, 2), 0), 1)
+
+
+def tie(wahl, rnd):
+    kandidaten = sorted(wahl['ergebnis']['kandidaten'], key=lambda kandidat: -kandidat['prozent'])
+    if len(kandidaten) > 1:
+        kandidaten[1]['prozent'] = kandidaten[0]['prozent']
+
+
+def overtake(wahl, rnd):
+    kandidaten = sorted(wahl['ergebnis']['kandidaten'], key=lambda kandidat: -kandidat['prozent'])
+    if len(kandidaten) > 1:
+        kandidaten[1]['prozent'] = round(kandidaten[0]['prozent'] + 0.1, 1)
+
+
+def drop_candidate(wahl, rnd):
+    if len(wahl['ergebnis']['kandidaten']) > 1:
+        wahl['ergebnis']['kandidaten'].pop()
+
+
+def all_counted(wahl, rnd):
+    wahl['ergebnis']['gez_wahlbereiche'] = wahl['anz_wahlbereiche']
+
+
+def final(wahl, rnd):
+    wahl['ergebnis']['ergebnis_art'] = 'Vorläufiges Endergebnis'
+
+
+def corrected(wahl, rnd):
+    wahl['ergebnis']['ergebnis_art'] = 'Zwischenergebnis'
+    wahl['ergebnis']['gez_wahlbereiche'] = max(1, wahl['ergebnis']['gez_wahlbereiche'] - 3)
+
+
+STEPS = [count_more, count_more, tie, count_more, overtake, drop_candidate, count_more, all_counted, final,
+         corrected, count_more, tie]
+
+
+def snapshots(elections, rnd):
+    """Yields (election id, snapshot) of all elections, their counting steps interleaved."""
+    yield from ((election['wahl']['id'], copy.deepcopy(election)) for election in elections)
+    for step in STEPS:
+        for election in rnd.sample(elections, len(elections)):
+            step(election['wahl'], rnd)
+            yield election['wahl']['id'], copy.deepcopy(election)
+
+
+class IncrementalSnapshotsTest(unittest.TestCase):
+    """Texts built from the sentences of the previous snapshot equal texts built from scratch."""
+
+    def setUp(self):
+        output_size, sentence_size = OUTPUT_CACHE.maxsize, SENTENCE_CACHE.maxsize
+        self.addCleanup(OUTPUT_CACHE.resize, output_size)
+        self.addCleanup(SENTENCE_CACHE.resize, sentence_size)
+        self.addCleanup(SENTENCE_CACHE.clear)
+        self.addCleanup(OUTPUT_CACHE.clear)
+        # Every snapshot goes through the sentence cache, not the output cache
+        OUTPUT_CACHE.clear()
+        OUTPUT_CACHE.resize(0)
+        SENTENCE_CACHE.clear()
+
+    def replay(self, count):
+        rnd = random.Random(count)
+        elections = [make_election(index, rnd.randint(1, 8), 'Zwischenergebnis', rnd=rnd, tie=index % 5 == 0)
+                     for index in range(count)]
+        for number, (id_, snapshot) in enumerate(snapshots(elections, rnd)):
+            variables = parse_election_data(snapshot)
+            expected = generate_election_text(variables, id_, use_cache=False)
+            with self.subTest(snapshot=number, id=id_):
+                self.assertEqual(generate_election_text(variables, id_), expected)
+
+    def test_snapshots(self):
+        self.replay(30)
+
+    def test_snapshots_with_evictions(self):
+        # Fewer cached snapshots than elections: some snapshots find no previous sentences
+        SENTENCE_CACHE.resize(5)
+        self.replay(12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from ndrwahltexte.batch import generate_batch
+from ndrwahltexte.text_generator import OUTPUT_CACHE, SENTENCE_CACHE
+
+from support import enabled_metrics, make_elections
+
+
+class BatchMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        # Measure generation, not cache hits
+        OUTPUT_CACHE.clear()
+        SENTENCE_CACHE.clear()
+        self.elections = make_elections(20)
+
+    def assert_measured(self, data, parse_stage='parse_election_data'):
+        self.assertIn(parse_stage, data['stages'])
+        self.assertIn('generate_election_text', data['stages'])
+        for stage in ('select_templates', 'generate_text', 'text_corrections', 'decision_table_lookup'):
+            self.assertIn(stage, data['stages'])
+        self.assertTrue(data['conditions'])
+        self.assertTrue(data['renders'])
+        self.assertTrue(data['corrections'])
+        self.assertGreater(data['counters']['condition_evaluations_saved']['count'], 0)
+
+    def test_single_worker(self):
+        instrument = enabled_metrics(self)
+        results = list(generate_batch(self.elections, workers=1))
+        self.assertEqual(len(results), len(self.elections))
+        self.assert_measured(instrument.as_dict())
+
+    def test_single_worker_pandas(self):
+        instrument = enabled_metrics(self)
+        results = list(generate_batch(self.elections, workers=1, parser='pandas'))
+        self.assertEqual(len(results), len(self.elections))
+        self.assert_measured(instrument.as_dict(), 'parse_elections')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import json
+import unittest
+
+import pandas as pd
+
+from ndrwahltexte.batch import generate_batch
+from ndrwahltexte.election import parse_election_data, parse_elections
+
+from support import make_elections
+
+
+def election(candidates, references, ergebnis_art='Endergebnis'):
+    return {'wahl': {'gks_name': 'Musterstadt, Stadt', 'wahlart': 'BM', 'organ': 'Bürgermeister',
+                     'anz_wahlbereiche': 10, 'anz_wahlberechtigte': 5000, 'kandidaten': references,
+                     'ergebnis': {'ergebnis_art': ergebnis_art, 'gez_wahlbereiche': 10, 'wahlbeteil': 51.2,
+                                  'kandidaten': candidates}}}
+
+
+def candidate(number, prozent):
+    return {'kandidatur_id': number, 'pos': 1, 'prozent': prozent}
+
+
+def reference(number, **fields):
+    return dict({'kandidatur_id': number, 'pos': 1}, **fields)
+
+
+PARTIES = [reference(1, partei='SPD'), reference(2, partei='CDU'), reference(3, partei='Grüne'),
+           reference(4, partei='AfD')]
+
+FIXTURES = {
+    'tie for first place': election([candidate(1, 30.0), candidate(2, 40.0), candidate(3, 40.0), candidate(4, 30.0)],
+                                    PARTIES),
+    'all tied': election([candidate(4, 25.0), candidate(3, 25.0), candidate(2, 25.0), candidate(1, 25.0)], PARTIES),
+    'unmatched candidate': election([candidate(1, 40.0), candidate(9, 35.0), candidate(2, 25.0)], PARTIES),
+    'partei is null': election([candidate(1, 40.0), candidate(2, 35.0)], [reference(1, partei='SPD'),
+                                                                          reference(2, partei=None)]),
+    'partei is missing': election([candidate(1, 40.0), candidate(2, 35.0)], [reference(1, partei='SPD'),
+                                                                             reference(2)]),
+    'no references': election([candidate(1, 40.0), candidate(2, 35.0)], []),
+    'references without partei': election([candidate(1, 40.0)], [reference(1)]),
+    'duplicate references': election([candidate(1, 40.0), candidate(2, 35.0)],
+                                     [reference(1, partei='SPD'), reference(1, partei='CDU'), reference(2, partei='AfD')]),
+    'missing percentages': election([candidate(1, None), candidate(2, 35.0), candidate(3, None), candidate(4, 35.0)],
+                                    PARTIES),
+    'nan percentages': election([candidate(1, float('nan')), candidate(2, 35.0), candidate(3, 35.0)], PARTIES),
+    'no percentages': election([candidate(1, None), candidate(2, None)], PARTIES),
+    'integer percentages': election([candidate(1, 30), candidate(2, 45), candidate(3, 25)], PARTIES),
+    'large integers': election([candidate(1, 2 ** 60), candidate(2, 2 ** 60 + 1)], PARTIES),
+    'string ids': election([candidate('1', 40.0), candidate(2, 35.0)], PARTIES),
+    'no candidates': election([], PARTIES, 'Kein Ergebnis'),
+}
+
+MALFORMED = [
+    {'wahl': []},
+    {'wahl': {'ergebnis': []}},
+    {'wahl': {'gks_name': 5, 'ergebnis': {}}},
+    election([{'pos': 1, 'prozent': 40.0}], PARTIES),
+    election([{'kandidatur_id': 1, 'pos': 1}], PARTIES),
+    election([candidate(1, 40.0)], [{'partei': 'SPD'}]),
+    election([candidate(1, [40.0])], PARTIES),
+    election([candidate(1, 40.0), candidate(2, 'viel')], PARTIES),
+]
+
+# Valid, but not representable in one DataFrame, so parse_elections parses them one by one
+UNUSUAL = [
+    {},
+    election([candidate(1.0, 40.0)], PARTIES),
+    election([candidate(None, 40.0)], PARTIES),
+    election([candidate(True, 40.0)], PARTIES),
+    election([candidate(1, True)], PARTIES),
+    election([candidate(1, '40')], PARTIES),
+    election([candidate(1, 40.0)], [reference(1, partei=5)]),
+]
+
+
+def described(variables):
+    """All variables, the candidates and their ranking; repr tells None from nan and 30 from 30.0."""
+    if isinstance(variables, Exception):
+        return repr((type(variables), variables.args))
+    return repr((sorted(dict(variables).items()), variables.parteien, variables.prozente, variables.ranking()))
+
+
+def parse_or_exception(raw_data):
+    try:
+        return parse_election_data(raw_data)
+    except Exception as e:
+        return e
+
+
+class BackendTest(unittest.TestCase):
+
+    def test_fixtures(self):
+        for name, raw_data in FIXTURES.items():
+            with self.subTest(name):
+                self.assertEqual(described(parse_election_data(raw_data, backend='pandas')),
+                                 described(parse_election_data(raw_data, backend='python')))
+
+    def test_synthetic_elections(self):
+        for raw_data in make_elections(200):
+            self.assertEqual(described(parse_election_data(raw_data, backend='pandas')),
+                             described(parse_election_data(raw_data, backend='python')))
+
+    def test_malformed_elections_raise_in_both(self):
+        for raw_data in (election([{'pos': 1, 'prozent': 40.0}], PARTIES),
+                         election([{'kandidatur_id': 1, 'pos': 1}], PARTIES),
+                         election([candidate(1, 40.0)], [{'partei': 'SPD'}])):
+            for backend in ('python', 'pandas'):
+                with self.assertRaises(Exception):
+                    parse_election_data(raw_data, backend=backend)
+
+
+class RankingTest(unittest.TestCase):
+    """Candidates with equal percentages keep the order of the results, missing percentages rank last."""
+
+    def test_ties_keep_result_order(self):
+        variables = parse_election_data(FIXTURES['tie for first place'])
+        self.assertEqual(variables.ranking(), (1, 2, 0, 3))
+        self.assertEqual((variables['gewinner_partei'], variables['zweite_partei']), ('CDU', 'Grüne'))
+        variables = parse_election_data(FIXTURES['all tied'])
+        self.assertEqual(variables.ranking(), (0, 1, 2, 3))
+
+    def test_same_as_stable_pandas_sort(self):
+        # Except for 'large integers', which rank by their exact values, not as floats
+        fixtures = [raw_data for name, raw_data in FIXTURES.items() if name != 'large integers']
+        for raw_data in fixtures + make_elections(200):
+            variables = parse_election_data(raw_data)
+            prozente = pd.Series([float('nan') if prozent is None else prozent for prozent in variables.prozente],
+                                 dtype=float)
+            expected = prozente.sort_values(ascending=False, kind='stable', na_position='last').index
+            self.assertEqual(variables.ranking(), tuple(expected))
+
+
+class ParseElectionsTest(unittest.TestCase):
+    """parse_elections(batch) is [parse_election_data(raw_data) for raw_data in batch]."""
+
+    def setUp(self):
+        # Malformed and unusual elections between valid ones
+        self.batch = make_elections(30) + list(FIXTURES.values())
+        for number, raw_data in enumerate(MALFORMED + UNUSUAL):
+            self.batch.insert(3 * number, raw_data)
+
+    def test_same_as_one_by_one(self):
+        valid = [raw_data for raw_data in self.batch if raw_data not in MALFORMED]
+        self.assertEqual([described(variables) for variables in parse_elections(valid)],
+                         [described(parse_election_data(raw_data)) for raw_data in valid])
+
+    def test_exceptions_in_place(self):
+        self.assertEqual([described(variables) for variables in parse_elections(self.batch, return_exceptions=True)],
+                         [described(parse_or_exception(raw_data)) for raw_data in self.batch])
+
+    def test_raises_first_exception(self):
+        # Malformed elections fail in different phases of parse_elections; the first in order is raised
+        good = make_elections(3)
+        for first in MALFORMED:
+            for second in MALFORMED:
+                batch = good + [first] + good + [second]
+                with self.assertRaises(Exception) as raised:
+                    parse_elections(batch)
+                self.assertEqual(described(raised.exception), described(parse_or_exception(first)))
+
+    def test_batch_parsers(self):
+        documents = [json.dumps(raw_data) for raw_data in self.batch]
+        documents += ['{"wahl": ', '[1, 2]', '"Text"', 'null', '   ']
+        self.assertEqual(list(generate_batch(documents, workers=1, parser='pandas')),
+                         list(generate_batch(documents, workers=1, parser='python')))
+
+
+if __name__ == '__main__':
+    unittest.main()
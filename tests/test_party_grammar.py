@@ -0,0 +1,95 @@
+import itertools
+import random
+import unittest
+
+from ndrwahltexte.robotext import compile_corrections
+from ndrwahltexte.templates.parties import PARTEIEN, PARTEI_NAMEN, PLURAL_PARTEIEN
+from ndrwahltexte.templates.party_grammar import (
+    ARTICLES, CASES, PREPOSITIONS, build_party_corrections, get_templates_by_case,
+)
+
+PARTIES = [party for parties in PARTEIEN.values() for party in parties]
+FILLERS = ['und', 'liegt', 'knapp', 'Prozent', 'die', 'der', '.', ',', '-Kandidat', 'x']
+
+
+def regex_party_corrections(templates):
+    """The party corrections as one regex per preposition, gender and party, as they were before PartyGrammar."""
+    corrections = {}
+    nominativ = get_templates_by_case(templates, 'nominativ')
+    if nominativ:
+        for gender in ['maskulin', 'feminin', 'neutrum']:
+            if PARTEIEN.get(gender):
+                corrections[rf"\b({'|'.join(PARTEIEN[gender])})\b"] = {
+                    "replacement": rf"{ARTICLES['nominativ'][gender]} \1", "applies_to": nominativ}
+        for party in PARTEIEN.get('plural', []):
+            corrections[rf'\b{party}\b'] = {
+                "replacement": f"die {PLURAL_PARTEIEN[party]}", "applies_to": nominativ}
+        for partei_key in PARTEIEN.get('mit_partei_davor', []):
+            corrections[rf'\b{partei_key}\b'] = {
+                "replacement": f"die Partei {PARTEI_NAMEN[partei_key]}", "applies_to": nominativ}
+
+    for case in ['akkusativ', 'dativ']:
+        scoped = get_templates_by_case(templates, case)
+        if not scoped:
+            continue
+        for gender in ['maskulin', 'feminin', 'neutrum']:
+            if PARTEIEN.get(gender):
+                for prep in PREPOSITIONS[case]:
+                    corrections[rf"(?i)\b{prep} ({'|'.join(PARTEIEN[gender])})\b"] = {
+                        "replacement": rf"{prep} {ARTICLES[case][gender]} \1", "applies_to": scoped}
+        for party in PARTEIEN.get('plural', []):
+            for prep in PREPOSITIONS[case]:
+                corrections[rf'(?i)\b{prep} {party}\b'] = {
+                    "replacement": f"{prep} {ARTICLES[case]['plural']} {PLURAL_PARTEIEN[party]}",
+                    "applies_to": scoped}
+        for partei_key in PARTEIEN.get('mit_partei_davor', []):
+            article = 'die' if case == 'akkusativ' else 'der'
+            for prep in PREPOSITIONS[case]:
+                corrections[rf'(?i)\b{prep} {partei_key}\b'] = {
+                    "replacement": f"{prep} {article} Partei {PARTEI_NAMEN[partei_key]}", "applies_to": scoped}
+
+    corrections[r'\bdie Linke\b'] = {"replacement": "Die Linke", "applies_to": None}
+    corrections[r'\bder Linken\b'] = {"replacement": "Der Linken", "applies_to": None}
+    return corrections
+
+
+def make_sentences(count=3000):
+    """Party names alone, after every preposition (in any spelling) and in random word sequences."""
+    prepositions = [prep for case in ['akkusativ', 'dativ'] for prep in PREPOSITIONS[case]]
+    sentences = []
+    for party in PARTIES:
+        sentences.append(f'{party} gewinnt die Wahl.')
+        sentences.append(f'{party}-Kandidat und {party}x liegen vorn.')
+        for prep in prepositions:
+            sentences.append(f'Knapp {prep} {party} liegt {prep} {party.lower()}.')
+            sentences.append(f'{prep.capitalize()} {party.upper()} und {party}.')
+    rnd = random.Random(0)
+    words = prepositions + [prep.upper() for prep in prepositions] + PARTIES + FILLERS
+    for _ in range(count):
+        sentences.append(' '.join(rnd.choice(words) for _ in range(rnd.randint(2, 8))))
+    return sentences
+
+
+class PartyGrammarTest(unittest.TestCase):
+
+    def test_same_output_as_regex_corrections(self):
+        # One template per combination of cases
+        templates = {
+            '+'.join(cases): {'grammar': list(cases)}
+            for size in range(1, len(CASES) + 1) for cases in itertools.combinations(CASES, size)
+        }
+        expected = compile_corrections(regex_party_corrections(templates), templates)
+        actual = compile_corrections(build_party_corrections(templates), templates)
+        sentences = make_sentences()
+        for key in templates:
+            for sentence in sentences:
+                old, new = sentence, sentence
+                for _, correct in expected[key]:
+                    old = correct(old)
+                for _, correct in actual[key]:
+                    new = correct(new)
+                self.assertEqual(new, old, f'{key}: {sentence!r}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import time
+import unittest
+
+from ndrwahltexte.store import ResultStore
+
+
+class ChangedSinceTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'texte.db')
+        self.store = ResultStore(self.path)
+        self.addCleanup(os.rmdir, directory)
+        self.addCleanup(lambda: [os.unlink(self.path + suffix) for suffix in ('', '-wal', '-shm')
+                                 if os.path.exists(self.path + suffix)])
+        self.addCleanup(self.store.close)
+
+    def test_page_boundary_between_equal_timestamps(self):
+        # Five texts written in the same tick, one later
+        for number in range(5):
+            self.store.put(f'wahl{number}', 'Endergebnis', f'Titel {number}', 'Absatz', timestamp=100.0)
+        self.store.put('wahl5', 'Endergebnis', 'Titel 5', 'Absatz', timestamp=200.0)
+
+        seen = []
+        since, after = 0.0, None
+        while True:
+            page = self.store.changed_since(since, limit=2, after=after)
+            if not page:
+                break
+            seen.extend(result['id'] for result in page)
+            since, after = page[-1]['updated_at'], page[-1]['id']
+
+        self.assertEqual(seen, [f'wahl{number}' for number in range(6)])
+
+    def test_since_without_after_is_exclusive(self):
+        self.store.put('wahl0', 'Endergebnis', 'Titel', 'Absatz', timestamp=100.0)
+        self.store.put('wahl1', 'Endergebnis', 'Titel', 'Absatz', timestamp=200.0)
+        self.assertEqual([result['id'] for result in self.store.changed_since(100.0)], ['wahl1'])
+
+    def test_updated_at_is_commit_time(self):
+        self.store.put('wahl0', 'Endergebnis', 'Titel', 'Absatz')
+        collected = time.time()
+        self.store.flush()
+        self.assertGreaterEqual(self.store.get('wahl0')['updated_at'], collected)
+
+    def test_later_commit_is_after_cursor(self):
+        # A reader has paged up to a text stamped ahead of this clock
+        self.store.put('wahl9', 'Endergebnis', 'Titel', 'Absatz', timestamp=time.time() + 3600)
+        last = self.store.changed_since()[-1]
+        self.store.put('wahl0', 'Endergebnis', 'Titel', 'Absatz')
+        page = self.store.changed_since(last['updated_at'], after=last['id'])
+        self.assertEqual([result['id'] for result in page], ['wahl0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
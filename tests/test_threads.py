@@ -0,0 +1,59 @@
+import copy
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ndrwahltexte import templates
+from ndrwahltexte.batch import generate_batch
+from ndrwahltexte.ndrwahltexte import generate
+from ndrwahltexte.text_generator import OUTPUT_CACHE, SENTENCE_CACHE
+
+from support import make_suite
+
+
+def reset_caches(output_cache_size=4096):
+    templates.invalidate()
+    OUTPUT_CACHE.clear()
+    OUTPUT_CACHE.resize(output_cache_size)
+    SENTENCE_CACHE.clear()
+
+
+class ConcurrentGenerationTest(unittest.TestCase):
+
+    def setUp(self):
+        # Every election twice, as two counting snapshots (see benchmarks/stress_threads.py)
+        self.payloads = []
+        for _, election in make_suite(1):
+            self.payloads.append(election)
+            snapshot = copy.deepcopy(election)
+            ergebnis = snapshot['wahl']['ergebnis']
+            ergebnis['gez_wahlbereiche'] = max(1, ergebnis['gez_wahlbereiche'] - 1)
+            self.payloads.append(snapshot)
+        self.addCleanup(reset_caches)
+        reset_caches()
+        self.expected = [generate(payload) for payload in self.payloads]
+
+    def switch_often(self):
+        interval = sys.getswitchinterval()
+        self.addCleanup(sys.setswitchinterval, interval)
+        sys.setswitchinterval(1e-5)
+
+    def test_thread_pool_matches_serial(self):
+        # Configurations are built while threads wait for them, outputs are evicted concurrently
+        reset_caches(output_cache_size=16)
+        self.switch_often()
+        order = list(range(len(self.payloads))) * 2
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda index: generate(self.payloads[index]), order))
+        self.assertEqual(results, [self.expected[index] for index in order])
+
+    def test_threaded_batch_matches_serial_batch(self):
+        reset_caches()
+        serial = list(generate_batch(self.payloads, workers=1))
+        reset_caches(output_cache_size=16)
+        self.switch_often()
+        self.assertEqual(list(generate_batch(self.payloads, workers=4, threads=True)), serial)
+
+
+if __name__ == '__main__':
+    unittest.main()